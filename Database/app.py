@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, make_response, url_for, send_file
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
@@ -7,6 +7,9 @@ import bcrypt, uuid
 from datetime import datetime, timedelta, timezone
 import redis
 import json
+import re
+import hashlib
+import functools
 from dotenv import load_dotenv
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
@@ -14,14 +17,23 @@ from datetime import datetime
 import base64
 import os
 from dotenv import load_dotenv, dotenv_values
-from PIL import Image
 import io
+import time
 import boto3
+from sqlalchemy import and_, or_, insert, update, delete, func, case, cast, literal_column, Integer, String
+from sqlalchemy.exc import SQLAlchemyError
+from search_index import CatalogueSearchIndex
+from image_store import get_image_store
+from image_pipeline import IMAGE_SIZES, IMAGE_FORMATS, MIME_TYPES, decode_image_data, process_image
+from image_jobs import ImageJobQueue
+from bgg_cache import get_bgg_cache
+from http_client import get_http_client
+from maintenance import get_maintenance_scheduler
 #Loads the env file
 load_dotenv()
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+CORS(app, expose_headers=["X-Next-Cursor"])  # Enable CORS for all routes
 
 r = redis.Redis(host='localhost', port=6379, db=0)
 load_dotenv()
@@ -42,6 +54,19 @@ AWS_REGION = os.getenv("AWS_REGION", "us-east-1")  # or your preferred region
 SENDER_EMAIL = os.getenv("SENDER_EMAIL")  # Must be verified in SES
 ses_client = boto3.client("ses", region_name=AWS_REGION)
 
+# Event images live in a content-addressed store, rows only keep the hash
+image_store = get_image_store()
+# Uploaded images are resized in worker processes, not in the request
+image_jobs = ImageJobQueue(
+    max_workers=int(os.getenv("IMAGE_WORKERS", 2)),
+    max_pending=int(os.getenv("IMAGE_QUEUE_SIZE", 16)),
+    redis_client=r,
+)
+# Outbound HTTP calls share pooled keep-alive connections
+http = get_http_client()
+# BGG XML responses are cached on disk, shared with loadCatalouge.py
+bgg_cache = get_bgg_cache()
+
 #############################################
 #               MODELS                      #
 #############################################
@@ -70,15 +95,30 @@ class NotificationTopic(db.Model):
 class Catalogue(db.Model):
     __tablename__ = 'catalogue'
     id = db.Column(db.Integer, primary_key=True)  # using Integer as in the table definition
-    title = db.Column(db.String(255), nullable=False)
+    title = db.Column(db.String(255), nullable=False, index=True)
     description = db.Column(db.Text, nullable=True)
     publisher = db.Column(db.String(255), nullable=True)
     image = db.Column(db.String(1000), nullable=True)
-    difficulty = db.Column(db.Float, nullable=False)
+    difficulty = db.Column(db.Float, nullable=False, index=True)
     players = db.Column(db.String(255), nullable=True)
     duration = db.Column(db.String(255), nullable=True)
     yearpublished = db.Column(db.Integer, nullable=True)
     agerange = db.Column(db.String(255), nullable=True)
+    # BoardGameGeek object id, the key bulk imports upsert on
+    bgg_id = db.Column(db.Integer, nullable=True, unique=True, index=True)
+    # SHA-256 of the row as last sent by a bulk sync, and when that sync last saw it
+    content_hash = db.Column(db.String(64), nullable=True)
+    last_synced = db.Column(db.DateTime, nullable=True, index=True)
+    # Numeric copies of players/duration for range filters, 0 means unknown
+    min_players = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    max_players = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    min_playtime = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    max_playtime = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        db.Index('ix_catalogue_players', 'min_players', 'max_players'),
+        db.Index('ix_catalogue_playtime', 'min_playtime', 'max_playtime'),
+    )
 
 # Event model
 class Event(db.Model):
@@ -86,9 +126,12 @@ class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    image = db.Column(db.LargeBinary, nullable=True)
-    start_time = db.Column(db.DateTime, nullable=False)
-    end_time = db.Column(db.DateTime, nullable=False)
+    # SHA-256 of the full size JPEG, its key in image_store and the URL version
+    image_hash = db.Column(db.String(64), nullable=True, index=True)
+    # JSON {size: {format: hash}} of every stored derivative
+    image_variants = db.Column(db.Text, nullable=True)
+    start_time = db.Column(db.DateTime, nullable=False, index=True)
+    end_time = db.Column(db.DateTime, nullable=False, index=True)
     price = db.Column(db.String(50), nullable=True)
     recurring = db.Column(db.Boolean, nullable=False)
     # Link to a catalogue game (board game)
@@ -103,8 +146,8 @@ class Game(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     organizer = db.Column(db.String(255), nullable=False)
-    start_time = db.Column(db.DateTime, nullable=False)
-    end_time = db.Column(db.DateTime, nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False, index=True)
+    end_time = db.Column(db.DateTime, nullable=False, index=True)
     description = db.Column(db.Text, nullable=False)
     players = db.Column(db.String(50), nullable=False)  # e.g., "2-4"
     participants = db.Column(db.Text, nullable=True)  # comma-separated list
@@ -123,36 +166,288 @@ class Admins(db.Model):
     session_exp = db.Column(db.String(255), nullable=True)
 
 
+#############################################
+#              RESPONSE CACHE               #
+#############################################
+
+# Read endpoints keep their serialized JSON in Redis. Each cache namespace has a
+# generation counter that is part of the key, writes bump the counter so every
+# cached response of that namespace is skipped at once without scanning keys.
+CACHE_TTL = int(os.getenv("CACHE_TTL", 300))
+
+def cached_response(*namespaces):
+    """
+    Cache a GET view's 200 responses under the given namespaces for CACHE_TTL
+    seconds and answer If-None-Match with 304. Falls through to the view when
+    Redis is unavailable.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                generations = r.mget([f"cache:gen:{namespace}" for namespace in namespaces])
+                key = "cache:" + ":".join(
+                    f"{namespace}.{(generation or b'0').decode()}"
+                    for namespace, generation in zip(namespaces, generations)
+                ) + ":" + request.host + request.full_path
+                cached = r.get(key)
+            except redis.exceptions.RedisError as e:
+                print(f"Cache unavailable: {e}")
+                return view(*args, **kwargs)
+
+            if cached:
+                entry = json.loads(cached)
+                response = Response(entry["body"], mimetype="application/json")
+                response.headers.update(entry["headers"])
+                etag = entry["etag"]
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                body = response.get_data()
+                etag = hashlib.sha1(body).hexdigest()
+                entry = {
+                    "body": body.decode("utf-8"),
+                    "etag": etag,
+                    "headers": {k: v for k, v in response.headers.items() if k.startswith("X-")},
+                }
+                try:
+                    r.setex(key, CACHE_TTL, json.dumps(entry))
+                except redis.exceptions.RedisError as e:
+                    print(f"Cache unavailable: {e}")
+
+            response.set_etag(etag)
+            # Clients may keep the body but have to revalidate it with the ETag
+            response.headers["Cache-Control"] = "no-cache"
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+def invalidate_cache(*namespaces):
+    """
+    Bump the generation of the given namespaces. Returns {namespace: new
+    generation}, empty when Redis is unavailable.
+    """
+    generations = {}
+    try:
+        for namespace in namespaces:
+            generations[namespace] = r.incr(f"cache:gen:{namespace}")
+    except redis.exceptions.RedisError as e:
+        print(f"Cache invalidation failed: {e}")
+    return generations
+
+
 #############################################
 #              ROUTES                     #
 #############################################
 
 # ----- Catalogue Endpoints -----
+# Columns that can be requested with ?fields= on GET /catalogue
+CATALOGUE_FIELDS = (
+    "id", "title", "description", "publisher", "image", "difficulty",
+    "players", "duration", "yearpublished", "agerange",
+    "min_players", "max_players", "min_playtime", "max_playtime", "bgg_id",
+)
+
+# Accepted ?sort_by= values, each one backed by an indexed column
+CATALOGUE_SORTS = {
+    "id": Catalogue.id,
+    "name": Catalogue.title,
+    "title": Catalogue.title,
+    "difficulty": Catalogue.difficulty,
+    "players": Catalogue.min_players,
+    "time": Catalogue.min_playtime,
+    "duration": Catalogue.min_playtime,
+}
+
+MAX_CATALOGUE_PAGE = 500
+MAX_SEARCH_RESULTS = 1000
+# POST /catalogue/bulk: rows per request, and rows written per transaction
+MAX_BULK_ROWS = 10000
+BULK_CHUNK_SIZE = 500
+
+# Full-text index over catalogue titles/descriptions, loaded on first use. Each
+# API worker keeps its own copy, tagged with the Redis "catalogue" cache
+# generation it was built at: any catalogue write (from any worker, seed.py or
+# an import) bumps the generation and the next search rebuilds a stale index.
+search_index = CatalogueSearchIndex()
+
+def cache_generation(namespace):
+    # None when Redis is unavailable
+    try:
+        return int(r.get(f"cache:gen:{namespace}") or 0)
+    except redis.exceptions.RedisError as e:
+        print(f"Cache unavailable: {e}")
+        return None
+
+def ensure_search_index():
+    generation = cache_generation("catalogue")
+    with search_index.lock:
+        # Without Redis a loaded index is kept as is
+        if not search_index.loaded or generation not in (None, search_index.generation):
+            rows = db.session.query(Catalogue.id, Catalogue.title, Catalogue.description).all()
+            search_index.build(rows, generation)
+    return search_index
+
+def catalogue_changed(update_index=None):
+    """
+    Call after committing a catalogue write. Bumps the "catalogue" cache
+    generation and applies update_index(search_index) to this worker's index
+    when nobody else changed the catalogue since it was built, otherwise the
+    index is rebuilt on the next search.
+    """
+    generation = invalidate_cache("catalogue").get("catalogue")
+    with search_index.lock:
+        if not search_index.loaded:
+            return
+        if update_index is not None and (generation is None or search_index.generation == generation - 1):
+            update_index(search_index)
+            if generation is not None:
+                search_index.generation = generation
+        else:
+            search_index.loaded = False
+
+def encode_cursor(sort_value, row_id):
+    # Opaque keyset cursor: the sort value and id of the last row on the page
+    raw = json.dumps([sort_value, row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def parse_range(value):
+    """
+    Turn a players/duration string such as "2-6", "4" or "Unknown" into a
+    (min, max) tuple of ints, 0 standing in for an unknown bound.
+    """
+    numbers = [int(n) for n in re.findall(r'\d+', str(value or ''))]
+    if not numbers:
+        return 0, 0
+    return min(numbers), max(numbers)
+
+def fill_catalogue_ranges(game):
+    # Derive the numeric range columns from the text columns when not given
+    if not game.min_players and not game.max_players:
+        game.min_players, game.max_players = parse_range(game.players)
+    if not game.min_playtime and not game.max_playtime:
+        game.min_playtime, game.max_playtime = parse_range(game.duration)
+
+def decode_cursor(cursor):
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return sort_value, int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def contains_pattern(text):
+    # LIKE pattern matching text anywhere, its own % and _ matched literally (escape "\\")
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
 @app.route('/catalogue', methods=['GET'])
+@cached_response("catalogue")
 def get_catalogue():
-    games = Catalogue.query.all()
-    result = []
-    for game in games:
-        result.append({
-            "id": game.id,
-            "title": game.title,
-            "description": game.description,
-            "publisher": game.publisher,
-            "image": game.image,
-            "difficulty": game.difficulty,
-            "players": game.players,
-            "duration": game.duration,
-            "yearpublished": game.yearpublished,
-            "agerange": game.agerange,
-        })
-    return jsonify(result)
+    """
+    List the catalogue. Every parameter is optional, with none given the whole
+    catalogue is returned in id order, as before filtering existed.
+      fields          : comma separated columns to return (see CATALOGUE_FIELDS)
+      title           : case-insensitive title substring
+      q               : full-text search over titles and descriptions
+      difficulty_min  : lowest difficulty (inclusive)
+      difficulty_max  : highest difficulty (inclusive)
+      players         : player count the game must support
+      duration        : play time in minutes the game must fit
+      sort_by         : one of CATALOGUE_SORTS (default id), order=asc|desc
+      limit / cursor  : page size and the X-Next-Cursor header of the previous page
+    """
+    args = request.args
+
+    fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()] or list(CATALOGUE_FIELDS)
+    unknown = [f for f in fields if f not in CATALOGUE_FIELDS]
+    if unknown:
+        return jsonify({"error": "Unknown fields: " + ", ".join(unknown)}), 400
+
+    sort_by = args.get("sort_by", "id").lower()
+    if sort_by not in CATALOGUE_SORTS:
+        return jsonify({"error": "Invalid sort_by. Must be one of: " + ", ".join(CATALOGUE_SORTS)}), 400
+    sort_column = CATALOGUE_SORTS[sort_by]
+    descending = args.get("order", "asc").lower() == "desc"
+
+    try:
+        difficulty_min = float(args["difficulty_min"]) if args.get("difficulty_min") else None
+        difficulty_max = float(args["difficulty_max"]) if args.get("difficulty_max") else None
+        limit = int(args["limit"]) if args.get("limit") else None
+        players = int(args["players"]) if args.get("players") else None
+        duration = int(args["duration"]) if args.get("duration") else None
+    except ValueError:
+        return jsonify({"error": "difficulty_min, difficulty_max, players, duration and limit must be numbers"}), 400
+    if limit is not None and not 1 <= limit <= MAX_CATALOGUE_PAGE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_CATALOGUE_PAGE}"}), 400
+
+    # Only pull the requested columns (plus what is needed to page) from the database
+    column_names = list(dict.fromkeys(["id", sort_column.key] + fields))
+    query = db.session.query(*[getattr(Catalogue, name) for name in column_names])
+
+    if args.get("title"):
+        # Substring match, a scan of the title column: q goes through the search index instead
+        query = query.filter(Catalogue.title.ilike(contains_pattern(args["title"]), escape="\\"))
+    truncated = False
+    if args.get("q"):
+        # Resolve the search through the index, the database only sees a primary key lookup
+        matches = ensure_search_index().search(args["q"], limit=MAX_SEARCH_RESULTS + 1)
+        truncated = len(matches) > MAX_SEARCH_RESULTS
+        matches = matches[:MAX_SEARCH_RESULTS]
+        query = query.filter(Catalogue.id.in_([doc_id for doc_id, _ in matches]))
+    if difficulty_min is not None:
+        query = query.filter(Catalogue.difficulty >= difficulty_min)
+    if difficulty_max is not None:
+        query = query.filter(Catalogue.difficulty <= difficulty_max)
+    # Range filters, served by the (min, max) composite indexes
+    if players is not None:
+        query = query.filter(Catalogue.min_players <= players, Catalogue.max_players >= players)
+    if duration is not None:
+        query = query.filter(Catalogue.min_playtime <= duration, Catalogue.max_playtime >= duration)
+
+    # Keyset pagination, continue strictly after the last row of the previous page
+    if args.get("cursor"):
+        try:
+            last_value, last_id = decode_cursor(args["cursor"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if descending:
+            query = query.filter(or_(sort_column < last_value,
+                                     and_(sort_column == last_value, Catalogue.id < last_id)))
+        else:
+            query = query.filter(or_(sort_column > last_value,
+                                     and_(sort_column == last_value, Catalogue.id > last_id)))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), Catalogue.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Catalogue.id.asc())
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all() if limit else query.all()
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), last.id)
+
+    result = [{name: getattr(row, name) for name in fields} for row in rows]
+    response = jsonify(result)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if truncated:
+        # Only the best MAX_SEARCH_RESULTS matches of q are filtered and paged
+        response.headers["X-Search-Truncated"] = str(MAX_SEARCH_RESULTS)
+    return response
 
 @app.route('/catalogue', methods=['POST'])
 def add_catalogue_game():
     data = request.get_json()
     new_game = Catalogue(**data)
+    fill_catalogue_ranges(new_game)
     db.session.add(new_game)
     db.session.commit()
+    catalogue_changed(lambda index: index.add(new_game.id, new_game.title, new_game.description))
     return jsonify({"message": "Catalogue game added", "id": new_game.id}), 201
 
 @app.route('/catalogue', methods=['DELETE'])
@@ -166,10 +461,262 @@ def delete_catalogue_game():
     if game:
         db.session.delete(game)
         db.session.commit()
+        catalogue_changed(lambda index: index.remove(game.id))
         return jsonify({"message": "Catalogue game deleted"}), 200
     return jsonify({"error": "Catalogue game not found"}), 404
 
+# Value types accepted by POST /catalogue/bulk, title and difficulty are required
+CATALOGUE_STRING_COLUMNS = ("title", "description", "publisher", "image", "players", "duration", "agerange")
+CATALOGUE_INT_COLUMNS = ("id", "bgg_id", "yearpublished", "min_players", "max_players", "min_playtime", "max_playtime")
+
+def validate_catalogue_row(row):
+    """
+    Check one bulk catalogue row and return (values, error). Only the columns
+    sent are returned, plus the numeric ranges derived from players/duration.
+    """
+    if not isinstance(row, dict):
+        return None, "Row must be an object"
+    unknown = [key for key in row if key not in CATALOGUE_FIELDS]
+    if unknown:
+        return None, "Unknown fields: " + ", ".join(unknown)
+
+    values = {}
+    for key, value in row.items():
+        if key in CATALOGUE_STRING_COLUMNS:
+            if value is not None and not isinstance(value, str):
+                return None, f"{key} must be a string"
+            values[key] = value
+        elif key in CATALOGUE_INT_COLUMNS:
+            if value in (None, ""):
+                values[key] = None
+                continue
+            try:
+                values[key] = int(value)
+            except (TypeError, ValueError):
+                return None, f"{key} must be an integer"
+            if not -2 ** 31 <= values[key] < 2 ** 31:
+                return None, f"{key} is out of range"
+        elif key == "difficulty":
+            try:
+                values[key] = float(value)
+            except (TypeError, ValueError):
+                return None, "difficulty must be a number"
+
+    if not (values.get("title") or "").strip():
+        return None, "title is required"
+    if len(values["title"]) > 255:
+        return None, "title is longer than 255 characters"
+    if values.get("difficulty") is None:
+        return None, "difficulty is required"
+
+    for text, low, high in (("players", "min_players", "max_players"), ("duration", "min_playtime", "max_playtime")):
+        if not values.get(low) and not values.get(high) and values.get(text) is not None:
+            values[low], values[high] = parse_range(values[text])
+        for key in (low, high):
+            if key in values and values[key] is None:
+                values[key] = 0
+    if values.get("id") is None:
+        values.pop("id", None)
+    return values, None
+
+def parse_bulk_body():
+    """
+    Read a JSON array or an NDJSON stream (one object per line) of catalogue
+    rows. Returns (rows, errors), a row that is not valid JSON is None in rows.
+    """
+    body = request.get_data(as_text=True)
+    if request.mimetype != "application/x-ndjson" and body.lstrip().startswith("["):
+        rows = json.loads(body)
+        return rows, []
+    rows, errors = [], []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError as e:
+            errors.append({"row": len(rows), "error": f"Invalid JSON: {e}"})
+            rows.append(None)
+    return rows, errors
+
+def catalogue_row_hash(values):
+    # Hash of the values a sync sent for a row, the id is not part of the content
+    content = {key: value for key, value in values.items() if key != "id"}
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+def write_catalogue_chunk(chunk):
+    """
+    Upsert a list of (row index, values) in one transaction: rows whose bgg_id
+    or id already exists are updated, the rest inserted. Existing rows whose
+    content hash did not change only get their last_synced time refreshed.
+    Returns (inserted, updated, unchanged).
+    """
+    bgg_ids = [values["bgg_id"] for _, values in chunk if values.get("bgg_id")]
+    ids = [values["id"] for _, values in chunk if values.get("id")]
+    existing_bgg = {
+        row.bgg_id: row for row in db.session.query(Catalogue.bgg_id, Catalogue.id, Catalogue.content_hash)
+        .filter(Catalogue.bgg_id.in_(bgg_ids)).all()
+    } if bgg_ids else {}
+    existing_ids = dict(
+        db.session.query(Catalogue.id, Catalogue.content_hash).filter(Catalogue.id.in_(ids)).all()
+    ) if ids else {}
+
+    now = datetime.utcnow()
+    inserts, updates, unchanged = [], [], []
+    for _, values in chunk:
+        content_hash = catalogue_row_hash(values)
+        if values.get("bgg_id") in existing_bgg:
+            row_id, stored_hash = existing_bgg[values["bgg_id"]].id, existing_bgg[values["bgg_id"]].content_hash
+        elif values.get("id") in existing_ids:
+            row_id, stored_hash = values["id"], existing_ids[values["id"]]
+        else:
+            inserts.append(dict(
+                {key: None for key in CATALOGUE_STRING_COLUMNS + ("yearpublished", "bgg_id")},
+                **values, content_hash=content_hash, last_synced=now,
+            ))
+            continue
+        if stored_hash == content_hash:
+            unchanged.append({"id": row_id, "last_synced": now})
+        else:
+            updates.append(dict(values, id=row_id, content_hash=content_hash, last_synced=now))
+
+    # executemany batches, one INSERT and one UPDATE statement per set of columns
+    if inserts:
+        db.session.execute(insert(Catalogue), inserts)
+    if updates:
+        db.session.execute(update(Catalogue), updates)
+    if unchanged:
+        db.session.execute(update(Catalogue), unchanged)
+    db.session.commit()
+    return len(inserts), len(updates), len(unchanged)
+
+@app.route('/catalogue/bulk', methods=['POST'])
+def bulk_catalogue():
+    """
+    Insert or update many catalogue games at once. The body is a JSON array or
+    NDJSON (Content-Type: application/x-ndjson). Rows are matched on bgg_id,
+    then id, and written in transactions of BULK_CHUNK_SIZE rows. Rows sent
+    exactly as last time are not rewritten. Invalid rows are reported by their
+    position and do not stop the others.
+    """
+    try:
+        rows, errors = parse_bulk_body()
+    except ValueError as e:
+        return jsonify({"error": f"Invalid JSON: {e}"}), 400
+    if not isinstance(rows, list):
+        return jsonify({"error": "Expected a JSON array or NDJSON rows"}), 400
+    if len(rows) > MAX_BULK_ROWS:
+        return jsonify({"error": f"At most {MAX_BULK_ROWS} rows per request"}), 413
+
+    valid = []
+    seen = {}
+    for index, row in enumerate(rows):
+        if row is None and any(error["row"] == index for error in errors):
+            continue
+        values, error = validate_catalogue_row(row)
+        if error is None:
+            for key in ("bgg_id", "id"):
+                if values.get(key) is not None:
+                    if (key, values[key]) in seen:
+                        error = f"Duplicate {key} {values[key]} (row {seen[(key, values[key])]})"
+                        break
+                    seen[(key, values[key])] = index
+        if error:
+            errors.append({"row": index, "error": error})
+        else:
+            valid.append((index, values))
+
+    totals = [0, 0, 0]  # inserted, updated, unchanged
+    for start in range(0, len(valid), BULK_CHUNK_SIZE):
+        chunk = valid[start:start + BULK_CHUNK_SIZE]
+        try:
+            counts = write_catalogue_chunk(chunk)
+        except SQLAlchemyError:
+            db.session.rollback()
+            # Redo the chunk row by row to find out which rows the database rejects
+            counts = [0, 0, 0]
+            for index, values in chunk:
+                try:
+                    counts = [total + count for total, count in zip(counts, write_catalogue_chunk([(index, values)]))]
+                except SQLAlchemyError as e:
+                    db.session.rollback()
+                    errors.append({"row": index, "error": str(getattr(e, "orig", None) or e).splitlines()[0]})
+        totals = [total + count for total, count in zip(totals, counts)]
+    inserted, updated, unchanged = totals
+
+    if inserted or updated:
+        # Ids of inserted rows are not known here, rebuild the search index on next use
+        catalogue_changed()
+    errors.sort(key=lambda error: error["row"])
+    return jsonify({
+        "received": len(rows),
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": unchanged,
+        "failed": len(errors),
+        "errors": errors,
+    }), 200
+
+@app.route('/catalogue/sync-state', methods=['GET'])
+def get_catalogue_sync_state():
+    """
+    bgg_id, content hash and last sync time of every catalogue game that came
+    from BGG, for incremental imports to work out what is new or stale.
+    """
+    rows = (db.session.query(Catalogue.bgg_id, Catalogue.content_hash, Catalogue.last_synced)
+            .filter(Catalogue.bgg_id.isnot(None)).all())
+    return jsonify([{
+        "bgg_id": row.bgg_id,
+        "content_hash": row.content_hash,
+        "last_synced": row.last_synced.isoformat() + "Z" if row.last_synced else None,
+    } for row in rows])
+
+@app.route('/catalogue/search', methods=['GET'])
+@cached_response("catalogue")
+def search_catalogue():
+    """
+    Ranked full-text search over catalogue titles and descriptions. Query words
+    also match as prefixes ("cat" finds "Catan") and with small typos.
+      q      : search text (required)
+      fields : comma separated columns to return next to id and score
+      limit  : number of results, 1-100 (default 20)
+    """
+    query_text = request.args.get("q", "").strip()
+    if not query_text:
+        return jsonify({"error": "Missing q parameter"}), 400
+    fields = [f.strip() for f in request.args.get("fields", "title").split(",") if f.strip()]
+    unknown = [f for f in fields if f not in CATALOGUE_FIELDS]
+    if unknown:
+        return jsonify({"error": "Unknown fields: " + ", ".join(unknown)}), 400
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+    if not 1 <= limit <= 100:
+        return jsonify({"error": "limit must be between 1 and 100"}), 400
+
+    matches = ensure_search_index().search(query_text, limit=limit)
+    if not matches:
+        return jsonify([])
+
+    column_names = list(dict.fromkeys(["id"] + fields))
+    rows = (db.session.query(*[getattr(Catalogue, name) for name in column_names])
+            .filter(Catalogue.id.in_([doc_id for doc_id, _ in matches]))
+            .all())
+    rows_by_id = {row.id: row for row in rows}
+
+    result = []
+    for doc_id, score in matches:
+        row = rows_by_id.get(doc_id)
+        if row is None:
+            continue
+        item = {name: getattr(row, name) for name in column_names}
+        item["score"] = round(score, 4)
+        result.append(item)
+    return jsonify(result)
+
 @app.route('/catalogue/titles', methods=['GET'])
+@cached_response("catalogue")
 def get_catalogue_titles():
     games = Catalogue.query.with_entities(Catalogue.id, Catalogue.title).all()
     result = [{"id": game.id, "title": game.title} for game in games]
@@ -199,19 +746,162 @@ def delete_user():
     return jsonify({"error": "User not found"}), 404
 
 # ----- Event Endpoints -----
+def set_event_image(event, derivatives):
+    # derivatives is the {size: {format: bytes}} output of process_image, or None
+    if not derivatives:
+        event.image_hash = None
+        event.image_variants = None
+        return
+    variants = {
+        size: {fmt: image_store.put(data) for fmt, data in formats.items()}
+        for size, formats in derivatives.items()
+    }
+    event.image_hash = variants["full"]["jpeg"]
+    event.image_variants = json.dumps(variants)
+
+def event_image_variants(image_hash, image_variants):
+    if not image_hash:
+        return {}
+    if image_variants:
+        return json.loads(image_variants)
+    # Images stored before derivatives existed only have the full JPEG
+    return {"full": {"jpeg": image_hash}}
+
+def event_image_set(event):
+    # (image_hash, every stored hash) for release_images
+    variants = event_image_variants(event.image_hash, event.image_variants)
+    return event.image_hash, {h for formats in variants.values() for h in formats.values()}
+
+def images_in_use(image_hashes):
+    return {h for (h,) in db.session.query(Event.image_hash)
+            .filter(Event.image_hash.in_(list(image_hashes))).distinct()}
+
+def release_images(image_sets):
+    """
+    Delete the stored derivatives of images no event points to anymore
+    (identical uploads share their files). Call after committing.
+    """
+    image_sets = [(image_hash, hashes) for image_hash, hashes in image_sets if image_hash]
+    if not image_sets:
+        return
+    in_use = images_in_use(image_hash for image_hash, _ in image_sets)
+    removed = []  # (image_hash, stored bytes)
+    for image_hash, hashes in image_sets:
+        if image_hash not in in_use:
+            for h in hashes:
+                data = image_store.get(h)
+                image_store.delete(h)
+                if data is not None:
+                    removed.append((image_hash, data))
+    if not removed:
+        return
+    # An identical upload may have been committed since the check, its event
+    # points at the files just deleted: put them back. A fresh transaction is
+    # needed to see that commit.
+    db.session.commit()
+    in_use = images_in_use({image_hash for image_hash, _ in removed})
+    for image_hash, data in removed:
+        if image_hash in in_use:
+            image_store.put(data)
+
+def attach_event_image(event, derivatives):
+    """
+    Point the event at the processed image and commit. Stored files nothing
+    points to are removed, the new ones if the commit fails, the previous
+    image's if no other event uses it.
+    """
+    previous_image = event_image_set(event)
+    set_event_image(event, derivatives)
+    new_image = event_image_set(event)
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        release_images([new_image])
+        raise
+    # Another event may have released identical files between put() and the
+    # commit, put() only writes the ones that are missing
+    for formats in (derivatives or {}).values():
+        for data in formats.values():
+            image_store.put(data)
+    if previous_image[0] != new_image[0]:
+        release_images([previous_image])
+    invalidate_cache("events")
+
+# Image URLs this API hands out, relative or absolute
+EVENT_IMAGE_URL = re.compile(r"^(https?://[^/]+)?/events/\d+/image(\?|$)")
+
+def is_image_upload(image_data):
+    # The website sends back the image URL it was given when an event is edited
+    # without picking a new file. Anything else is a data URL or bare base64
+    # upload (a bare JPEG starts with "/9j/").
+    if not image_data:
+        return False
+    return not (image_data.startswith(("http://", "https://")) or EVENT_IMAGE_URL.match(image_data))
+
+def event_image_url(event, size="full"):
+    if not event.image_hash:
+        return None
+    # The hash in the URL lets clients cache the image forever, a new upload gets a new URL
+    return url_for('get_event_image', event_id=event.id, size=size, v=event.image_hash[:16], _external=True)
+
+MAX_LISTING_LIMIT = 500
+
+def parse_time(value):
+    # ISO 8601, times with an offset are converted to the naive UTC the tables store
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def time_window(model, query):
+    """
+    Apply the from/to/limit parameters of the event and game listings. A row is
+    in the window when it has not ended by `from` and starts before `to`. With
+    any of them given rows come sorted by start time. Returns (query, error).
+    """
+    args = request.args
+    try:
+        start = parse_time(args["from"]) if args.get("from") else None
+        end = parse_time(args["to"]) if args.get("to") else None
+    except ValueError:
+        return None, "from and to must be ISO 8601 times"
+    try:
+        limit = int(args["limit"]) if args.get("limit") else None
+    except ValueError:
+        return None, "limit must be a number"
+    if limit is not None and not 1 <= limit <= MAX_LISTING_LIMIT:
+        return None, f"limit must be between 1 and {MAX_LISTING_LIMIT}"
+
+    if start is not None:
+        query = query.filter(model.end_time >= start)
+    if end is not None:
+        query = query.filter(model.start_time < end)
+    if start is not None or end is not None or limit is not None:
+        query = query.order_by(model.start_time, model.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query, None
+
 @app.route('/events', methods=['GET'])
+@cached_response("events")
 def get_events():
-    events = Event.query.all()
+    """
+    List events, optionally only those overlapping from/to (ISO 8601) and at
+    most limit of them, sorted by start time.
+    """
+    query, error = time_window(Event, Event.query)
+    if error:
+        return jsonify({"error": error}), 400
+    events = query.all()
     result = []
     for event in events:
         result.append({
             "id": event.id,
             "title": event.title,
             "description": event.description,
-            "image": (
-                "data:image/jpeg;base64," + base64.b64encode(event.image).decode("utf-8")
-                if event.image else None
-            ),
+            "image": event_image_url(event),
+            "images": {size: event_image_url(event, size) for size in IMAGE_SIZES} if event.image_hash else None,
             "startTime": event.start_time.isoformat(),
             "endTime": event.end_time.isoformat(),
             "price": event.price,
@@ -221,36 +911,89 @@ def get_events():
     return jsonify(result)
 
 
+def queue_event_image(event_id, image_bytes, announce=False):
+    """
+    Process an uploaded image in the worker pool and attach the derivatives to
+    the event once they are ready. A queue slot must already be reserved.
+    Returns the job id.
+    """
+    def attach(derivatives, error):
+        with app.app_context():
+            event = db.session.get(Event, event_id)
+            if event is None:
+                # Deleted while its image was processing
+                return
+            try:
+                if error is None:
+                    attach_event_image(event, derivatives)
+                else:
+                    print(f"Image processing failed for event {event_id}: {error}")
+            finally:
+                if announce:
+                    announce_event(event)
+
+    return image_jobs.submit(process_image, image_bytes, on_done=attach, event=event_id)
+
+def start_image_job(event_id, image_bytes, announce=False):
+    """
+    Queue the image of an already saved event. Returns the fields to add to the
+    response: the job id, or an error when the job could not be started, in
+    which case the event keeps its current image and is announced without it.
+    """
+    try:
+        return {"imageJob": queue_event_image(event_id, image_bytes, announce=announce)}
+    except Exception as e:
+        print(f"Could not queue the image of event {event_id}: {e}")
+        if announce:
+            announce_event(db.session.get(Event, event_id))
+        return {"imageError": "Image processing could not be started, upload the image again"}
+
+def image_queue_full():
+    response = jsonify({"error": "Image processing queue is full, try again shortly"})
+    response.headers["Retry-After"] = "5"
+    return response, 503
+
 @app.route('/events', methods=['POST'])
 def create_event():
     data = request.get_json()
     image_data = data.get("image")
     image_bytes = None
 
-    if image_data:
+    if is_image_upload(image_data):
         try:
-            # Resize the image to reduce resolution
-            image_bytes = resize_image(image_data)
+            image_bytes = decode_image_data(image_data)
         except Exception as e:
-            print(e)
-            return jsonify({"error": "Image processing failed: " + str(e)}), 500
-
-    new_event = Event(
-        title=data.get("title"),
-        description=data.get("description"),
-        image=image_bytes,  # Store the resized image bytes
-        start_time=datetime.fromisoformat(data.get("startTime")),
-        end_time=datetime.fromisoformat(data.get("endTime")),
-        price=data.get("price"),
-        game_id=data.get("game"),
-        participants=data.get("participants"),
-        recurring=data.get("recurring", False)
-    )
-    db.session.add(new_event)
-    db.session.commit()
+            return jsonify({"error": "Invalid image data: " + str(e)}), 400
+        # Resizing happens in the worker pool, refuse the request while it is saturated
+        if not image_jobs.reserve():
+            return image_queue_full()
 
-    announce_event(new_event)
-    return jsonify({"message": "Event created", "id": new_event.id}), 201
+    try:
+        new_event = Event(
+            title=data.get("title"),
+            description=data.get("description"),
+            start_time=datetime.fromisoformat(data.get("startTime")),
+            end_time=datetime.fromisoformat(data.get("endTime")),
+            price=data.get("price"),
+            game_id=data.get("game"),
+            participants=data.get("participants"),
+            recurring=data.get("recurring", False)
+        )
+        db.session.add(new_event)
+        db.session.commit()
+    except Exception:
+        if image_bytes:
+            image_jobs.release()
+        raise
+    invalidate_cache("events")
+
+    result = {"message": "Event created", "id": new_event.id}
+    if image_bytes:
+        # Announced once the image is attached so the bot can show it
+        result.update(start_image_job(new_event.id, image_bytes, announce=True))
+    else:
+        announce_event(new_event)
+    return jsonify(result), 201
 
 @app.route('/events/<int:event_id>', methods=['PUT'])
 def update_event(event_id):
@@ -259,6 +1002,16 @@ def update_event(event_id):
     if not event:
         return jsonify({"error": "Event not found"}), 404
 
+    image_data = data.get("image")
+    image_bytes = None
+    if is_image_upload(image_data):
+        try:
+            image_bytes = decode_image_data(image_data)
+        except Exception as e:
+            return jsonify({"error": "Invalid image data: " + str(e)}), 400
+        if not image_jobs.reserve():
+            return image_queue_full()
+
     # Update text fields
     event.title = data.get("title", event.title)
     event.description = data.get("description", event.description)
@@ -269,18 +1022,70 @@ def update_event(event_id):
     event.participants = data.get("participants", event.participants)
     event.recurring = data.get("recurring", event.recurring)
 
-    # Handle image update
-    image_data = data.get("image")
-    if image_data:
-        try:
-            # Resize and convert the new image
-            event.image = resize_image(image_data)
-        except Exception as e:
-            print(e)
-            return jsonify({"error": "Image processing failed: " + str(e)}), 500
-
-    db.session.commit()
-    return jsonify({"message": "Event updated successfully", "id": event.id}), 200
+    try:
+        db.session.commit()
+    except Exception:
+        if image_bytes:
+            image_jobs.release()
+        raise
+    invalidate_cache("events")
+
+    result = {"message": "Event updated successfully", "id": event.id}
+    if image_bytes:
+        # The new image replaces the current one once it is processed
+        result.update(start_image_job(event.id, image_bytes))
+    return jsonify(result), 200
+
+@app.route('/image-jobs/<job_id>', methods=['GET'])
+def get_image_job(job_id):
+    job = image_jobs.status(job_id)
+    if job is None:
+        return jsonify({"error": "Image job not found"}), 404
+    job["queued"] = image_jobs.pending()
+    job["capacity"] = image_jobs.max_pending
+    return jsonify(job)
+
+@app.route('/events/<int:event_id>/image', methods=['GET'])
+def get_event_image(event_id):
+    """
+    Serve one derivative of an event image.
+      size   : thumb, card or full (default full)
+      format : jpeg, webp or avif, otherwise picked from the Accept header
+    """
+    size = request.args.get("size", "full")
+    if size not in IMAGE_SIZES:
+        return jsonify({"error": "Invalid size. Must be one of: " + ", ".join(IMAGE_SIZES)}), 400
+    row = db.session.query(Event.image_hash, Event.image_variants).filter_by(id=event_id).first()
+    if not row or not row.image_hash:
+        return jsonify({"error": "Event image not found"}), 404
+
+    variants = event_image_variants(row.image_hash, row.image_variants)
+    formats = variants.get(size) or variants["full"]
+    fmt = request.args.get("format")
+    negotiated = fmt not in formats
+    if negotiated:
+        # Only pick a modern format when the client lists it explicitly, */* alone gets JPEG
+        accepted = set(request.accept_mimetypes.values())
+        fmt = next((f for f in IMAGE_FORMATS if f in formats and MIME_TYPES[f] in accepted), "jpeg")
+    variant_hash = formats[fmt]
+
+    versioned = request.args.get("v") == row.image_hash[:16]
+    if variant_hash in request.if_none_match:
+        # Revalidation, answer without reading the image
+        response = Response(status=304)
+    else:
+        image_file = image_store.open(variant_hash)
+        if image_file is None:
+            return jsonify({"error": "Event image not found"}), 404
+        # Streamed from the store in chunks
+        response = send_file(image_file, mimetype=MIME_TYPES[fmt], conditional=False, etag=False)
+    response.set_etag(variant_hash)
+    if negotiated:
+        response.headers["Vary"] = "Accept"
+    response.headers["Cache-Control"] = (
+        "public, max-age=31536000, immutable" if versioned else "public, max-age=300"
+    )
+    return response
 
 @app.route('/events', methods=['DELETE'])
 def delete_event():
@@ -289,22 +1094,30 @@ def delete_event():
     if event:
         db.session.delete(event)
         db.session.commit()
+        release_images([event_image_set(event)])
+        invalidate_cache("events")
         return jsonify({"message": "Event deleted"}), 200
     return jsonify({"error": "Event not found"}), 404
 
 # ----- Game Endpoints -----
 @app.route('/games', methods=['GET'])
+@cached_response("games", "catalogue")
 def get_games():
-    games = Game.query.all()
+    """
+    List games, with the same from/to/limit parameters as GET /events.
+    """
+    # Catalogue titles come from the same query, not one lookup per game
+    query = (db.session.query(Game, Catalogue.title)
+             .outerjoin(Catalogue, Game.catalogue_id == Catalogue.id))
+    query, error = time_window(Game, query)
+    if error:
+        return jsonify({"error": error}), 400
+    rows = query.all()
     result = []
-    for game in games:
-        title = game.title
-        if not title and game.catalogue_id:
-            catalogue_game = Catalogue.query.get(game.catalogue_id)
-            title = catalogue_game.title if catalogue_game else None
+    for game, catalogue_title in rows:
         result.append({
             "id": game.id,
-            "title": title,
+            "title": game.title or catalogue_title,
             "organizer": game.organizer,
             "startTime": game.start_time.isoformat(),
             "endTime": game.end_time.isoformat(),
@@ -334,6 +1147,7 @@ def create_game():
     )
     db.session.add(new_game)
     db.session.commit()
+    invalidate_cache("games")
     announce_game(new_game)
     return jsonify({"message": "Game created", "id": new_game.id}), 201
 
@@ -373,6 +1187,7 @@ def delete_game_entry():
     if game:
         db.session.delete(game)
         db.session.commit()
+        invalidate_cache("games")
         return jsonify({"message": "Game deleted"}), 200
     return jsonify({"error": "Game not found"}), 404
 
@@ -400,6 +1215,7 @@ def update_game(game_id):
 
     try:
         db.session.commit()
+        invalidate_cache("games")
         return jsonify({"message": "Game updated successfully", "id": game.id}), 200
     except Exception as e:
         db.session.rollback()
@@ -456,6 +1272,7 @@ def add_participant():
         obj.participants = participant
 
     db.session.commit()
+    invalidate_cache("events" if model_type == 'event' else "games")
     return jsonify({"message": "Participant added", "id": obj_id}), 200
 
 
@@ -496,40 +1313,51 @@ def remove_participant():
     obj.participants = ", ".join(participants) if participants else None
 
     db.session.commit()
+    invalidate_cache("events" if model_type == 'event' else "games")
     return jsonify({"message": "Participant removed", "id": obj_id}), 200
 
 
 # ----- BGG API Proxy Endpoints -----
+BGG_BASE_URL = os.getenv("BGG_BASE_URL", "https://boardgamegeek.com")
+
+def fetch_bgg(path, headers):
+    return http.get(f"{BGG_BASE_URL}{path}", headers=headers)
+
+def bgg_response(body, state):
+    response = Response(body, mimetype="application/xml")
+    response.headers["X-Cache"] = state.upper()
+    return response
+
 @app.route('/bgg/search', methods=['GET'])
 def bgg_search():
     search_query = request.args.get('search', '')
     exact = request.args.get('exact', '')
-    if not search_query:
+    if not search_query.strip():
         return jsonify({"error": "Missing search parameter"}), 400
-    url = f"https://boardgamegeek.com/xmlapi/search?search={requests.utils.quote(search_query)}"
-    if exact:
-        url += f"&exact={exact}"
     try:
-        r = requests.get(url)
-        return Response(r.content, mimetype="application/xml")
+        return bgg_response(*bgg_cache.search(search_query, fetch_bgg, exact=exact))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/bgg/boardgame/<game_id>', methods=['GET'])
 def bgg_boardgame(game_id):
-    params = {}
-    if "stats" in request.args:
-        params["stats"] = request.args.get("stats")
-    url = f"https://boardgamegeek.com/xmlapi/boardgame/{game_id}"
-    if params:
-        query_str = "&".join([f"{k}={v}" for k, v in params.items()])
-        url = f"{url}?{query_str}"
     try:
-        r = requests.get(url)
-        return Response(r.content, mimetype="application/xml")
+        return bgg_response(*bgg_cache.boardgame(game_id, fetch_bgg, stats=request.args.get("stats")))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/metrics/http', methods=['GET'])
+def http_metrics():
+    """
+    Outbound HTTP client counters and connection pool hits/misses per host,
+    plus the BGG cache hit counts.
+    """
+    result = http.metrics()
+    result["bgg_cache"] = dict(bgg_cache.stats)
+    return jsonify(result)
+
 #############################################
 #         SCUFFED ADMIN LOGIN ENDPOINTS     #
 #############################################
@@ -602,33 +1430,146 @@ def logout():
 #############################################
 #         CLEANUP ENDPOINT                #
 #############################################
+WEEK = timedelta(weeks=1)
+
+def weeks_to_catch_up(column, now, dialect):
+    """
+    SQL expression for the whole weeks a recurring event has to move forward
+    so that column (its end time) is no longer before now, None for databases
+    without one here.
+    """
+    if dialect == "mysql":
+        behind = func.timestampdiff(literal_column("MICROSECOND"), column, now)
+        return func.ceil(behind / (WEEK // timedelta(microseconds=1)))
+    if dialect == "sqlite":
+        # No CEIL in stock SQLite: truncate, then add one for a partial week
+        behind = (func.julianday(now) - func.julianday(column)) / 7.0
+        whole = cast(behind, Integer)
+        return whole + case((behind > whole, 1), else_=0)
+    return None
+
+def add_weeks(column, weeks, dialect):
+    # SQL expression for column moved forward by weeks (an SQL expression)
+    if dialect == "mysql":
+        return func.timestampadd(literal_column("DAY"), weeks * 7, column)
+    # Same text format SQLAlchemy stores SQLite datetimes in
+    return func.strftime("%Y-%m-%d %H:%M:%f000", column, "+" + cast(weeks * 7, String) + " days")
+
+def rollover_statement(now, dialect):
+    """
+    Single UPDATE moving every ended recurring event forward by whole weeks,
+    None when weeks_to_catch_up has no expression for the dialect.
+    """
+    weeks = weeks_to_catch_up(Event.end_time, now, dialect)
+    if weeks is None:
+        return None
+    # start_time is set first: MySQL evaluates SET left to right, both use the old end_time
+    return (
+        update(Event)
+        .where(Event.end_time < now, Event.recurring.is_(True))
+        .ordered_values(
+            (Event.start_time, add_weeks(Event.start_time, weeks, dialect)),
+            (Event.end_time, add_weeks(Event.end_time, weeks, dialect)),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def roll_over_in_python(now):
+    # Other databases: read the ended recurring events and update them by primary
+    # key in one executemany, two statements however many rows match
+    rows = db.session.query(Event.id, Event.start_time, Event.end_time).filter(
+        Event.end_time < now, Event.recurring.is_(True)
+    ).all()
+    updates = []
+    for row in rows:
+        weeks = -((row.end_time - now) // WEEK)  # rounded up
+        updates.append({"id": row.id, "start_time": row.start_time + weeks * WEEK, "end_time": row.end_time + weeks * WEEK})
+    if updates:
+        db.session.execute(update(Event), updates)
+    return len(updates)
+
+def run_cleanup(now=None):
+    """
+    Delete ended games and non-recurring events and move ended recurring events
+    forward by whole weeks, each with a single statement. Images no longer used
+    by any event are deleted from the store. Returns the affected row counts and
+    how long it took.
+    """
+    started = time.perf_counter()
+    now = now or datetime.utcnow()
+    expired_events = and_(Event.end_time < now, Event.recurring.is_(False))
+
+    deleted_images = db.session.query(Event.image_hash, Event.image_variants).filter(
+        expired_events, Event.image_hash.isnot(None)
+    ).all()
+    events_deleted = db.session.execute(
+        delete(Event).where(expired_events).execution_options(synchronize_session=False)
+    ).rowcount
+    rollover = rollover_statement(now, db.engine.dialect.name)
+    if rollover is not None:
+        events_rolled_over = db.session.execute(rollover).rowcount
+    else:
+        events_rolled_over = roll_over_in_python(now)
+    games_deleted = db.session.execute(
+        delete(Game).where(Game.end_time < now).execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    release_images([event_image_set(row) for row in deleted_images])
+    if events_deleted or events_rolled_over or games_deleted:
+        invalidate_cache("events", "games")
+    return {
+        "events_deleted": events_deleted,
+        "events_rolled_over": events_rolled_over,
+        "games_deleted": games_deleted,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
 @app.route('/cleanup', methods=['POST'])
 def cleanup():
-    now = datetime.utcnow()
-    
-    # Process Events.
-    events = Event.query.all()
-    for event in events:
-        if event.end_time < now:
-            if event.recurring:
-                # If event is recurring, update start and end times until they are in the future.
-                while event.end_time < now:
-                    event.start_time += timedelta(weeks=1)
-                    event.end_time += timedelta(weeks=1)
-            else:
-                db.session.delete(event)
-    
-    # Process Games (non-recurring; simply delete if past end_time).
-    games = Game.query.all()
-    for game in games:
-        if game.end_time < now:
-            db.session.delete(game)
-    
-    db.session.commit()
-    return jsonify({"message": "Cleanup completed"}), 200
+    result = run_cleanup()
+    return jsonify(dict(result, message="Cleanup completed")), 200
+
+def scheduled_cleanup():
+    # The scheduler thread has no request, give the session an app context
+    with app.app_context():
+        try:
+            return run_cleanup()
+        finally:
+            db.session.remove()
+
+maintenance = get_maintenance_scheduler(r, scheduled_cleanup)
+
+@app.before_request
+def start_maintenance():
+    # Started by the serving worker, not at import, so `flask db upgrade` and
+    # other CLI commands never run the cleanup or take its lock
+    maintenance.start()
+
+@app.route('/maintenance/status', methods=['GET'])
+def maintenance_status():
+    return jsonify(maintenance.status()), 200
+
 
+# Announcements go to a Redis Stream the bot reads with a consumer group, so
+# they wait there while the bot is down. Only the newest entries are kept.
+ANNOUNCEMENT_STREAM = os.getenv("ANNOUNCEMENT_STREAM", "announcements")
+ANNOUNCEMENT_STREAM_MAXLEN = int(os.getenv("ANNOUNCEMENT_STREAM_MAXLEN", 10000))
+
+def publish_announcement(announcement_type, message):
+    try:
+        r.xadd(
+            ANNOUNCEMENT_STREAM, {"type": announcement_type, "data": message},
+            maxlen=ANNOUNCEMENT_STREAM_MAXLEN, approximate=True,
+        )
+    except redis.exceptions.RedisError as e:
+        print(f"Could not publish {announcement_type} announcement: {e}")
 
 def announce_event(event):
+    # The bot only shows the image as an embed thumbnail
+    variants = event_image_variants(event.image_hash, event.image_variants)
+    thumbnail = (variants.get("thumb") or variants.get("full") or {}).get("jpeg")
+    image = image_store.get(thumbnail) if thumbnail else None
     # Convert event details to a JSON message
     message = json.dumps({
         'title': event.title,
@@ -636,13 +1577,12 @@ def announce_event(event):
         'start_time': event.start_time.isoformat(),
         'end_time': event.end_time.isoformat(),
         'price': event.price,
-        'image': base64.b64encode(event.image).decode('utf-8') if event.image else None,
+        'image': base64.b64encode(image).decode('utf-8') if image else None,
         'game': event.game.title if event.game else None,
         'participants': event.participants,
         'id': event.id,
     })
-    # Publish to the 'new_event' channel
-    r.publish('new_event', message)
+    publish_announcement('new_event', message)
     
 def announce_game(game):
     """
@@ -659,8 +1599,7 @@ def announce_game(game):
         'participants': game.participants,
         'catalogue': game.catalogue_id,
     })
-    # Publish the message to the "new_game" channel
-    r.publish('new_game', message)
+    publish_announcement('new_game', message)
     
   
 def announce_game_with_room(game):
@@ -680,8 +1619,7 @@ def announce_game_with_room(game):
         "firstLastName": game["firstLastName"],
         "privateRoomRequest": game["privateRoomRequest"]
     })
-    # Publish the message to the "new_game" channel
-    r.publish('new_game_with_room', message)
+    publish_announcement('new_game_with_room', message)
 
 
 def check_event_conflict(start_iso, end_iso):
@@ -869,31 +1807,6 @@ def create_calendar_game():
     except Exception as e:
         return jsonify({'error': f'Failed to create event: {str(e)}'}), 500
 
-def resize_image(image_data, max_width=800, max_height=600):
-    # Remove the data URL header if present.
-    if image_data.startswith("data:"):
-        _, image_data = image_data.split(",", 1)
-    
-    # Decode the base64 string to raw image bytes.
-    image_bytes = base64.b64decode(image_data)
-    
-    # Open the image using Pillow.
-    image = Image.open(io.BytesIO(image_bytes))
-    
-    # Resize the image while maintaining aspect ratio.
-    image.thumbnail((max_width, max_height))
-    
-    # Convert to RGB if the image is in RGBA or palette mode.
-    if image.mode in ("RGBA", "P"):
-        image = image.convert("RGB")
-    
-    # Save the image to a bytes buffer in JPEG format.
-    buffer = io.BytesIO()
-    image.save(buffer, format="JPEG")
-    
-    return buffer.getvalue()
-
-
 def send_email_via_ses(to_email, subject, html_content):
     """
     Sends an HTML email using AWS SES.
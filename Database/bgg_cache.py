@@ -0,0 +1,216 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import quote
+
+# Persistent cache of BoardGameGeek XML API responses, shared by the /bgg proxy
+# endpoints and loadCatalouge.py. Entries live in a SQLite file so they survive
+# restarts and can be used by several processes at once.
+#   fresh  (younger than ttl)            : served without contacting BGG
+#   stale  (up to stale_ttl past expiry) : served at once, refreshed in the background
+#   older or missing                     : fetched before answering
+# Refreshes send If-None-Match/If-Modified-Since so an unchanged response costs
+# BGG a 304. Responses without any game are kept for negative_ttl only.
+
+BGG_CACHE_PATH = os.getenv(
+    "BGG_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "bgg_cache.sqlite3")
+)
+
+
+def search_request(query, exact=False):
+    """
+    Cache key and BGG path of a search. Case and spacing of the query do not
+    matter to BGG, so they do not make separate entries either.
+    """
+    query = " ".join(query.split()).casefold()
+    exact = 1 if exact and str(exact) not in ("0", "false") else 0
+    path = f"/xmlapi/search?search={quote(query, safe='')}"
+    if exact:
+        path += "&exact=1"
+    return f"search:{exact}:{query}", path
+
+
+def boardgame_request(object_ids, stats=False):
+    """
+    Cache key and BGG path of a boardgame lookup, object_ids is one id or a
+    comma separated list / iterable of ids.
+    """
+    if isinstance(object_ids, (str, int)):
+        object_ids = str(object_ids).split(",")
+    ids = {str(i).strip() for i in object_ids if str(i).strip()}
+    if not ids or not all(re.fullmatch(r"\d+", i) for i in ids):
+        raise ValueError("Object ids must be numbers")
+    ids = sorted(ids, key=int)
+    stats = 1 if stats and str(stats) not in ("0", "false") else 0
+    path = f"/xmlapi/boardgame/{','.join(ids)}"
+    if stats:
+        path += "?stats=1"
+    return f"boardgame:{stats}:{','.join(ids)}", path
+
+
+def is_empty_result(body):
+    """
+    True when a search or boardgame response holds no game. Unparseable bodies
+    are not empty, they are not cached at all.
+    """
+    root = ET.fromstring(body)
+    return not any(
+        node.get("objectid") and node.find("error") is None for node in root.iter("boardgame")
+    )
+
+
+class BGGCache:
+    def __init__(self, path=BGG_CACHE_PATH, ttl=86400, stale_ttl=7 * 86400, negative_ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.refreshing = set()  # keys with a background refresh running
+        self.stats = {"hit": 0, "stale": 0, "miss": 0, "revalidated": 0, "error": 0}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        connection = self.connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " body BLOB NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " fetched_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        connection.commit()
+        self.purge()
+
+    def connection(self):
+        # sqlite3 connections can not be shared between threads, keep one per thread
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+        return connection
+
+    def count(self, state):
+        with self.lock:
+            self.stats[state] += 1
+
+    def load(self, key):
+        return self.connection().execute(
+            "SELECT body, etag, last_modified, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+    def store(self, key, body, etag, last_modified):
+        now = time.time()
+        try:
+            ttl = self.negative_ttl if is_empty_result(body) else self.ttl
+        except ET.ParseError:
+            return
+        connection = self.connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (key, body, etag, last_modified, fetched_at, expires_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (key, body, etag, last_modified, now, now + ttl),
+        )
+        connection.commit()
+
+    def touch(self, key, body):
+        # 304 from BGG: the stored body is current again
+        ttl = self.negative_ttl if is_empty_result(body) else self.ttl
+        connection = self.connection()
+        connection.execute(
+            "UPDATE responses SET expires_at = ? WHERE key = ?", (time.time() + ttl, key)
+        )
+        connection.commit()
+
+    def purge(self):
+        """Drop entries that are too old to be served even as stale."""
+        connection = self.connection()
+        connection.execute("DELETE FROM responses WHERE expires_at < ?", (time.time() - self.stale_ttl,))
+        connection.commit()
+
+    def clear(self):
+        connection = self.connection()
+        connection.execute("DELETE FROM responses")
+        connection.commit()
+
+    def refresh(self, key, path, fetcher, cached):
+        """
+        Fetch path from BGG, revalidating the cached (body, etag, last_modified,
+        expires_at) row if there is one. Returns the body and the cache state.
+        """
+        headers = {}
+        if cached is not None:
+            if cached[1]:
+                headers["If-None-Match"] = cached[1]
+            if cached[2]:
+                headers["If-Modified-Since"] = cached[2]
+        response = fetcher(path, headers)
+        if response.status_code == 304 and cached is not None:
+            self.touch(key, cached[0])
+            return cached[0], "revalidated"
+        response.raise_for_status()
+        self.store(key, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response.content, "miss"
+
+    def refresh_in_background(self, key, path, fetcher, cached):
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def run():
+            try:
+                self.refresh(key, path, fetcher, cached)
+            except Exception as e:
+                self.count("error")
+                print(f"BGG cache refresh of {path} failed: {e}")
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def fetch(self, key, path, fetcher):
+        """
+        Return (body, state) for a key from search_request()/boardgame_request().
+        fetcher(path, headers) performs the BGG request and returns a
+        requests.Response. state is hit, stale, miss or revalidated.
+        """
+        cached = self.load(key)
+        now = time.time()
+        if cached is not None and now < cached[3]:
+            self.count("hit")
+            return cached[0], "hit"
+        if cached is not None and now < cached[3] + self.stale_ttl:
+            self.count("stale")
+            self.refresh_in_background(key, path, fetcher, cached)
+            return cached[0], "stale"
+
+        try:
+            body, state = self.refresh(key, path, fetcher, cached)
+        except Exception:
+            self.count("error")
+            raise
+        self.count(state)
+        return body, state
+
+    def search(self, query, fetcher, exact=False):
+        return self.fetch(*search_request(query, exact), fetcher)
+
+    def boardgame(self, object_ids, fetcher, stats=False):
+        return self.fetch(*boardgame_request(object_ids, stats), fetcher)
+
+
+def get_bgg_cache(path=None):
+    return BGGCache(
+        path or BGG_CACHE_PATH,
+        ttl=int(os.getenv("BGG_CACHE_TTL", 86400)),
+        stale_ttl=int(os.getenv("BGG_CACHE_STALE_TTL", 7 * 86400)),
+        negative_ttl=int(os.getenv("BGG_CACHE_NEGATIVE_TTL", 3600)),
+    )
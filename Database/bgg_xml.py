@@ -0,0 +1,132 @@
+import io
+import xml.etree.ElementTree as ET
+
+# Incremental parsers for BGG XML API responses. Elements are read with
+# iterparse and dropped as soon as their value is taken, so a response holding
+# many games (/xmlapi/boardgame/1,2,3) is parsed in one pass without keeping
+# the whole tree in memory.
+
+# Direct children of <boardgame> whose text is kept
+BOARDGAME_FIELDS = (
+    "yearpublished", "minplayers", "maxplayers", "minplaytime", "maxplaytime",
+    "description", "thumbnail", "boardgamepublisher",
+)
+
+
+def as_stream(source):
+    # Accept bytes, text or an already open binary file
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
+
+
+def iter_search_ids(source):
+    """
+    Yield the object id of every game in a /xmlapi/search response.
+    """
+    root = None
+    for event, element in ET.iterparse(as_stream(source), events=("start", "end")):
+        if root is None:
+            root = element
+        elif event == "start" and element.tag == "boardgame" and element.get("objectid"):
+            yield element.get("objectid")
+        elif event == "end" and element.tag == "boardgame":
+            root.clear()
+
+
+def to_int(text):
+    # Numeric ranges, 0 when BGG does not know the value
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return 0
+
+
+def catalogue_game(raw):
+    """
+    Turn the raw values read from one <boardgame> into a catalogue row.
+    """
+    names = raw["names"]
+    title = next((text for primary, text in names if primary), names[0][1] if names else "")
+
+    min_players, max_players = raw.get("minplayers"), raw.get("maxplayers")
+    if min_players is not None and max_players is not None:
+        players = min_players if min_players == max_players else f"{min_players}-{max_players}"
+    else:
+        players = ""
+
+    min_playtime, max_playtime = raw.get("minplaytime"), raw.get("maxplaytime")
+    if min_playtime is not None and max_playtime is not None:
+        min_time = "Unknown" if min_playtime == "0" else min_playtime
+        max_time = "Unknown" if max_playtime == "0" else max_playtime
+        duration = min_time if min_time == max_time else f"{min_time}-{max_time}"
+    else:
+        duration = "Unknown"
+
+    return {
+        "bgg_id": raw["objectid"],
+        "title": title,
+        "publisher": raw.get("boardgamepublisher", ""),
+        "description": raw.get("description", ""),
+        "yearpublished": raw.get("yearpublished", ""),
+        "image": raw.get("thumbnail", ""),
+        "players": players,
+        "duration": duration,
+        "difficulty": raw.get("averageweight", ""),
+        "min_players": to_int(min_players),
+        "max_players": to_int(max_players),
+        "min_playtime": to_int(min_playtime),
+        "max_playtime": to_int(max_playtime),
+    }
+
+
+def iter_boardgames(source):
+    """
+    Yield a catalogue row for every game in a /xmlapi/boardgame response,
+    single or multi id. Ids BGG does not know (an <error> element) are skipped.
+    """
+    root = None
+    depth = 0
+    raw = None
+    for event, element in ET.iterparse(as_stream(source), events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if root is None:
+                root = element
+            elif depth == 2 and element.tag == "boardgame":
+                raw = {"objectid": element.get("objectid"), "names": [], "error": False}
+            continue
+
+        depth -= 1
+        if raw is None:
+            continue
+        if depth == 1:
+            # </boardgame>: the game is complete, drop it from the tree
+            if not raw["error"] and raw["names"]:
+                yield catalogue_game(raw)
+            raw = None
+            root.clear()
+        elif depth == 2:
+            tag = element.tag
+            if tag == "name":
+                raw["names"].append((element.get("primary") == "true", element.text))
+            elif tag == "error":
+                raw["error"] = True
+            elif tag in BOARDGAME_FIELDS and tag not in raw:
+                # The first publisher is the one kept
+                raw[tag] = element.text or ""
+            element.clear()
+        elif element.tag == "averageweight":
+            raw["averageweight"] = element.text or ""
+            element.clear()
+        else:
+            element.clear()
+
+
+def parse_boardgame_xml(xml_text):
+    """
+    Catalogue row of the first game in a /xmlapi/boardgame response, {} if none.
+    """
+    return next(iter_boardgames(xml_text), {})
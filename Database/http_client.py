@@ -0,0 +1,166 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared client for outbound HTTP calls. One requests.Session keeps connections
+# alive per host, so repeated calls skip the TCP/TLS handshake. Every call gets
+# a timeout, failed calls are retried with jittered exponential backoff, and a
+# semaphore per host caps how many requests run against one server at once.
+
+# Status codes worth retrying: throttling and temporary server trouble
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Methods that are safe to send twice, others only retry with retry=True
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def host_key(host, port):
+    return host if port in (None, 80, 443) else f"{host}:{port}"
+
+
+class HTTPClient:
+    def __init__(self, pool_connections=10, pool_maxsize=10, timeout=(5, 30), max_retries=3,
+                 backoff=0.5, max_backoff=30, per_host=8):
+        """
+        pool_connections : hosts whose connection pool is kept
+        pool_maxsize     : idle connections kept per host
+        timeout          : default (connect, read) timeout in seconds
+        max_retries      : retries after the first attempt
+        backoff          : base delay, attempt n waits up to backoff * 2**n (capped at max_backoff)
+        per_host         : requests allowed in flight per host
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.per_host = per_host
+        self.lock = threading.Lock()
+        self.host_slots = {}
+        self.counters = {}  # host -> request/retry/error counts and in-flight requests
+
+        # Retries are done here so they can be counted, jittered and throttled
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+    def host_state(self, host):
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.per_host)
+                self.counters[host] = {"requests": 0, "retries": 0, "errors": 0, "in_flight": 0}
+            return self.host_slots[host], self.counters[host]
+
+    def count(self, counters, key, amount=1):
+        with self.lock:
+            counters[key] += amount
+
+    def delay(self, attempt, response=None):
+        # Honour Retry-After when the server sends one, otherwise full jitter backoff
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, method, url, retry=None, throttle=None, **kwargs):
+        """
+        Send a request through the shared session and return the response.
+        Connection errors, timeouts and RETRY_STATUSES answers are retried for
+        idempotent methods (or when retry=True). throttle, if given, is called
+        before every attempt, e.g. a rate limiter's acquire. The last response
+        is returned even if its status is an error, raise_for_status() is up to
+        the caller.
+        """
+        method = method.upper()
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        kwargs.setdefault("timeout", self.timeout)
+        parts = urlsplit(url)
+        slots, counters = self.host_state(host_key(parts.hostname, parts.port))
+
+        attempt = 0
+        while True:
+            if throttle is not None:
+                throttle()
+            response = None
+            with slots:
+                self.count(counters, "in_flight")
+                self.count(counters, "requests")
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    self.count(counters, "errors")
+                    if not retry or attempt >= self.max_retries:
+                        raise
+                finally:
+                    self.count(counters, "in_flight", -1)
+
+            if response is not None:
+                if response.status_code not in RETRY_STATUSES or not retry or attempt >= self.max_retries:
+                    return response
+                response.close()
+            self.count(counters, "retries")
+            time.sleep(self.delay(attempt, response))
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def metrics(self):
+        """
+        Per host request counters plus connection pool use. A pool hit is a
+        request sent over a kept-alive connection, a miss had to open a new one.
+        Pools dropped from the pool manager (more than pool_connections hosts)
+        no longer count.
+        """
+        pools = {}
+        manager = self.adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            stats = pools.setdefault(host_key(pool.host, pool.port), {"requests": 0, "connections": 0, "idle": 0})
+            stats["requests"] += pool.num_requests
+            stats["connections"] += pool.num_connections
+            # The pool queue is padded with None up to pool_maxsize
+            if pool.pool is not None:
+                stats["idle"] += sum(1 for connection in list(pool.pool.queue) if connection is not None)
+
+        with self.lock:
+            hosts = {host: dict(counters) for host, counters in self.counters.items()}
+        for host, counters in hosts.items():
+            stats = pools.get(host, {})
+            hits = max(stats.get("requests", 0) - stats.get("connections", 0), 0)
+            counters["pool_hits"] = hits
+            counters["pool_misses"] = stats.get("connections", 0)
+            counters["pool_hit_rate"] = round(hits / stats["requests"], 3) if stats.get("requests") else None
+            counters["idle_connections"] = stats.get("idle", 0)
+        return {
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "per_host": self.per_host,
+            "hosts": hosts,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+def get_http_client():
+    return HTTPClient(
+        pool_connections=int(os.getenv("HTTP_POOL_CONNECTIONS", 10)),
+        pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", 10)),
+        timeout=(float(os.getenv("HTTP_CONNECT_TIMEOUT", 5)), float(os.getenv("HTTP_READ_TIMEOUT", 30))),
+        max_retries=int(os.getenv("HTTP_MAX_RETRIES", 3)),
+        per_host=int(os.getenv("HTTP_PER_HOST", 8)),
+    )
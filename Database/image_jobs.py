@@ -0,0 +1,172 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+import redis
+
+# Runs image processing in a bounded pool of worker processes so request
+# threads never decode or encode images themselves. At most max_pending jobs
+# are queued or running at once, callers are expected to turn a failed
+# reserve() into a "try again later" response. Job status is also written to
+# Redis so every API worker can report it, and it outlives a restart.
+
+
+class ImageJobQueue:
+    def __init__(self, max_workers, max_pending, max_history=1000, redis_client=None,
+                 job_ttl=86400, stale_after=600, completion_workers=2):
+        """
+        redis_client       : where job status is shared, None keeps it in this process only
+        completion_workers : threads running on_done callbacks
+        job_ttl            : seconds a job's status is kept in Redis
+        stale_after        : seconds after which an unfinished job of another (or a
+                             restarted) worker is reported as failed
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_history = max_history
+        self.redis = redis_client
+        self.job_ttl = job_ttl
+        self.stale_after = stale_after
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.executor = None
+        # on_done (database commits, announcements) runs here and not in the pool's
+        # result thread, where a slow callback would hold up every other job
+        self.completions = ThreadPoolExecutor(max_workers=completion_workers, thread_name_prefix="image-job-done")
+        self.jobs = OrderedDict()  # job_id -> status dict, oldest first
+        self.futures = {}  # job_id -> future of the jobs still in the pool
+
+    def get_executor(self):
+        # Started on first use so importing the app does not spawn processes.
+        # Workers are spawned, not forked: the API process runs threads.
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn"))
+            return self.executor
+
+    def reset_executor(self, broken):
+        # A worker died (e.g. killed for memory), the pool refuses all work from now on.
+        # The broken pool has already terminated its workers. Only called from submit():
+        # done callbacks run under the broken pool's lock, so dropping it there deadlocks.
+        with self.lock:
+            if self.executor is not broken:
+                return
+            self.executor = None
+        print("Image worker pool broke, starting a new one")
+
+    def reserve(self):
+        """
+        Claim a queue slot without blocking. Returns False when the queue is full.
+        Every successful reserve() must be followed by submit() or release().
+        """
+        return self.slots.acquire(blocking=False)
+
+    def release(self):
+        self.slots.release()
+
+    def pending(self):
+        with self.lock:
+            return len(self.futures)
+
+    def save(self, job):
+        job["updated"] = time.time()
+        with self.lock:
+            self.jobs[job["id"]] = job
+            while len(self.jobs) > self.max_history:
+                self.jobs.popitem(last=False)
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(f"image_job:{job['id']}", json.dumps(job), ex=self.job_ttl)
+        except redis.exceptions.RedisError as e:
+            print(f"Could not share image job status: {e}")
+
+    def submit(self, fn, *args, on_done=None, **info):
+        """
+        Run fn(*args) in a worker process using a slot taken with reserve().
+        on_done(result, error) runs in a completion thread of this process once
+        the worker finishes, the job only counts as done after it returns.
+        Extra keyword arguments are reported with the job status.
+        """
+        job_id = uuid.uuid4().hex
+        self.save(dict(info, id=job_id, status="queued", error=None, worker=self.worker))
+
+        try:
+            executor = self.get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self.reset_executor(executor)
+                executor = self.get_executor()
+                future = executor.submit(fn, *args)
+        except Exception as e:
+            self.finish(job_id, e)
+            self.release()
+            raise
+
+        with self.lock:
+            self.futures[job_id] = future
+
+        def complete():
+            try:
+                error = future.exception()
+                result = None if error else future.result()
+                if on_done is not None:
+                    on_done(result, error)
+                self.finish(job_id, error)
+            except Exception as e:
+                print(f"Image job {job_id} could not be completed: {e}")
+                self.finish(job_id, e)
+            finally:
+                self.release()
+
+        future.add_done_callback(lambda future: self.completions.submit(complete))
+        return job_id
+
+    def finish(self, job_id, error):
+        with self.lock:
+            self.futures.pop(job_id, None)
+            job = dict(self.jobs.get(job_id) or {"id": job_id, "worker": self.worker})
+        job["status"] = "failed" if error else "done"
+        job["error"] = str(error) if error else None
+        self.save(job)
+
+    def load(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is not None:
+            return dict(job)
+        if self.redis is None:
+            return None
+        try:
+            job = self.redis.get(f"image_job:{job_id}")
+        except redis.exceptions.RedisError as e:
+            print(f"Image job status unavailable: {e}")
+            return None
+        return json.loads(job) if job else None
+
+    def status(self, job_id):
+        """
+        Job info with status queued, processing, done or failed, None if unknown.
+        """
+        job = self.load(job_id)
+        if job is None:
+            return None
+        with self.lock:
+            future = self.futures.get(job_id)
+        if future is not None and (future.running() or future.done()):
+            job["status"] = "processing"
+        elif future is None and job["status"] == "queued" and time.time() - job["updated"] > self.stale_after:
+            # Its worker stopped (or restarted) before finishing it
+            job["status"] = "failed"
+            job["error"] = "Image processing was interrupted, upload the image again"
+        job.pop("updated", None)
+        return job
@@ -0,0 +1,69 @@
+import base64
+import io
+
+from PIL import Image, ImageOps
+
+# Derivatives produced for every uploaded event image, smallest first:
+# name -> (max width, max height, JPEG quality, WebP/AVIF quality)
+#   thumb : Discord embed thumbnail
+#   card  : website event card
+#   full  : event modal / full view
+IMAGE_SIZES = {
+    "thumb": (160, 160, 70, 60),
+    "card": (480, 360, 78, 70),
+    "full": (800, 600, 85, 78),
+}
+
+Image.init()
+# Output formats, best compression first. AVIF needs a Pillow built with libavif.
+IMAGE_FORMATS = [fmt for fmt in ("avif", "webp") if fmt.upper() in Image.SAVE] + ["jpeg"]
+
+MIME_TYPES = {
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "avif": "image/avif",
+}
+
+
+def decode_image_data(image_data):
+    # Accept either a data URL or a bare base64 string
+    if image_data.startswith("data:"):
+        _, image_data = image_data.split(",", 1)
+    return base64.b64decode(image_data)
+
+
+def encode(image, fmt, jpeg_quality, quality):
+    buffer = io.BytesIO()
+    if fmt == "jpeg":
+        image.save(buffer, format="JPEG", quality=jpeg_quality, optimize=True, progressive=True)
+    elif fmt == "webp":
+        image.save(buffer, format="WEBP", quality=quality, method=6)
+    else:
+        image.save(buffer, format="AVIF", quality=quality, speed=8)
+    return buffer.getvalue()
+
+
+def process_image(image_bytes):
+    """
+    Decode an uploaded image and return every derivative as
+    {size: {format: bytes}} for the sizes in IMAGE_SIZES and IMAGE_FORMATS.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+
+    # Let the JPEG decoder downscale while decoding, never below the largest derivative
+    largest = max((width, height) for width, height, _, _ in IMAGE_SIZES.values())
+    image.draft("RGB", largest)
+
+    # Apply the camera orientation so phone photos are not sideways
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    derivatives = {}
+    # Largest first, each smaller size is resized from the previous one
+    for size, (width, height, jpeg_quality, quality) in sorted(
+        IMAGE_SIZES.items(), key=lambda item: -item[1][0] * item[1][1]
+    ):
+        image.thumbnail((width, height), Image.LANCZOS)
+        derivatives[size] = {fmt: encode(image, fmt, jpeg_quality, quality) for fmt in IMAGE_FORMATS}
+    return derivatives
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+
+# Content-addressed image storage. Images are saved under the SHA-256 of their
+# bytes, so identical uploads share one stored copy and a hash never changes
+# meaning. Backends are picked with IMAGE_STORE_BACKEND, add new ones (e.g. S3)
+# to IMAGE_STORE_BACKENDS.
+
+
+class ImageStore(ABC):
+    """
+    Interface every storage backend implements. A backend missing one of the
+    methods cannot be created.
+    """
+
+    @abstractmethod
+    def put(self, data):
+        """Store the bytes if not already present and return their hash."""
+
+    @abstractmethod
+    def get(self, image_hash):
+        """Return the stored bytes, or None if the hash is unknown."""
+
+    @abstractmethod
+    def open(self, image_hash):
+        """Return a readable binary file object, or None if the hash is unknown."""
+
+    @abstractmethod
+    def exists(self, image_hash):
+        pass
+
+    @abstractmethod
+    def delete(self, image_hash):
+        pass
+
+    @staticmethod
+    def hash_bytes(data):
+        return hashlib.sha256(data).hexdigest()
+
+
+class LocalImageStore(ImageStore):
+    """
+    Stores each image as <root>/<hash[0:2]>/<hash[2:4]>/<hash> on local disk.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, image_hash):
+        if len(image_hash) != 64 or not all(c in "0123456789abcdef" for c in image_hash):
+            raise ValueError(f"Invalid image hash: {image_hash}")
+        return os.path.join(self.root, image_hash[0:2], image_hash[2:4], image_hash)
+
+    def put(self, data):
+        image_hash = self.hash_bytes(data)
+        path = self.path(image_hash)
+        if os.path.exists(path):
+            # Same bytes already stored
+            return image_hash
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file and rename so readers never see a partial image
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return image_hash
+
+    def get(self, image_hash):
+        f = self.open(image_hash)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def open(self, image_hash):
+        try:
+            return open(self.path(image_hash), "rb")
+        except FileNotFoundError:
+            return None
+
+    def exists(self, image_hash):
+        return os.path.exists(self.path(image_hash))
+
+    def delete(self, image_hash):
+        try:
+            os.remove(self.path(image_hash))
+        except FileNotFoundError:
+            pass
+
+
+IMAGE_STORE_BACKENDS = {
+    "local": lambda: LocalImageStore(
+        os.getenv("IMAGE_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "images"))
+    ),
+}
+
+
+def get_image_store():
+    backend = os.getenv("IMAGE_STORE_BACKEND", "local")
+    if backend not in IMAGE_STORE_BACKENDS:
+        raise ValueError(f"Unknown IMAGE_STORE_BACKEND: {backend}")
+    return IMAGE_STORE_BACKENDS[backend]()
@@ -1,99 +1,376 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 
 import pandas as pd
-import requests
-import xml.etree.ElementTree as ET 
-
-def load_catalogue_from_csv():
-    with open('./collection (1).csv', 'r') as file:
-        df = pd.read_csv(file)
-        for row in df.itertuples():
-            url = f"https://boardgamegeek.com/xmlapi/search?search={requests.utils.quote(row.objectname)}&exact=1"
-            for child in ET.fromstring(requests.get(url).content):
-                if child.attrib['objectid']:
-                    json = parse_boardgame_xml(requests.get(f"https://boardgamegeek.com/xmlapi/boardgame/{child.attrib['objectid']}?stats=1").content)
-                    if json:
-                        requests.post("http://localhost:5000/catalogue", json=json)  # Adjust the URL as needed
-
-
-def parse_boardgame_xml(xml_text):
-    root = ET.fromstring(xml_text)
-    boardgame_node = root.find("boardgame")
-
-    if not boardgame_node:
-        return {}
-
-    # Extract Title
-    new_title = ""
-    name_nodes = boardgame_node.findall("name")
-    for name in name_nodes:
-        if name.get("primary") == "true":
-            new_title = name.text
-            break
-    if not new_title and name_nodes:
-        new_title = name_nodes[0].text
-
-    # Extract Publisher
-    publisher_nodes = boardgame_node.findall("boardgamepublisher")
-    new_publisher = publisher_nodes[0].text if publisher_nodes else ""
-
-    # Extract Description
-    desc_node = boardgame_node.find("description")
-    new_description = desc_node.text if desc_node is not None else ""
-
-    # Extract Release Year
-    year_node = boardgame_node.find("yearpublished")
-    new_release_year = year_node.text if year_node is not None else ""
-
-    # Extract Thumbnail Image
-    thumbnail_node = boardgame_node.find("thumbnail")
-    new_image = thumbnail_node.text if thumbnail_node is not None else ""
-
-    # Extract Player Count
-    min_players_node = boardgame_node.find("minplayers")
-    max_players_node = boardgame_node.find("maxplayers")
-    if min_players_node is not None and max_players_node is not None:
-        new_players = (
-            min_players_node.text
-            if min_players_node.text == max_players_node.text
-            else f"{min_players_node.text}-{max_players_node.text}"
-        )
-    else:
-        new_players = ""
-
-    # Extract Duration
-    min_playtime_node = boardgame_node.find("minplaytime")
-    max_playtime_node = boardgame_node.find("maxplaytime")
-    if min_playtime_node is not None and max_playtime_node is not None:
-        min_time = "Unknown" if min_playtime_node.text == "0" else min_playtime_node.text
-        max_time = "Unknown" if max_playtime_node.text == "0" else max_playtime_node.text
-        new_duration = min_time if min_time == max_time else f"{min_time}-{max_time}"
-    else:
-        new_duration = "Unknown"
-
-    # Extract Difficulty (Average Weight)
-    new_difficulty = ""
-    statistics_node = boardgame_node.find("statistics")
-    print(statistics_node.text)
-
-    if statistics_node is not None:
-        ratings_node = statistics_node.find("ratings")
-        if ratings_node is not None:
-            average_weight_node = ratings_node.find("averageweight")
-            if average_weight_node is not None:
-                new_difficulty = average_weight_node.text
 
+from bgg_cache import BGG_CACHE_PATH, get_bgg_cache, search_request, boardgame_request
+from bgg_xml import iter_boardgames, iter_search_ids
+from http_client import HTTPClient
+
+# Point these at a local stub server to import without touching BGG
+BGG_BASE_URL = os.getenv("BGG_BASE_URL", "https://boardgamegeek.com")
+CATALOGUE_API_URL = os.getenv("CATALOGUE_API_URL", "http://localhost:5000")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket, allows `rate` requests per second on average
+    with bursts of up to `capacity` requests.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Checkpoint:
+    """
+    Append-only file listing the collection entries already imported,
+    one name per line, so an interrupted import can skip them. It is
+    removed once an import finishes without failures.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.completed = set()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.completed = {line.rstrip("\n") for line in f if line.strip()}
+
+    def __contains__(self, name):
+        return name in self.completed
+
+    def mark(self, name):
+        with self.lock:
+            self.completed.add(name)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(name + "\n")
+
+    def clear(self):
+        with self.lock:
+            self.completed = set()
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class ResolvedNames:
+    """
+    Append-only file of the BGG ids each collection name resolved to, one JSON
+    object per line, so names are searched on BGG only once. Delete the file
+    to search every name again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.ids = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.ids[entry["name"]] = entry["ids"]
+
+    def get(self, name):
+        return self.ids.get(name)
+
+    def add(self, name, ids):
+        with self.lock:
+            self.ids[name] = ids
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"name": name, "ids": ids}) + "\n")
+
+
+class BGGClient:
+    """
+    Rate limited access to the BGG XML API, retrying throttled requests with
+    backoff. Responses go through the BGG cache shared with the API server
+    when one is given.
+    """
+
+    def __init__(self, base_url=BGG_BASE_URL, rate=2.0, burst=2, max_retries=5, timeout=30, cache=None, http=None):
+        self.base_url = base_url.rstrip("/")
+        self.bucket = TokenBucket(rate, burst)
+        self.http = http or HTTPClient(max_retries=max_retries, timeout=timeout)
+        self.cache = cache
+
+    def request(self, path, headers=None):
+        # Every attempt, retries included, waits for the shared rate limit
+        response = self.http.get(f"{self.base_url}{path}", headers=headers, throttle=self.bucket.acquire)
+        response.raise_for_status()
+        return response
+
+    def get(self, key, path):
+        if self.cache is None:
+            return self.request(path).content
+        body, _ = self.cache.fetch(key, path, self.request)
+        return body
+
+    def search(self, name):
+        return self.get(*search_request(name, exact=True))
+
+    def boardgame(self, object_ids):
+        return self.get(*boardgame_request(object_ids, stats=True))
+
+
+def search_ids(name, bgg):
+    # Object ids of every exact match of a collection entry
+    return list(iter_search_ids(bgg.search(name)))
+
+
+def fetch_games(object_ids, bgg):
+    # Details of a batch of ids in one request, split into one row per game
+    return list(iter_boardgames(bgg.boardgame(object_ids)))
+
+
+def split_returned(object_ids, games):
+    # (ids BGG returned a game for, ids it left out of the response)
+    returned = {str(game["bgg_id"]) for game in games}
+    return [i for i in object_ids if i in returned], [i for i in object_ids if i not in returned]
+
+
+def read_collection(csv_path):
+    """
+    {name: object id or None} of an exported BGG collection, in file order.
+    The objectid column is optional, entries without one are searched by name.
+    """
+    collection = pd.read_csv(csv_path, usecols=lambda column: column in ('objectname', 'objectid'))
+    object_ids = collection['objectid'] if 'objectid' in collection else [None] * len(collection)
+    entries = {}
+    for name, object_id in zip(collection['objectname'], object_ids):
+        if pd.isna(object_id) or str(object_id).strip() in ('', '0'):
+            object_id = None
+        else:
+            object_id = str(int(object_id))
+        entries.setdefault(name, object_id)
+    return entries
+
+
+def fetch_sync_state(http, api_url):
+    # {bgg_id: last synced datetime or None} of the games already in the catalogue
+    response = http.get(f"{api_url.rstrip('/')}/catalogue/sync-state")
+    response.raise_for_status()
     return {
-        "title": new_title,
-        "publisher": new_publisher,
-        "description": new_description,
-        "yearpublished": new_release_year,
-        "image": new_image,
-        "players": new_players,
-        "duration": new_duration,
-        "difficulty": new_difficulty
+        str(row["bgg_id"]): datetime.fromisoformat(row["last_synced"].rstrip("Z")) if row["last_synced"] else None
+        for row in response.json()
     }
 
 
+def select_stale(ids_by_name, synced, max_age_days):
+    """
+    Drop the ids synced less than max_age_days ago and print how the collection
+    compares to the catalogue.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    collection_ids = {object_id for ids in ids_by_name.values() for object_id in ids}
+    fresh = {object_id for object_id in collection_ids if synced.get(object_id) and synced[object_id] >= cutoff}
+    new = collection_ids - set(synced)
+    print(f"{len(new)} new, {len(collection_ids) - len(new) - len(fresh)} stale, {len(fresh)} up to date, "
+          f"{len(set(synced) - collection_ids)} in the catalogue but not in the collection")
+    return {name: [object_id for object_id in ids if object_id not in fresh] for name, ids in ids_by_name.items()}
+
+
+class CatalogueUploader:
+    """
+    Collects parsed games and sends them to POST /catalogue/bulk in batches.
+    A collection entry is checkpointed once every game it matched was accepted.
+    """
+
+    def __init__(self, api_url, batch_size, checkpoint, http, ids_by_name):
+        self.api_url = api_url.rstrip("/")
+        self.http = http
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.remaining = {name: set(ids) for name, ids in ids_by_name.items()}
+        self.owners = {}  # object id -> collection names that matched it
+        for name, ids in ids_by_name.items():
+            for object_id in ids:
+                self.owners.setdefault(object_id, []).append(name)
+        self.errors = {}  # name -> first error
+        self.pending = []  # (object ids, [games]) waiting for the next batch
+        self.rows = 0
+
+        # Entries BGG had no match for are finished already
+        for name, ids in ids_by_name.items():
+            if not ids:
+                self.checkpoint.mark(name)
+
+    def fail(self, object_ids, error):
+        for object_id in object_ids:
+            for name in self.owners.get(object_id, []):
+                if name not in self.errors:
+                    print(f"Failed to import {name}: {error}")
+                    self.errors[name] = error
+
+    def add(self, object_ids, games):
+        # Queue the games fetched for object_ids
+        self.pending.append((object_ids, games))
+        self.rows += len(games)
+        if self.rows >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        pending, self.pending, self.rows = self.pending, [], 0
+        rows = [game for _, games in pending for game in games]
+        object_ids = [object_id for ids, _ in pending for object_id in ids]
+
+        if rows:
+            try:
+                # Rows are upserted on bgg_id, so sending a batch again is harmless
+                response = self.http.post(f"{self.api_url}/catalogue/bulk", json=rows, timeout=120, retry=True)
+                response.raise_for_status()
+                for error in response.json().get("errors", []):
+                    self.fail([rows[error["row"]]["bgg_id"]], error["error"])
+            except Exception as e:
+                self.fail(object_ids, str(e))
+
+        for object_id in object_ids:
+            for name in self.owners.get(object_id, []):
+                self.remaining[name].discard(object_id)
+                if not self.remaining[name] and name not in self.errors:
+                    self.checkpoint.mark(name)
+
+
+def load_catalogue_from_csv(csv_path='./collection (1).csv', workers=4, rate=2.0, burst=2,
+                            checkpoint_path='./import_checkpoint.txt',
+                            bgg_url=BGG_BASE_URL, api_url=CATALOGUE_API_URL, post_batch=100,
+                            cache_path=BGG_CACHE_PATH, batch_size=20, incremental=False, max_age_days=7,
+                            names_path='./import_names.jsonl'):
+    """
+    Import every game of an exported BGG collection CSV. Entries without an
+    objectid are searched by name first, then the details of all ids (deduped)
+    are fetched `batch_size` ids per request. Up to `workers` requests run at
+    once while sharing one BGG rate limit, and parsed games are sent to the
+    catalogue in bulk requests of about `post_batch` rows. Finished entries are
+    recorded in the checkpoint file and skipped on the next run, the file is
+    removed when no entry failed. BGG responses
+    are read through the cache at `cache_path` (None to always ask BGG).
+    With `incremental` only games that are not in the catalogue yet or were
+    last synced more than `max_age_days` ago are fetched, and the catalogue's
+    sync times take the place of the checkpoint file.
+    The ids a name search found are kept in `names_path` (None to keep them in
+    memory only), names found there are not searched again.
+    Returns the names that failed.
+    """
+    collection = read_collection(csv_path)
+    checkpoint = Checkpoint(None if incremental else checkpoint_path)
+    pending = {name: object_id for name, object_id in collection.items() if name not in checkpoint}
+    print(f"{len(collection) - len(pending)} of {len(collection)} games already imported, {len(pending)} to go")
+
+    cache = get_bgg_cache(cache_path) if cache_path else None
+    # One pooled client for BGG and the catalogue API, a connection per worker
+    http = HTTPClient(pool_maxsize=workers, per_host=workers, max_retries=5)
+    bgg = BGGClient(bgg_url, rate=rate, burst=burst, cache=cache, http=http)
+    synced = fetch_sync_state(http, api_url) if incremental else None
+    resolved = ResolvedNames(names_path)
+    failed = []
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Search phase, only for entries the CSV has no id for and that were not resolved before
+        ids_by_name = {name: [object_id] for name, object_id in pending.items() if object_id}
+        for name, object_id in pending.items():
+            if not object_id and resolved.get(name) is not None:
+                ids_by_name[name] = resolved.get(name)
+        futures = {executor.submit(search_ids, name, bgg): name for name in pending if name not in ids_by_name}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                ids_by_name[name] = future.result()
+                resolved.add(name, ids_by_name[name])
+            except Exception as e:
+                print(f"Failed to search {name}: {e}")
+                failed.append(name)
+        print(f"{len(futures)} games searched in {time.monotonic() - started:.1f}s")
+        if incremental:
+            ids_by_name = select_stale(ids_by_name, synced, max_age_days)
+
+        # Detail phase, every id once
+        object_ids = sorted({object_id for ids in ids_by_name.values() for object_id in ids}, key=int)
+        batches = [object_ids[i:i + batch_size] for i in range(0, len(object_ids), batch_size)]
+        uploader = CatalogueUploader(api_url, post_batch, checkpoint, http, ids_by_name)
+        futures = {executor.submit(fetch_games, batch, bgg): batch for batch in batches}
+        missing = []
+        for done, future in enumerate(as_completed(futures), 1):
+            batch = futures[future]
+            try:
+                games = future.result()
+            except Exception as e:
+                uploader.fail(batch, str(e))
+            else:
+                returned, left_out = split_returned(batch, games)
+                missing += left_out
+                uploader.add(returned, games)
+            if done % 10 == 0 or done == len(futures):
+                print(f"{done}/{len(futures)} batches of {batch_size} ids fetched in {time.monotonic() - started:.1f}s")
+
+        # Ids BGG left out of a response are asked for once more, one per request,
+        # and count as failed (so their entries are not checkpointed) if still missing
+        if missing:
+            print(f"{len(missing)} ids missing from BGG responses, retrying them")
+        futures = {executor.submit(fetch_games, [object_id], bgg): [object_id] for object_id in missing}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                games = future.result()
+            except Exception as e:
+                uploader.fail(batch, str(e))
+                continue
+            returned, left_out = split_returned(batch, games)
+            if left_out:
+                uploader.fail(left_out, "Not found on BGG")
+            uploader.add(returned, games)
+        uploader.flush()
+    failed += list(uploader.errors)
+    if not failed:
+        # Everything is in, the next run imports the whole collection again
+        checkpoint.clear()
+    return failed
+
 
 if __name__ == "__main__":
-    load_catalogue_from_csv()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Import a BGG collection export into the catalogue')
+    parser.add_argument('--csv', default='./collection (1).csv', help='Collection CSV exported from BGG')
+    parser.add_argument('--workers', type=int, default=4, help='Games imported concurrently')
+    parser.add_argument('--rate', type=float, default=2.0, help='BGG requests per second')
+    parser.add_argument('--burst', type=int, default=2, help='BGG requests allowed back to back')
+    parser.add_argument('--checkpoint', default='./import_checkpoint.txt', help='Progress file used to resume')
+    parser.add_argument('--bgg-url', default=BGG_BASE_URL, help='BGG base URL (or a local stub)')
+    parser.add_argument('--api-url', default=CATALOGUE_API_URL, help='Catalogue API base URL')
+    parser.add_argument('--cache', default=BGG_CACHE_PATH, help='BGG response cache file')
+    parser.add_argument('--no-cache', action='store_true', help='Always fetch from BGG')
+    parser.add_argument('--batch-size', type=int, default=20, help='BGG ids fetched per request')
+    parser.add_argument('--incremental', action='store_true', help='Only fetch games that are new or stale')
+    parser.add_argument('--max-age', type=float, default=7, help='Days after which a synced game is stale')
+    parser.add_argument('--post-batch', type=int, default=100, help='Games sent per bulk catalogue request')
+    parser.add_argument('--names', default='./import_names.jsonl', help='File of the BGG ids names resolved to')
+    args = parser.parse_args()
+
+    failed = load_catalogue_from_csv(args.csv, args.workers, args.rate, args.burst,
+                                     args.checkpoint, args.bgg_url, args.api_url, args.post_batch,
+                                     None if args.no_cache else args.cache, args.batch_size,
+                                     args.incremental, args.max_age, args.names)
+    if failed:
+        print(f"{len(failed)} games failed, run again to retry them")
\ No newline at end of file
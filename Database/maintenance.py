@@ -0,0 +1,142 @@
+import json
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime
+
+import redis
+
+# Periodic maintenance (ended event/game cleanup) run inside the API process.
+# Every API worker starts a scheduler thread once it serves its first request
+# (CLI commands importing the app never do), a Redis key set with SET NX PX
+# lets only one of them run the task per interval and the others skip their
+# turn. The outcome of the last run is kept in Redis so any worker can report
+# it on /maintenance/status.
+
+
+class MaintenanceScheduler:
+    def __init__(self, redis_client, task, interval=300, name="cleanup"):
+        """
+        redis_client : Redis connection used for the lock and the run records
+        task         : callable doing the work, returns a dict of stats
+        interval     : seconds between runs, 0 disables the thread
+        name         : prefix of the Redis keys
+        """
+        self.redis = redis_client
+        self.task = task
+        self.interval = interval
+        self.name = name
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stop_event = threading.Event()
+        self.start_lock = threading.Lock()
+        self.thread = None
+
+    def key(self, suffix):
+        return f"maintenance:{self.name}:{suffix}"
+
+    def acquire(self):
+        """
+        Claim this interval's run. The key is left to expire rather than deleted,
+        so a worker ticking a little later in the same interval skips its turn.
+        Returns False when another worker has it or Redis is unavailable.
+        """
+        # Slightly shorter than the interval so this worker's next tick is not locked out
+        ttl_ms = max(int(self.interval * 900), 1000)
+        token = f"{self.worker}:{uuid.uuid4().hex[:8]}"
+        try:
+            return bool(self.redis.set(self.key("lock"), token, nx=True, px=ttl_ms))
+        except redis.exceptions.RedisError as e:
+            print(f"Maintenance lock unavailable, skipping {self.name}: {e}")
+            return False
+
+    def record(self, started, result=None, error=None):
+        run = {
+            "started_at": started.isoformat() + "Z",
+            "duration_ms": round((datetime.utcnow() - started).total_seconds() * 1000, 1),
+            "worker": self.worker,
+            "status": "failed" if error else "ok",
+            "error": error,
+            "result": result,
+        }
+        try:
+            pipe = self.redis.pipeline()
+            pipe.set(self.key("last"), json.dumps(run))
+            pipe.incr(self.key("runs"))
+            if error:
+                pipe.incr(self.key("failures"))
+            pipe.execute()
+        except redis.exceptions.RedisError as e:
+            print(f"Could not record {self.name} run: {e}")
+        return run
+
+    def run_once(self):
+        """
+        Run the task if no other worker ran it this interval. Returns the run
+        record, or None when the turn was skipped.
+        """
+        if not self.acquire():
+            return None
+        started = datetime.utcnow()
+        try:
+            result = self.task()
+        except Exception as e:
+            print(f"Scheduled {self.name} failed: {e}")
+            return self.record(started, error=str(e))
+        return self.record(started, result=result)
+
+    def loop(self):
+        # First run right away so rows that ended while the API was down go at startup
+        while not self.stop_event.is_set():
+            self.run_once()
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        # Cheap when already running, the app calls it before every request
+        if self.interval <= 0 or (self.thread is not None and self.thread.is_alive()):
+            return
+        with self.start_lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            # The app may have been imported before the server forked its workers
+            self.worker = f"{socket.gethostname()}:{os.getpid()}"
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.loop, name=f"maintenance-{self.name}", daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def status(self):
+        """Schedule, this worker's thread and the last run of any worker."""
+        status = {
+            "task": self.name,
+            "interval": self.interval,
+            "enabled": self.interval > 0,
+            "worker": self.worker,
+            "running_here": self.thread is not None and self.thread.is_alive(),
+            "last_run": None,
+            "runs": 0,
+            "failures": 0,
+            "lock_ttl_ms": None,
+        }
+        try:
+            last, runs, failures = self.redis.mget(self.key("last"), self.key("runs"), self.key("failures"))
+            ttl = self.redis.pttl(self.key("lock"))
+        except redis.exceptions.RedisError as e:
+            status["error"] = f"Redis unavailable: {e}"
+            return status
+        status["last_run"] = json.loads(last) if last else None
+        status["runs"] = int(runs or 0)
+        status["failures"] = int(failures or 0)
+        status["lock_ttl_ms"] = ttl if ttl and ttl > 0 else None
+        return status
+
+
+def get_maintenance_scheduler(redis_client, task):
+    return MaintenanceScheduler(
+        redis_client, task, interval=float(os.getenv("MAINTENANCE_INTERVAL", 300)),
+    )
@@ -0,0 +1,29 @@
+"""catalogue bgg id
+
+Revision ID: 2f8a51d7c3e6
+Revises: 7a3c9f05e8d2
+Create Date: 2025-04-30 16:21:48.530912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f8a51d7c3e6'
+down_revision = '7a3c9f05e8d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # BoardGameGeek id, the upsert key of POST /catalogue/bulk
+    with op.batch_alter_table('catalogue', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('bgg_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_catalogue_bgg_id'), ['bgg_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('catalogue', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_catalogue_bgg_id'))
+        batch_op.drop_column('bgg_id')
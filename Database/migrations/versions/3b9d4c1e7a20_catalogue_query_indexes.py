@@ -0,0 +1,29 @@
+"""catalogue query indexes
+
+Revision ID: 3b9d4c1e7a20
+Revises: f86a26dd22e0
+Create Date: 2025-04-21 14:02:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d4c1e7a20'
+down_revision = 'f86a26dd22e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Indexes backing the sort and filter options of GET /catalogue
+    with op.batch_alter_table('catalogue', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_catalogue_title'), ['title'], unique=False)
+        batch_op.create_index(batch_op.f('ix_catalogue_difficulty'), ['difficulty'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('catalogue', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_catalogue_difficulty'))
+        batch_op.drop_index(batch_op.f('ix_catalogue_title'))
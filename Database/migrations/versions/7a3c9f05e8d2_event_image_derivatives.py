@@ -0,0 +1,67 @@
+"""event image derivatives
+
+Revision ID: 7a3c9f05e8d2
+Revises: e5d18b7f2a43
+Create Date: 2025-04-28 09:52:16.204733
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+from image_store import get_image_store
+from image_pipeline import process_image
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3c9f05e8d2'
+down_revision = 'e5d18b7f2a43'
+branch_labels = None
+depends_on = None
+
+events = sa.table(
+    'events',
+    sa.column('id', sa.Integer),
+    sa.column('image_hash', sa.String),
+    sa.column('image_variants', sa.Text),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_variants', sa.Text(), nullable=True))
+
+    # Generate the derivatives of every stored image from its current full size copy
+    store = get_image_store()
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(events.c.id, events.c.image_hash).where(events.c.image_hash.isnot(None))
+    ).fetchall()
+    generated = {}
+    for row in rows:
+        if row.image_hash not in generated:
+            image = store.get(row.image_hash)
+            if image is None:
+                continue
+            generated[row.image_hash] = {
+                size: {fmt: store.put(data) for fmt, data in formats.items()}
+                for size, formats in process_image(image).items()
+            }
+        variants = generated[row.image_hash]
+        connection.execute(
+            events.update()
+            .where(events.c.id == row.id)
+            .values(image_hash=variants['full']['jpeg'], image_variants=json.dumps(variants))
+        )
+
+    # The old full size files were replaced by the new full size JPEGs
+    kept = {h for variants in generated.values() for formats in variants.values() for h in formats.values()}
+    for image_hash in set(generated) - kept:
+        store.delete(image_hash)
+
+
+def downgrade():
+    # image_hash keeps pointing at the full size JPEG, which is all the old code reads
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_column('image_variants')
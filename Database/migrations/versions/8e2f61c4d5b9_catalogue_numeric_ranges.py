@@ -0,0 +1,85 @@
+"""catalogue numeric player and playtime ranges
+
+Revision ID: 8e2f61c4d5b9
+Revises: 3b9d4c1e7a20
+Create Date: 2025-04-22 10:41:09.552871
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2f61c4d5b9'
+down_revision = '3b9d4c1e7a20'
+branch_labels = None
+depends_on = None
+
+
+def parse_range(value):
+    # Same rules as app.parse_range, kept here so the migration never changes with the app
+    numbers = [int(n) for n in re.findall(r'\d+', str(value or ''))]
+    if not numbers:
+        return 0, 0
+    return min(numbers), max(numbers)
+
+
+def upgrade():
+    with op.batch_alter_table('catalogue', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('min_players', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('max_players', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('min_playtime', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('max_playtime', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the free-text players/duration columns
+    catalogue = sa.table(
+        'catalogue',
+        sa.column('id', sa.Integer),
+        sa.column('players', sa.String),
+        sa.column('duration', sa.String),
+        sa.column('min_players', sa.Integer),
+        sa.column('max_players', sa.Integer),
+        sa.column('min_playtime', sa.Integer),
+        sa.column('max_playtime', sa.Integer),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(catalogue.c.id, catalogue.c.players, catalogue.c.duration)).fetchall()
+    updates = []
+    for row in rows:
+        min_players, max_players = parse_range(row.players)
+        min_playtime, max_playtime = parse_range(row.duration)
+        updates.append({
+            'row_id': row.id,
+            'min_players': min_players,
+            'max_players': max_players,
+            'min_playtime': min_playtime,
+            'max_playtime': max_playtime,
+        })
+    if updates:
+        connection.execute(
+            catalogue.update()
+            .where(catalogue.c.id == sa.bindparam('row_id'))
+            .values(
+                min_players=sa.bindparam('min_players'),
+                max_players=sa.bindparam('max_players'),
+                min_playtime=sa.bindparam('min_playtime'),
+                max_playtime=sa.bindparam('max_playtime'),
+            ),
+            updates,
+        )
+
+    with op.batch_alter_table('catalogue', schema=None) as batch_op:
+        batch_op.create_index('ix_catalogue_players', ['min_players', 'max_players'], unique=False)
+        batch_op.create_index('ix_catalogue_playtime', ['min_playtime', 'max_playtime'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('catalogue', schema=None) as batch_op:
+        batch_op.drop_index('ix_catalogue_playtime')
+        batch_op.drop_index('ix_catalogue_players')
+        batch_op.drop_column('max_playtime')
+        batch_op.drop_column('min_playtime')
+        batch_op.drop_column('max_players')
+        batch_op.drop_column('min_players')
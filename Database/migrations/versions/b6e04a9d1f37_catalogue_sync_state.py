@@ -0,0 +1,31 @@
+"""catalogue sync state
+
+Revision ID: b6e04a9d1f37
+Revises: 2f8a51d7c3e6
+Create Date: 2025-05-03 10:44:12.907315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e04a9d1f37'
+down_revision = '2f8a51d7c3e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows have no hash yet, the next sync rewrites them once
+    with op.batch_alter_table('catalogue', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('last_synced', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_catalogue_last_synced'), ['last_synced'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('catalogue', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_catalogue_last_synced'))
+        batch_op.drop_column('last_synced')
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,51 @@
+"""event image hash
+
+Revision ID: c47a0e93b1f6
+Revises: 8e2f61c4d5b9
+Create Date: 2025-04-24 16:18:52.903417
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47a0e93b1f6'
+down_revision = '8e2f61c4d5b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_hash', sa.String(length=64), nullable=True))
+
+    # Hash the images already stored, one row at a time to keep memory flat
+    events = sa.table(
+        'events',
+        sa.column('id', sa.Integer),
+        sa.column('image', sa.LargeBinary),
+        sa.column('image_hash', sa.String),
+    )
+    connection = op.get_bind()
+    event_ids = connection.execute(
+        sa.select(events.c.id).where(events.c.image.isnot(None))
+    ).scalars().all()
+    for event_id in event_ids:
+        image = connection.execute(
+            sa.select(events.c.image).where(events.c.id == event_id)
+        ).scalar()
+        if isinstance(image, str):
+            image = image.encode('utf-8')
+        connection.execute(
+            events.update()
+            .where(events.c.id == event_id)
+            .values(image_hash=hashlib.sha256(image).hexdigest())
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_column('image_hash')
@@ -0,0 +1,37 @@
+"""event and game time indexes
+
+Revision ID: d91f3a6c2b58
+Revises: b6e04a9d1f37
+Create Date: 2025-05-06 15:18:40.226751
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd91f3a6c2b58'
+down_revision = 'b6e04a9d1f37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Indexes backing the from/to windows of GET /events and GET /games
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_events_start_time'), ['start_time'], unique=False)
+        batch_op.create_index(batch_op.f('ix_events_end_time'), ['end_time'], unique=False)
+
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_games_start_time'), ['start_time'], unique=False)
+        batch_op.create_index(batch_op.f('ix_games_end_time'), ['end_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_games_end_time'))
+        batch_op.drop_index(batch_op.f('ix_games_start_time'))
+
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_events_end_time'))
+        batch_op.drop_index(batch_op.f('ix_events_start_time'))
@@ -0,0 +1,69 @@
+"""move event images to the image store
+
+Revision ID: e5d18b7f2a43
+Revises: c47a0e93b1f6
+Create Date: 2025-04-26 11:07:31.640258
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from image_store import get_image_store
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5d18b7f2a43'
+down_revision = 'c47a0e93b1f6'
+branch_labels = None
+depends_on = None
+
+events = sa.table(
+    'events',
+    sa.column('id', sa.Integer),
+    sa.column('image', sa.LargeBinary),
+    sa.column('image_hash', sa.String),
+)
+
+
+def upgrade():
+    # Copy every stored blob into the content-addressed store, one row at a
+    # time, before the column is dropped
+    store = get_image_store()
+    connection = op.get_bind()
+    event_ids = connection.execute(
+        sa.select(events.c.id).where(events.c.image.isnot(None))
+    ).scalars().all()
+    for event_id in event_ids:
+        image = connection.execute(
+            sa.select(events.c.image).where(events.c.id == event_id)
+        ).scalar()
+        if isinstance(image, str):
+            image = image.encode('utf-8')
+        connection.execute(
+            events.update()
+            .where(events.c.id == event_id)
+            .values(image_hash=store.put(image))
+        )
+
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_column('image')
+        batch_op.create_index(batch_op.f('ix_events_image_hash'), ['image_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_events_image_hash'))
+        batch_op.add_column(sa.Column('image', sa.LargeBinary(), nullable=True))
+
+    # Put the bytes back into the rows, the stored files are left in place
+    store = get_image_store()
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(events.c.id, events.c.image_hash).where(events.c.image_hash.isnot(None))
+    ).fetchall()
+    for row in rows:
+        connection.execute(
+            events.update()
+            .where(events.c.id == row.id)
+            .values(image=store.get(row.image_hash))
+        )
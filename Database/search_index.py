@@ -0,0 +1,185 @@
+import html
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+
+# In-process inverted index over catalogue titles and descriptions.
+# Titles weigh more than descriptions, results are ranked with BM25 and every
+# query word also matches as a prefix and, for longer words, with typos.
+
+TITLE_WEIGHT = 3
+PREFIX_FACTOR = 0.7
+FUZZY_FACTOR = 0.4
+MAX_EXPANSIONS = 50
+
+# BM25 tuning
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "with", "you", "your",
+}
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return re.findall(r"[a-z0-9]+", html.unescape(text).lower())
+
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    # Levenshtein distance, gives up early once every cell of a row is over limit
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class CatalogueSearchIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.generation = None  # caller-defined version of the data the index was built from
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.postings = {}     # term -> {doc_id: weighted term frequency}
+            self.doc_terms = {}    # doc_id -> set of terms, used for removal
+            self.doc_lengths = {}  # doc_id -> weighted document length
+            self.vocabulary = []   # sorted terms, for prefix lookups
+            self.trigram_index = {}  # trigram -> set of terms, for fuzzy lookups
+            self.total_length = 0
+
+    def build(self, rows, generation=None):
+        """
+        Replace the index contents with rows of (id, title, description).
+        """
+        with self.lock:
+            self.clear()
+            for doc_id, title, description in rows:
+                self.add(doc_id, title, description)
+            self.generation = generation
+            self.loaded = True
+
+    def add(self, doc_id, title, description):
+        with self.lock:
+            self.remove(doc_id)
+            frequencies = {}
+            for term in tokenize(title):
+                frequencies[term] = frequencies.get(term, 0) + TITLE_WEIGHT
+            for term in tokenize(description):
+                if term not in STOPWORDS:
+                    frequencies[term] = frequencies.get(term, 0) + 1
+            for term, frequency in frequencies.items():
+                if term not in self.postings:
+                    self.postings[term] = {}
+                    insort(self.vocabulary, term)
+                    for gram in trigrams(term):
+                        self.trigram_index.setdefault(gram, set()).add(term)
+                self.postings[term][doc_id] = frequency
+            length = sum(frequencies.values())
+            self.doc_terms[doc_id] = set(frequencies)
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+
+    def remove(self, doc_id):
+        with self.lock:
+            terms = self.doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            for term in terms:
+                documents = self.postings[term]
+                documents.pop(doc_id, None)
+                if not documents:
+                    # Last document using this term, drop it from the lookup structures
+                    del self.postings[term]
+                    del self.vocabulary[bisect_left(self.vocabulary, term)]
+                    for gram in trigrams(term):
+                        self.trigram_index[gram].discard(term)
+
+    def expand(self, word):
+        """
+        Map a query word to {term: factor} covering the exact term,
+        terms it is a prefix of and terms within a small edit distance.
+        """
+        expansions = {}
+        if word in self.postings:
+            expansions[word] = 1.0
+
+        start = bisect_left(self.vocabulary, word)
+        for term in self.vocabulary[start:start + MAX_EXPANSIONS]:
+            if not term.startswith(word):
+                break
+            expansions.setdefault(term, PREFIX_FACTOR)
+
+        if len(word) >= 4:
+            limit = 1 if len(word) <= 6 else 2
+            grams = trigrams(word)
+            shared = {}
+            for gram in grams:
+                for term in self.trigram_index.get(gram, ()):
+                    shared[term] = shared.get(term, 0) + 1
+            # Only compare against terms sharing enough trigrams to be within the limit
+            candidates = sorted(
+                (term for term, count in shared.items() if count >= len(grams) - 3 * limit),
+                key=lambda term: -shared[term],
+            )
+            for term in candidates[:MAX_EXPANSIONS]:
+                if term not in expansions and edit_distance(word, term, limit) <= limit:
+                    expansions[term] = FUZZY_FACTOR
+        return expansions
+
+    def search(self, query, limit=20):
+        """
+        Return [(doc_id, score)] best first. Every query word has to match
+        (exactly, as a prefix or fuzzily) for a document to be returned.
+        """
+        words = [word for word in dict.fromkeys(tokenize(query)) if word not in STOPWORDS] or tokenize(query)
+        if not words:
+            return []
+        with self.lock:
+            document_count = len(self.doc_lengths)
+            if not document_count:
+                return []
+            average_length = self.total_length / document_count
+            scores = None
+            for word in words:
+                word_scores = {}
+                for term, factor in self.expand(word).items():
+                    documents = self.postings[term]
+                    idf = math.log(1 + (document_count - len(documents) + 0.5) / (len(documents) + 0.5))
+                    for doc_id, frequency in documents.items():
+                        norm = K1 * (1 - B + B * self.doc_lengths[doc_id] / average_length)
+                        score = factor * idf * frequency * (K1 + 1) / (frequency + norm)
+                        # A word counts once per document, through its best matching term
+                        if score > word_scores.get(doc_id, 0):
+                            word_scores[doc_id] = score
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {doc_id: scores[doc_id] + score
+                              for doc_id, score in word_scores.items() if doc_id in scores}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
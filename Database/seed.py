@@ -1,125 +1,200 @@
-import pandas as pd
 import argparse
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, MetaData, Table
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import ProgrammingError
-from sqlalchemy.sql import text
-from datetime import datetime
+import time
+from collections import defaultdict
+from contextlib import contextmanager
 
-# Argument parser for database name only
-parser = argparse.ArgumentParser(description='Seed MySQL database')
-parser.add_argument('--db-name', type=str, help='Database name', required=True)
-args = parser.parse_args()
+import pandas as pd
+import redis
+from sqlalchemy import create_engine, MetaData, Table, delete, inspect
+from sqlalchemy.dialects import mysql, sqlite
+
+# Seeds the catalogue from an exported BGG collection CSV. The tables come from
+# the Alembic migrations (flask db upgrade), this script only loads rows: the
+# CSV is read in chunks and every chunk is written with one multi-row
+# INSERT ... ON DUPLICATE KEY UPDATE keyed on bgg_id, so re-running it updates
+# the existing games instead of dropping anything. Descriptions and images are
+# not in the export, loadCatalouge.py --incremental fills them in from BGG.
+# Afterwards the API's catalogue cache generation is bumped in Redis, so cached
+# responses and every worker's search index are rebuilt from the new rows.
 
 # Default MySQL credentials and host
 DB_USER = 'cornelius'
 DB_PASSWORD = 'BBTest'
 DB_HOST = 'localhost'
 
-# Construct database URIs
-db_uri_without_db = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}"
-db_uri_with_db = f"{db_uri_without_db}/{args.db_name}"
-
-# Create engine without database to create it first
-engine_no_db = create_engine(db_uri_without_db)
-conn = engine_no_db.connect()
-
-# Drop the database if it exists and recreate it
-try:
-    conn.execute(text(f"DROP DATABASE IF EXISTS {args.db_name}"))
-    conn.execute(text(f"CREATE DATABASE {args.db_name}"))
-    print(f"Database '{args.db_name}' recreated successfully.")
-except ProgrammingError as e:
-    print(f"Error recreating database: {e}")
-try:
-    conn.execute(text(f"CREATE DATABASE IF NOT EXISTS {args.db_name}"))
-    print(f"Database '{args.db_name}' created or already exists.")
-except ProgrammingError as e:
-    print(f"Error creating database: {e}")
-finally:
-    conn.close()
-
-# Connect to the newly created database
-engine = create_engine(db_uri_with_db)
-metadata = MetaData()
-
-# Define Tables
-
-
-catalogue = Table(
-    'catalogue', metadata,
-    Column('id', Integer, primary_key=True),
-    Column('name', String(255), nullable=False),
-    Column('baverage', Float, nullable=False),
-    Column('average', Float, nullable=False),
-    Column('avgweight', Float, nullable=True),
-    Column('acquisitiondate', DateTime, nullable=True),
-    Column('acquiredfrom', String(255), nullable=True),
-    Column('minplayers', Integer, nullable=True),
-    Column('maxplayers', Integer, nullable=True),
-    Column('playingtimemin', Integer, nullable=True),
-    Column('playingtimemax', Integer, nullable=True),
-    Column('yearpublished', Integer, nullable=True),
-    Column('bestplayers', String(255), nullable=True),
-    Column('agerange', String(255), nullable=True),
-    
-)
-
-events = Table(
-    'events', metadata,
-    Column('id', Integer, ForeignKey('users.id'), primary_key=True),
-    Column('shop_wide_event', Boolean, nullable=False),
-    Column('game', Integer, ForeignKey('catalogue.id'), nullable=True),
-    Column('time', DateTime, nullable=False),
-    Column('description', String(1000), nullable=False),
-    Column('players', String(255), nullable=False),
-)
-
-admins = Table(
-    'admins', metadata,
-    Column('id', Integer, primary_key=True),
-    Column('username', String(255), nullable=False),
-    Column('password', String(255), nullable=False),
-    Column('session_token', String(1000), nullable=True), 
-    Column('session_exp', String(255), nullable=True),
+# Redis of the API, for its catalogue cache generation
+REDIS_URL = 'redis://localhost:6379/0'
+
+# Collection CSV columns read, and their types
+CSV_COLUMNS = {
+    'objectid': 'Int64',
+    'objectname': 'string',
+    'avgweight': 'float64',
+    'minplayers': 'Int64',
+    'maxplayers': 'Int64',
+    'minplaytime': 'Int64',
+    'maxplaytime': 'Int64',
+    'playingtime': 'Int64',
+    'yearpublished': 'Int64',
+    'bggrecagerange': 'string',
+    'version_publishers': 'string',
+}
+
+# Catalogue columns the CSV provides, the only ones an existing row gets updated with
+SEEDED_COLUMNS = (
+    'title', 'difficulty', 'publisher', 'players', 'duration', 'yearpublished', 'agerange',
+    'min_players', 'max_players', 'min_playtime', 'max_playtime',
 )
 
-# Drop existing tables with proper order to prevent circular dependency
-metadata.reflect(bind=engine)
-for table in reversed(metadata.sorted_tables):
-    table.drop(engine, checkfirst=True)
-metadata.drop_all(engine)
-
-# Create tables
-metadata.create_all(engine)
-
-# Load CSV
-df = pd.read_csv('collection (1).csv')
-
-# Selecting relevant columns and renaming to match Catalogue model
-catalogue_data = df[['objectid', 'objectname', 'weight', 'rating', 'numplays', 'own', 'fortrade', 'want', 'wanttobuy', 'wanttoplay', 'acquisitiondate', 'acquiredfrom', 'invdate', 'version_publishers', 'version_languages', 'version_yearpublished', 'version_nickname']].copy()
-catalogue_data.rename(columns={
-    'objectid': 'id',
-    'objectname': 'name',
-    'weight': 'difficulty',
-    'rating': 'rating',
-    'numplays': 'numplays',
-    'invdate': 'invdate'
-}, inplace=True)
-
-# Convert date fields if necessary
-catalogue_data['acquisitiondate'] = pd.to_datetime(catalogue_data['acquisitiondate'], errors='coerce')
-catalogue_data['invdate'] = pd.to_datetime(catalogue_data['invdate'], errors='coerce')
-
-# Insert data into MySQL
-Session = sessionmaker(bind=engine)
-session = Session()
-try:
-    catalogue_data.to_sql('catalogue', con=engine, if_exists='append', index=False)
-    session.commit()
-    print("Seeding completed successfully!")
-except Exception as e:
-    session.rollback()
-    print(f"Error while inserting data: {e}")
-finally:
-    session.close()
+# Sync state of POST /catalogue/bulk, cleared on update so the next bulk sync
+# does not skip the row as unchanged and writes the BGG data back
+SYNC_COLUMNS = ('content_hash', 'last_synced')
+
+
+class StageTimer:
+    """Adds up the time spent in each named stage."""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+
+    @contextmanager
+    def __call__(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[stage] += time.perf_counter() - started
+
+    def report(self, rows):
+        total = sum(self.totals.values())
+        for stage, seconds in self.totals.items():
+            print(f"  {stage:<10} {seconds:8.3f}s")
+        print(f"  {'total':<10} {total:8.3f}s  ({rows / total if total else 0:,.0f} rows/s)")
+
+
+def value(cell):
+    # pandas missing values (NA/NaN) become NULL
+    return None if pd.isna(cell) else cell
+
+
+def range_text(low, high, unknown=''):
+    # "2-4" / "2" in the format the catalogue already uses for players and duration
+    if not low and not high:
+        return unknown
+    low, high = low or high, high or low
+    return str(low) if low == high else f"{low}-{high}"
+
+
+def catalogue_rows(chunk):
+    """
+    Map one chunk of collection CSV rows onto catalogue rows.
+    """
+    rows = []
+    for record in chunk.itertuples(index=False):
+        object_id = value(record.objectid)
+        title = value(record.objectname)
+        if object_id is None or not title:
+            continue
+        min_players = int(value(record.minplayers) or 0)
+        max_players = int(value(record.maxplayers) or 0)
+        min_playtime = int(value(record.minplaytime) or value(record.playingtime) or 0)
+        max_playtime = int(value(record.maxplaytime) or value(record.playingtime) or 0)
+        year = value(record.yearpublished)
+        rows.append({
+            'bgg_id': int(object_id),
+            'title': str(title),
+            'difficulty': float(value(record.avgweight) or 0),
+            'publisher': value(record.version_publishers),
+            'players': range_text(min_players, max_players),
+            'duration': range_text(min_playtime, max_playtime, unknown='Unknown'),
+            'yearpublished': int(year) if year else None,
+            'agerange': value(record.bggrecagerange),
+            'min_players': min_players,
+            'max_players': max_players,
+            'min_playtime': min_playtime,
+            'max_playtime': max_playtime,
+        })
+    return rows
+
+
+def upsert_statement(table, rows, dialect):
+    """
+    One multi-row INSERT for all rows, updating the seeded columns of games
+    whose bgg_id is already in the table and clearing their sync state.
+    """
+    if dialect == 'mysql':
+        statement = mysql.insert(table).values(rows)
+        return statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in SEEDED_COLUMNS} | dict.fromkeys(SYNC_COLUMNS)
+        )
+    if dialect == 'sqlite':
+        statement = sqlite.insert(table).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=['bgg_id'],
+            set_={column: statement.excluded[column] for column in SEEDED_COLUMNS} | dict.fromkeys(SYNC_COLUMNS),
+        )
+    raise ValueError(f"Unsupported database: {dialect}")
+
+
+def invalidate_catalogue(redis_client):
+    # Same key as invalidate_cache("catalogue") in app.py
+    try:
+        redis_client.incr('cache:gen:catalogue')
+    except redis.exceptions.RedisError as e:
+        print(f"Could not invalidate the catalogue cache, restart the API to see the new rows: {e}")
+
+
+def seed_catalogue(engine, csv_path='collection (1).csv', chunk_size=1000, replace=False, redis_client=None):
+    """
+    Load the collection CSV into the catalogue table, chunk_size rows per
+    INSERT and transaction. With replace, existing catalogue rows are deleted
+    first. The API's catalogue cache is invalidated through redis_client when
+    given. Returns the number of rows written.
+    """
+    if not inspect(engine).has_table('catalogue'):
+        raise RuntimeError("No catalogue table, create the schema with 'flask db upgrade' first")
+    catalogue = Table('catalogue', MetaData(), autoload_with=engine)
+    timer = StageTimer()
+    written = 0
+
+    if replace:
+        with timer('delete'), engine.begin() as connection:
+            connection.execute(delete(catalogue))
+
+    chunks = pd.read_csv(csv_path, usecols=list(CSV_COLUMNS), dtype=CSV_COLUMNS, chunksize=chunk_size)
+    while True:
+        with timer('read'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        with timer('transform'):
+            rows = catalogue_rows(chunk)
+        if not rows:
+            continue
+        with timer('insert'), engine.begin() as connection:
+            connection.execute(upsert_statement(catalogue, rows, engine.dialect.name))
+        written += len(rows)
+        print(f"{written} rows written")
+
+    if redis_client is not None and (written or replace):
+        invalidate_catalogue(redis_client)
+
+    print(f"Seeded {written} catalogue rows:")
+    timer.report(written)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Seed the catalogue from a BGG collection export')
+    parser.add_argument('--db-name', type=str, help='Database name')
+    parser.add_argument('--db-url', type=str, help='SQLAlchemy URL, instead of the default MySQL server and --db-name')
+    parser.add_argument('--csv', default='collection (1).csv', help='Collection CSV exported from BGG')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per INSERT statement')
+    parser.add_argument('--replace', action='store_true', help='Delete the existing catalogue rows first')
+    parser.add_argument('--redis-url', default=REDIS_URL, help='Redis of the API, to invalidate its catalogue cache')
+    args = parser.parse_args()
+    if not args.db_url and not args.db_name:
+        parser.error('--db-name or --db-url is required')
+
+    db_url = args.db_url or f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{args.db_name}"
+    seed_catalogue(create_engine(db_url), args.csv, args.chunk_size, args.replace, redis.Redis.from_url(args.redis_url))
@@ -0,0 +1,187 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Database Unit Test Configuration    #
+# PyTest                              #
+#                                     #
+#######################################
+
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import urlparse, parse_qs
+
+import fakeredis
+import pytest
+from sqlalchemy import event
+
+#The app reads its configuration at import time
+STATE_DIR = tempfile.mkdtemp(prefix="bnb-test-")
+os.environ["MYSQL_DATABASE_URL"] = "sqlite://"
+os.environ["IMAGE_STORE_PATH"] = os.path.join(STATE_DIR, "images")
+os.environ["BGG_CACHE_PATH"] = os.path.join(STATE_DIR, "bgg_cache.sqlite3")
+#No scheduler thread, tests run maintenance themselves
+os.environ["MAINTENANCE_INTERVAL"] = "0"
+
+
+#Minimal BGG XML API + catalogue API stand in, so imports can be tested without the network
+class StubBGGServer:
+    def __init__(self, games):
+        #games: {name: {"id": objectid, "minplayers": ..., ...}}
+        self.games = games
+        self.posted = []
+        self.requests = []
+        self.throttle = set()  #paths answered once with a 503 before succeeding
+        self.broken = set()  #paths always answered with a 404
+        self.rejected = set()  #titles the bulk catalogue endpoint reports as errors
+        self.synced = []  #rows returned by GET /catalogue/sync-state
+        self.lock = threading.Lock()
+
+    def boardgame_xml(self, game):
+        return (
+            f'<boardgame objectid="{game["id"]}">'
+            f'<yearpublished>{game.get("year", 2000)}</yearpublished>'
+            f'<minplayers>{game.get("minplayers", 2)}</minplayers>'
+            f'<maxplayers>{game.get("maxplayers", 4)}</maxplayers>'
+            f'<minplaytime>{game.get("minplaytime", 30)}</minplaytime>'
+            f'<maxplaytime>{game.get("maxplaytime", 60)}</maxplaytime>'
+            f'<name primary="true" sortindex="1">{game["name"]}</name>'
+            f'<description>{game.get("description", "A game")}</description>'
+            f'<thumbnail>https://example.com/{game["id"]}.jpg</thumbnail>'
+            f'<boardgamepublisher objectid="1">{game.get("publisher", "Publisher")}</boardgamepublisher>'
+            f'<statistics page="1"><ratings><averageweight>{game.get("weight", 2.5)}</averageweight></ratings></statistics>'
+            f'</boardgame>'
+        )
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  #keep-alive, like BGG
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body=b"", content_type="application/xml", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                with stub.lock:
+                    stub.requests.append(self.path)
+                    if self.path in stub.throttle:
+                        stub.throttle.discard(self.path)
+                        return self.reply(503, headers={"Retry-After": "0"})
+                    if self.path in stub.broken:
+                        return self.reply(404)
+
+                if url.path == "/xmlapi/search":
+                    name = parse_qs(url.query)["search"][0]
+                    name, game = next(
+                        ((key, game) for key, game in stub.games.items() if key.casefold() == name.casefold()),
+                        (name, None),
+                    )
+                    body = "<boardgames>"
+                    if game:
+                        body += f'<boardgame objectid="{game["id"]}"><name primary="true">{name}</name></boardgame>'
+                    body += "</boardgames>"
+                    return self.reply(200, body.encode())
+
+                if url.path.startswith("/xmlapi/boardgame/"):
+                    ids = url.path.rsplit("/", 1)[1].split(",")
+                    by_id = {str(game["id"]): dict(game, name=name) for name, game in stub.games.items()}
+                    body = "<boardgames>" + "".join(
+                        stub.boardgame_xml(by_id[i]) for i in ids if i in by_id
+                    ) + "</boardgames>"
+                    etag = f'"{hash(body)}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        return self.reply(304)
+                    return self.reply(200, body.encode(), headers={"ETag": etag})
+
+                if url.path == "/catalogue/sync-state":
+                    return self.reply(200, json.dumps(stub.synced).encode(), "application/json")
+
+                self.reply(404)
+
+            def do_POST(self):
+                rows = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with stub.lock:
+                    stub.requests.append(self.path)
+                    if self.path in stub.throttle:
+                        stub.throttle.discard(self.path)
+                        return self.reply(503, headers={"Retry-After": "0"})
+                    stub.posted.append((self.path, rows))
+                errors = [
+                    {"row": index, "error": "rejected"}
+                    for index, row in enumerate(rows) if row["title"] in stub.rejected
+                ]
+                report = {"received": len(rows), "inserted": len(rows) - len(errors), "updated": 0,
+                          "failed": len(errors), "errors": errors}
+                self.reply(200, json.dumps(report).encode(), "application/json")
+
+        return Handler
+
+
+@pytest.fixture
+def bgg_stub():
+    #Start the stub on a free port, tests fill stub.games before using it
+    stub = StubBGGServer({})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub.handler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stub.url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield stub
+
+    #Tear down
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    #Import the Flask app without Google credentials, with Redis swapped for an in-memory fake
+    with mock.patch("google.oauth2.service_account.Credentials.from_service_account_file"), \
+         mock.patch("googleapiclient.discovery.build"):
+        import app
+    app.r = fakeredis.FakeRedis()
+    app.maintenance.redis = app.r
+    app.image_jobs.redis = app.r
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    #Fresh database and cache for every test
+    app_module.r.flushall()
+    with app_module.app.app_context():
+        app_module.db.drop_all()
+        app_module.db.create_all()
+        app_module.search_index.loaded = False
+        yield app_module.app.test_client()
+        app_module.db.session.remove()
+
+
+@pytest.fixture
+def count_queries(app_module):
+    #Counts the SQL statements sent while the returned list is being filled
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app_module.app.app_context():
+        engine = app_module.db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,44 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Announcement Stream Unit Tests      #
+# PyTest                              #
+#                                     #
+#######################################
+
+import json
+from datetime import datetime
+
+
+def test_announcements_are_added_to_the_stream(client, app_module):
+    game = app_module.Game(
+        title="Catan night",
+        organizer="Organizer",
+        start_time=datetime(2025, 5, 1, 18),
+        end_time=datetime(2025, 5, 1, 21),
+        description="Game night",
+        players="3-4",
+    )
+    app_module.db.session.add(game)
+    app_module.db.session.commit()
+
+    app_module.announce_game(game)
+    app_module.announce_game(game)
+
+    entries = app_module.r.xrange(app_module.ANNOUNCEMENT_STREAM)
+    assert len(entries) == 2
+    fields = entries[0][1]
+    assert fields[b"type"] == b"new_game"
+    assert json.loads(fields[b"data"])["title"] == "Catan night"
+
+
+def test_announcement_stream_is_capped(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "ANNOUNCEMENT_STREAM_MAXLEN", 3)
+    for i in range(5):
+        app_module.publish_announcement("new_event", json.dumps({"id": i}))
+
+    # Trimming is approximate, the newest entries are always there
+    entries = app_module.r.xrange(app_module.ANNOUNCEMENT_STREAM)
+    assert 3 <= len(entries) <= 5
+    assert json.loads(entries[-1][1][b"data"]) == {"id": 4}
@@ -0,0 +1,93 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# BGG Response Cache Unit Tests       #
+# PyTest                              #
+#                                     #
+#######################################
+
+import time
+
+import pytest
+import requests
+
+from bgg_cache import BGGCache, search_request, boardgame_request
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return BGGCache(str(tmp_path / "bgg_cache.sqlite3"), ttl=60, stale_ttl=60, negative_ttl=5)
+
+
+@pytest.fixture
+def fetcher(bgg_stub):
+    bgg_stub.games["Catan"] = {"id": 13}
+
+    def fetch(path, headers):
+        return requests.get(f"{bgg_stub.url}{path}", headers=headers, timeout=5)
+    return fetch
+
+
+def expire(cache, key, seconds_ago):
+    connection = cache.connection()
+    connection.execute("UPDATE responses SET expires_at = ? WHERE key = ?", (time.time() - seconds_ago, key))
+    connection.commit()
+
+
+def test_keys_are_normalized():
+    assert search_request("  Catan ", exact=1)[0] == search_request("catan", exact="1")[0]
+    assert search_request("catan")[0] != search_request("catan", exact=1)[0]
+    assert boardgame_request("13,822, 13") == boardgame_request([822, 13])
+    assert boardgame_request(13, stats="1")[1] == "/xmlapi/boardgame/13?stats=1"
+    with pytest.raises(ValueError):
+        boardgame_request("13;drop")
+
+
+def test_fresh_entries_are_served_from_cache(cache, fetcher, bgg_stub):
+    body, state = cache.search("Catan", fetcher)
+    assert state == "miss"
+    assert b'objectid="13"' in body
+
+    assert cache.search("CATAN", fetcher) == (body, "hit")
+    assert len(bgg_stub.requests) == 1
+
+
+def test_expired_entries_are_revalidated(cache, fetcher, bgg_stub):
+    body, _ = cache.boardgame(13, fetcher)
+    key = boardgame_request(13)[0]
+    expire(cache, key, seconds_ago=120)
+
+    assert cache.boardgame(13, fetcher) == (body, "revalidated")
+    assert cache.boardgame(13, fetcher)[1] == "hit"
+    assert len(bgg_stub.requests) == 2
+
+
+def test_stale_entries_are_refreshed_in_background(cache, fetcher, bgg_stub):
+    body, _ = cache.boardgame(13, fetcher)
+    expire(cache, boardgame_request(13)[0], seconds_ago=10)
+
+    assert cache.boardgame(13, fetcher) == (body, "stale")
+    for _ in range(50):
+        if not cache.refreshing:
+            break
+        time.sleep(0.05)
+    assert cache.boardgame(13, fetcher)[1] == "hit"
+    assert len(bgg_stub.requests) == 2
+
+
+def test_empty_results_expire_sooner(cache, fetcher):
+    cache.search("Not a game", fetcher)
+    cache.search("Catan", fetcher)
+
+    ttls = dict(cache.connection().execute("SELECT key, expires_at - fetched_at FROM responses"))
+    assert ttls[search_request("not a game")[0]] == pytest.approx(5)
+    assert ttls[search_request("catan")[0]] == pytest.approx(60)
+
+
+def test_errors_are_not_cached(cache, fetcher, bgg_stub):
+    bgg_stub.broken.add("/xmlapi/boardgame/13")
+
+    with pytest.raises(requests.HTTPError):
+        cache.boardgame(13, fetcher)
+    assert cache.load(boardgame_request(13)[0]) is None
@@ -0,0 +1,70 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# BGG XML Parser Unit Tests           #
+# PyTest                              #
+#                                     #
+#######################################
+
+import io
+
+from bgg_xml import iter_boardgames, iter_search_ids, parse_boardgame_xml
+
+
+BATCH = b"""<?xml version="1.0" encoding="utf-8"?>
+<boardgames termsofuse="https://boardgamegeek.com/xmlapi/termsofuse">
+  <boardgame objectid="13">
+    <yearpublished>1995</yearpublished>
+    <minplayers>3</minplayers>
+    <maxplayers>4</maxplayers>
+    <minplaytime>60</minplaytime>
+    <maxplaytime>120</maxplaytime>
+    <name sortindex="1">Die Siedler von Catan</name>
+    <name primary="true" sortindex="1">Catan</name>
+    <description>Trade, build and settle.</description>
+    <thumbnail>https://example.com/13.jpg</thumbnail>
+    <boardgamepublisher objectid="37">KOSMOS</boardgamepublisher>
+    <boardgamepublisher objectid="4">Mayfair Games</boardgamepublisher>
+    <poll name="suggested_numplayers"><results numplayers="4"><result value="Best" numvotes="900"/></results></poll>
+    <statistics page="1"><ratings><average>7.1</average><averageweight>2.29</averageweight></ratings></statistics>
+  </boardgame>
+  <boardgame objectid="999999999"><error message="Item not found"/></boardgame>
+  <boardgame objectid="163412">
+    <minplayers>2</minplayers>
+    <maxplayers>2</maxplayers>
+    <minplaytime>0</minplaytime>
+    <maxplaytime>0</maxplaytime>
+    <name primary="true" sortindex="1">Patchwork</name>
+  </boardgame>
+</boardgames>"""
+
+
+def test_batch_response_yields_every_game():
+    games = list(iter_boardgames(io.BytesIO(BATCH)))
+
+    assert [game["bgg_id"] for game in games] == ["13", "163412"]
+    catan, patchwork = games
+    assert catan["title"] == "Catan"
+    assert catan["publisher"] == "KOSMOS"
+    assert catan["players"] == "3-4"
+    assert catan["duration"] == "60-120"
+    assert catan["difficulty"] == "2.29"
+    assert catan["yearpublished"] == "1995"
+    assert (catan["min_playtime"], catan["max_playtime"]) == (60, 120)
+    assert patchwork["players"] == "2"
+    assert patchwork["duration"] == "Unknown"
+    assert patchwork["difficulty"] == ""
+
+
+def test_parse_boardgame_xml_returns_first_game():
+    assert parse_boardgame_xml(BATCH)["title"] == "Catan"
+    assert parse_boardgame_xml(b'<boardgames><boardgame objectid="1"><error message="x"/></boardgame></boardgames>') == {}
+
+
+def test_search_ids():
+    search = (b'<boardgames><boardgame objectid="13"><name primary="true">Catan</name></boardgame>'
+              b'<boardgame objectid="278"><name>Catan Card Game</name></boardgame></boardgames>')
+
+    assert list(iter_search_ids(search)) == ["13", "278"]
+    assert list(iter_search_ids(b"<boardgames></boardgames>")) == []
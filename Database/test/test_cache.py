@@ -0,0 +1,84 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Response Cache Unit Tests           #
+# PyTest                              #
+#                                     #
+#######################################
+
+import redis
+
+
+class BrokenRedis:
+    #Every command fails as if the Redis server were down
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            raise redis.exceptions.ConnectionError("Connection refused")
+        return command
+
+
+def add_game(client, title):
+    return client.post("/catalogue", json={"title": title, "difficulty": 2})
+
+
+def test_matching_etag_returns_304(client):
+    add_game(client, "Catan")
+    first = client.get("/catalogue/titles")
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    second = client.get("/catalogue/titles", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 304
+    assert second.data == b""
+
+
+def test_cached_responses_are_served_without_the_database(client, count_queries):
+    add_game(client, "Catan")
+    first = client.get("/catalogue/titles")
+
+    del count_queries[:]
+    second = client.get("/catalogue/titles")
+
+    assert count_queries == []
+    assert second.get_json() == first.get_json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+
+def test_writes_invalidate_cached_responses(client, app_module):
+    add_game(client, "Catan")
+    first = client.get("/catalogue/titles")
+    generation = app_module.cache_generation("catalogue")
+
+    add_game(client, "Azul")
+
+    assert app_module.cache_generation("catalogue") == generation + 1
+    second = client.get("/catalogue/titles", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert sorted(game["title"] for game in second.get_json()) == ["Azul", "Catan"]
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_other_namespaces_stay_cached(client, app_module, count_queries):
+    add_game(client, "Catan")
+    client.get("/catalogue/titles")
+
+    app_module.invalidate_cache("events")
+    del count_queries[:]
+    client.get("/catalogue/titles")
+
+    assert count_queries == []
+
+
+def test_views_are_served_when_redis_is_down(client, app_module, monkeypatch):
+    add_game(client, "Catan")
+    monkeypatch.setattr(app_module, "r", BrokenRedis())
+
+    response = client.get("/catalogue/titles")
+    assert response.status_code == 200
+    assert [game["title"] for game in response.get_json()] == ["Catan"]
+    # Writes still succeed without a cache to invalidate
+    assert add_game(client, "Azul").status_code == 201
+    assert app_module.invalidate_cache("catalogue") == {}
+    assert len(client.get("/catalogue/titles").get_json()) == 2
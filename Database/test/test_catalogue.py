@@ -0,0 +1,287 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Catalogue Endpoint Unit Tests       #
+# PyTest                              #
+#                                     #
+#######################################
+
+from sqlalchemy import text
+
+
+def add_catalogue(app_module, *titles):
+    db, Catalogue = app_module.db, app_module.Catalogue
+    games = [Catalogue(title=title, description=f"{title} description", difficulty=2) for title in titles]
+    db.session.add_all(games)
+    db.session.commit()
+    return [game.id for game in games]
+
+
+def search_titles(client, q):
+    return [game["title"] for game in client.get(f"/catalogue/search?q={q}").get_json()]
+
+
+GAMES = [
+    {"title": "Catan", "difficulty": 2.3, "players": "3-4", "duration": "60-120"},
+    {"title": "Azul", "difficulty": 1.8, "players": "2-4", "duration": "30-45"},
+    {"title": "Patchwork", "difficulty": 1.6, "players": "2", "duration": "15-30"},
+    {"title": "Brass", "difficulty": 3.9, "players": "2-4", "duration": "60-120"},
+    {"title": "Codenames", "difficulty": 1.3, "players": "2-8", "duration": "15"},
+]
+
+
+def add_games(client):
+    for game in GAMES:
+        client.post("/catalogue", json=game)
+
+
+def titles(response):
+    return [game["title"] for game in response.get_json()]
+
+
+def test_catalogue_defaults_to_id_order_with_every_field(client, app_module):
+    add_games(client)
+
+    games = client.get("/catalogue").get_json()
+
+    assert [game["title"] for game in games] == [game["title"] for game in GAMES]
+    assert [game["id"] for game in games] == sorted(game["id"] for game in games)
+    assert set(games[0]) == set(app_module.CATALOGUE_FIELDS)
+    assert (games[0]["min_players"], games[0]["max_players"]) == (3, 4)
+
+
+def test_catalogue_returns_only_the_requested_fields(client):
+    add_games(client)
+
+    games = client.get("/catalogue?fields=title,difficulty&sort_by=difficulty").get_json()
+    assert games[0] == {"title": "Codenames", "difficulty": 1.3}
+
+    response = client.get("/catalogue?fields=title,secret")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Unknown fields: secret"}
+
+
+def test_title_filter_matches_wildcards_literally(client, app_module):
+    add_catalogue(app_module, "100% Orange Juice", "1000 Blank White Cards", "Back_Stab", "BackStab")
+
+    assert titles(client.get("/catalogue?title=100%25")) == ["100% Orange Juice"]
+    assert titles(client.get("/catalogue?title=_")) == ["Back_Stab"]
+    assert titles(client.get("/catalogue?title=%25")) == ["100% Orange Juice"]
+
+
+def test_catalogue_filters(client):
+    add_games(client)
+
+    assert titles(client.get("/catalogue?title=CAT")) == ["Catan"]
+    assert titles(client.get("/catalogue?difficulty_min=1.6&difficulty_max=2.3")) == ["Catan", "Azul", "Patchwork"]
+    assert titles(client.get("/catalogue?players=5")) == ["Codenames"]
+    assert titles(client.get("/catalogue?players=3&duration=40")) == ["Azul"]
+    assert titles(client.get("/catalogue?players=2&sort_by=name&order=desc&fields=title")) == \
+        ["Patchwork", "Codenames", "Brass", "Azul"]
+
+
+def test_catalogue_rejects_invalid_parameters(client):
+    assert client.get("/catalogue?sort_by=price").status_code == 400
+    assert client.get("/catalogue?players=two").status_code == 400
+    assert client.get("/catalogue?limit=0").status_code == 400
+    assert client.get("/catalogue?limit=501").status_code == 400
+    assert client.get("/catalogue?limit=2&cursor=not-a-cursor").status_code == 400
+
+
+def test_catalogue_cursor_paging(client):
+    add_games(client)
+    # Games sharing a play time come in descending id order
+    pages = []
+    url = "/catalogue?sort_by=duration&order=desc&fields=title&limit=2"
+    while url:
+        response = client.get(url)
+        pages.append(titles(response))
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/catalogue?sort_by=duration&order=desc&fields=title&limit=2&cursor={cursor}" if cursor else None
+
+    assert pages == [["Brass", "Catan"], ["Azul", "Codenames"], ["Patchwork"]]
+
+def test_search_sees_writes_of_other_workers(client, app_module):
+    add_catalogue(app_module, "Catan")
+    assert search_titles(client, "catan") == ["Catan"]
+
+    # Another API worker, seed.py or an import writes and bumps the generation
+    add_catalogue(app_module, "Catan Junior")
+    app_module.invalidate_cache("catalogue")
+
+    assert search_titles(client, "catan") == ["Catan", "Catan Junior"]
+
+
+def test_own_writes_update_the_index_in_place(client, app_module):
+    add_catalogue(app_module, "Catan")
+    search_titles(client, "catan")
+    index = app_module.search_index
+
+    response = client.post("/catalogue", json={"title": "Catan Junior", "difficulty": 2})
+    game_id = response.get_json()["id"]
+
+    assert index.generation == app_module.cache_generation("catalogue")
+    assert search_titles(client, "catan") == ["Catan", "Catan Junior"]
+
+    client.delete("/catalogue", json={"id": game_id})
+    assert search_titles(client, "catan") == ["Catan"]
+
+
+def test_index_is_rebuilt_when_another_worker_wrote_in_between(client, app_module):
+    add_catalogue(app_module, "Catan")
+    search_titles(client, "catan")
+    add_catalogue(app_module, "Catan Junior")
+    app_module.invalidate_cache("catalogue")
+
+    client.post("/catalogue", json={"title": "Catan Dice", "difficulty": 2})
+
+    assert not app_module.search_index.loaded
+    assert search_titles(client, "catan") == ["Catan", "Catan Dice", "Catan Junior"]
+
+
+def test_truncated_searches_are_flagged(client, app_module, monkeypatch):
+    add_catalogue(app_module, "Catan", "Catan Junior", "Catan Dice")
+    monkeypatch.setattr(app_module, "MAX_SEARCH_RESULTS", 2)
+
+    response = client.get("/catalogue?q=catan&fields=title&limit=1")
+    assert response.headers["X-Search-Truncated"] == "2"
+    assert len(response.get_json()) == 1
+    next_page = client.get(f"/catalogue?q=catan&fields=title&limit=1&cursor={response.headers['X-Next-Cursor']}")
+    assert len(next_page.get_json()) == 1
+    assert "X-Next-Cursor" not in next_page.headers
+
+    assert "X-Search-Truncated" not in client.get("/catalogue?q=junior").headers
+
+
+def bulk(client, rows):
+    response = client.post("/catalogue/bulk", json=rows)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_bulk_reports_invalid_rows_and_writes_the_rest(client, app_module):
+    body = bulk(client, [
+        {"title": "Catan", "difficulty": 2.3, "bgg_id": 13},
+        {"title": "", "difficulty": 2},
+        {"title": "Azul", "difficulty": "hard"},
+        {"title": "Azul", "difficulty": 1.8, "colour": "blue"},
+        {"title": "Catan again", "difficulty": 2.3, "bgg_id": 13},
+        "Pandemic",
+        {"title": "Pandemic", "difficulty": 2.4, "players": "2-4", "duration": "45 min"},
+    ])
+
+    assert (body["received"], body["inserted"], body["failed"]) == (7, 2, 5)
+    assert body["errors"] == [
+        {"row": 1, "error": "title is required"},
+        {"row": 2, "error": "difficulty must be a number"},
+        {"row": 3, "error": "Unknown fields: colour"},
+        {"row": 4, "error": "Duplicate bgg_id 13 (row 0)"},
+        {"row": 5, "error": "Row must be an object"},
+    ]
+    pandemic = app_module.Catalogue.query.filter_by(title="Pandemic").one()
+    assert (pandemic.min_players, pandemic.max_players, pandemic.min_playtime, pandemic.max_playtime) == (2, 4, 45, 45)
+
+
+def test_bulk_accepts_ndjson_and_reports_bad_lines(client):
+    body = ('{"title": "Catan", "difficulty": 2.3}\n'
+            'not json\n'
+            '\n'
+            '{"title": "Azul", "difficulty": 1.8}\n')
+
+    response = client.post("/catalogue/bulk", data=body, content_type="application/x-ndjson")
+
+    body = response.get_json()
+    assert body["inserted"] == 2
+    assert [error["row"] for error in body["errors"]] == [1]
+
+
+def test_bulk_rejects_bodies_it_cannot_read(client, app_module, monkeypatch):
+    assert client.post("/catalogue/bulk", data="[{", content_type="application/json").status_code == 400
+    monkeypatch.setattr(app_module, "MAX_BULK_ROWS", 2)
+    assert client.post("/catalogue/bulk", json=[{}, {}, {}]).status_code == 413
+
+
+def test_bulk_upserts_on_bgg_id_then_id(client, app_module):
+    bulk(client, [{"title": "Catan", "difficulty": 2.3, "bgg_id": 13}, {"title": "Azul", "difficulty": 1.8}])
+    azul_id = app_module.Catalogue.query.filter_by(title="Azul").one().id
+
+    body = bulk(client, [
+        {"title": "Catan", "difficulty": 2.3, "bgg_id": 13},
+        {"id": azul_id, "title": "Azul", "difficulty": 1.9},
+        {"title": "Pandemic", "difficulty": 2.4, "bgg_id": 30549},
+    ])
+
+    assert (body["inserted"], body["updated"], body["unchanged"]) == (1, 1, 1)
+    assert app_module.Catalogue.query.count() == 3
+    assert app_module.db.session.get(app_module.Catalogue, azul_id).difficulty == 1.9
+
+
+def test_bulk_writes_in_chunks(client, app_module, monkeypatch):
+    chunks = []
+    write_catalogue_chunk = app_module.write_catalogue_chunk
+
+    def recording_write(chunk):
+        chunks.append(len(chunk))
+        return write_catalogue_chunk(chunk)
+
+    monkeypatch.setattr(app_module, "BULK_CHUNK_SIZE", 2)
+    monkeypatch.setattr(app_module, "write_catalogue_chunk", recording_write)
+
+    body = bulk(client, [{"title": f"Game {i}", "difficulty": 2} for i in range(5)])
+
+    assert body["inserted"] == 5
+    assert chunks == [2, 2, 1]
+
+
+def test_rows_the_database_rejects_fail_alone(client, app_module):
+    app_module.db.session.execute(text(
+        "CREATE TRIGGER reject_game BEFORE INSERT ON catalogue WHEN NEW.title = 'Rejected' "
+        "BEGIN SELECT RAISE(ABORT, 'rejected by the database'); END"
+    ))
+    body = bulk(client, [
+        {"title": "Catan", "difficulty": 2.3},
+        {"title": "Rejected", "difficulty": 2},
+        {"title": "Azul", "difficulty": 1.8},
+        {"title": "Too new", "difficulty": 2, "yearpublished": 2 ** 70},
+    ])
+
+    assert (body["inserted"], body["failed"]) == (2, 2)
+    assert body["errors"][0]["row"] == 1
+    assert "rejected by the database" in body["errors"][0]["error"]
+    assert body["errors"][1] == {"row": 3, "error": "yearpublished is out of range"}
+    assert sorted(game.title for game in app_module.Catalogue.query.all()) == ["Azul", "Catan"]
+
+
+def test_sync_state_lists_synced_games(client, app_module):
+    bulk(client, [{"title": "Catan", "difficulty": 2.3, "bgg_id": 13}, {"title": "Azul", "difficulty": 1.8}])
+
+    state = client.get("/catalogue/sync-state").get_json()
+
+    assert len(state) == 1
+    assert state[0]["bgg_id"] == 13
+    assert len(state[0]["content_hash"]) == 64
+    assert state[0]["last_synced"].endswith("Z")
+
+
+def test_unchanged_rows_only_refresh_their_sync_time(client, app_module, count_queries):
+    catan = {"title": "Catan", "difficulty": 2.3, "bgg_id": 13}
+    bulk(client, [catan])
+    before = client.get("/catalogue/sync-state").get_json()[0]
+    generation = app_module.cache_generation("catalogue")
+
+    del count_queries[:]
+    body = bulk(client, [catan])
+
+    assert (body["inserted"], body["updated"], body["unchanged"]) == (0, 0, 1)
+    updates = [statement for statement in count_queries if statement.startswith("UPDATE")]
+    assert len(updates) == 1 and "title" not in updates[0]
+    after = client.get("/catalogue/sync-state").get_json()[0]
+    assert after["content_hash"] == before["content_hash"]
+    assert after["last_synced"] > before["last_synced"]
+    # Nothing a reader sees changed, cached responses stay valid
+    assert app_module.cache_generation("catalogue") == generation
+
+    body = bulk(client, [dict(catan, difficulty=2.4)])
+    assert body["updated"] == 1
+    assert client.get("/catalogue/sync-state").get_json()[0]["content_hash"] != before["content_hash"]
@@ -0,0 +1,133 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Cleanup Unit Tests                  #
+# PyTest                              #
+#                                     #
+#######################################
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+NOW = datetime(2025, 6, 1, 12)
+WEEK_MICROSECONDS = 7 * 24 * 3600 * 10 ** 6
+
+
+def add_event(app_module, end_time, recurring=False, image_hash=None):
+    event = app_module.Event(
+        title="Event",
+        description="Weekly game night" if recurring else "One off",
+        image_hash=image_hash,
+        start_time=end_time - timedelta(hours=3),
+        end_time=end_time,
+        recurring=recurring,
+    )
+    app_module.db.session.add(event)
+    app_module.db.session.commit()
+    return event.id
+
+
+def add_game(app_module, end_time):
+    app_module.db.session.add(app_module.Game(
+        title="Game",
+        organizer="Organizer",
+        start_time=end_time - timedelta(hours=3),
+        end_time=end_time,
+        description="Game night",
+        players="2-4",
+    ))
+    app_module.db.session.commit()
+
+
+def test_cleanup_deletes_ended_events_and_games(client, app_module):
+    add_event(app_module, NOW - timedelta(days=1))
+    kept = add_event(app_module, NOW + timedelta(hours=1))
+    add_game(app_module, NOW - timedelta(minutes=1))
+    add_game(app_module, NOW + timedelta(days=1))
+
+    result = app_module.run_cleanup(NOW)
+
+    assert result["events_deleted"] == 1
+    assert result["games_deleted"] == 1
+    assert result["events_rolled_over"] == 0
+    assert [event.id for event in app_module.Event.query.all()] == [kept]
+    assert app_module.Game.query.count() == 1
+
+
+@pytest.mark.parametrize("single_statement", [True, False])
+def test_cleanup_moves_recurring_events_by_whole_weeks(client, app_module, monkeypatch, single_statement):
+    if not single_statement:
+        # A database without date arithmetic in rollover_statement
+        monkeypatch.setattr(app_module, "rollover_statement", lambda now, dialect: None)
+    # Ended 1 second, exactly 2 weeks and 2 weeks and a day ago
+    just_ended = add_event(app_module, NOW - timedelta(seconds=1), recurring=True)
+    two_weeks = add_event(app_module, NOW - timedelta(weeks=2), recurring=True)
+    longer = add_event(app_module, NOW - timedelta(weeks=2, days=1), recurring=True)
+    upcoming = add_event(app_module, NOW + timedelta(days=1), recurring=True)
+
+    result = app_module.run_cleanup(NOW)
+    app_module.db.session.expire_all()
+
+    assert result["events_rolled_over"] == 3
+    assert result["events_deleted"] == 0
+    end_times = {event.id: event.end_time for event in app_module.Event.query.all()}
+    assert end_times == {
+        just_ended: NOW - timedelta(seconds=1) + timedelta(weeks=1),
+        two_weeks: NOW,
+        longer: NOW - timedelta(days=1) + timedelta(weeks=1),
+        upcoming: NOW + timedelta(days=1),
+    }
+    for event in app_module.Event.query.all():
+        assert event.end_time - event.start_time == timedelta(hours=3)
+
+
+def test_mysql_rollover_sql(app_module):
+    statement = app_module.rollover_statement(NOW, "mysql")
+
+    sql = " ".join(str(statement.compile(dialect=mysql.dialect())).split())
+
+    assert sql == (
+        "UPDATE events SET start_time=timestampadd(DAY, ceil(timestampdiff(MICROSECOND, events.end_time, %s) / %s) * %s, "
+        "events.start_time), end_time=timestampadd(DAY, ceil(timestampdiff(MICROSECOND, events.end_time, %s) / %s) * %s, "
+        "events.end_time) WHERE events.end_time < %s AND events.recurring IS true"
+    )
+    params = statement.compile(dialect=mysql.dialect()).params
+    assert WEEK_MICROSECONDS in params.values()
+    assert NOW in params.values()
+
+
+def test_dialects_without_date_arithmetic_have_no_statement(app_module):
+    assert app_module.rollover_statement(NOW, "postgresql") is None
+
+
+def test_cleanup_query_count_does_not_grow(client, app_module, count_queries):
+    add_event(app_module, NOW - timedelta(days=1))
+    add_event(app_module, NOW - timedelta(days=1), recurring=True)
+    count_queries.clear()
+    app_module.run_cleanup(NOW)
+    few = len(count_queries)
+
+    for i in range(20):
+        add_event(app_module, NOW - timedelta(days=i + 1))
+        add_event(app_module, NOW - timedelta(days=i + 1), recurring=True)
+        add_game(app_module, NOW - timedelta(days=i + 1))
+    count_queries.clear()
+    result = app_module.run_cleanup(NOW)
+
+    assert (result["events_deleted"], result["events_rolled_over"], result["games_deleted"]) == (20, 20, 20)
+    assert len(count_queries) == few
+
+
+def test_cleanup_endpoint_reports_counts(client, app_module):
+    add_event(app_module, datetime.utcnow() - timedelta(days=1))
+
+    response = client.post("/cleanup")
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["message"] == "Cleanup completed"
+    assert body["events_deleted"] == 1
+    assert "duration_ms" in body
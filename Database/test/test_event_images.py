@@ -0,0 +1,199 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Event Image Unit Tests              #
+# PyTest                              #
+#                                     #
+#######################################
+
+import base64
+import io
+import time
+from datetime import datetime
+
+import pytest
+from PIL import Image
+from sqlalchemy.exc import OperationalError
+
+from image_pipeline import process_image
+from image_store import ImageStore
+
+EVENT = {
+    "title": "Game Night",
+    "description": "Board game meetup",
+    "startTime": "2025-05-01T18:00:00",
+    "endTime": "2025-05-01T21:00:00",
+    "price": "Free",
+}
+
+
+def jpeg_base64(color="red", size=(1200, 900)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def wait_for_job(client, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/image-jobs/{job_id}").get_json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Image job {job_id} did not finish")
+
+
+def test_only_this_apis_image_urls_count_as_unchanged(app_module):
+    is_image_upload = app_module.is_image_upload
+    assert is_image_upload(jpeg_base64())
+    assert jpeg_base64().startswith("/9j/")
+    assert is_image_upload("data:image/png;base64,iVBORw0KGgo=")
+    assert not is_image_upload("https://example.com/event.jpg")
+    assert not is_image_upload("http://localhost:5000/events/1/image?size=full&v=6b4e004c")
+    assert not is_image_upload("/events/12/image?size=card")
+    assert not is_image_upload(None)
+    assert not is_image_upload("")
+
+
+def test_bare_base64_jpeg_upload_is_processed(client, app_module):
+    response = client.post("/events", json=dict(EVENT, image=jpeg_base64()))
+    assert response.status_code == 201
+    body = response.get_json()
+    assert "imageJob" in body
+
+    assert wait_for_job(client, body["imageJob"])["status"] == "done"
+    event = client.get("/events").get_json()[0]
+    assert event["image"] is not None
+    assert set(event["images"]) == {"thumb", "card", "full"}
+
+    image = client.get(f"/events/{body['id']}/image?size=thumb&format=jpeg")
+    assert image.status_code == 200
+    assert max(Image.open(io.BytesIO(image.data)).size) <= 160
+
+
+def test_sending_the_image_url_back_keeps_the_image(client, app_module):
+    body = client.post("/events", json=dict(EVENT, image=jpeg_base64())).get_json()
+    wait_for_job(client, body["imageJob"])
+    image_url = client.get("/events").get_json()[0]["image"]
+
+    response = client.put(f"/events/{body['id']}", json={"title": "Renamed", "image": image_url})
+
+    assert "imageJob" not in response.get_json()
+    assert client.get("/events").get_json()[0]["image"] == image_url
+
+
+def test_event_is_announced_when_the_image_job_cannot_start(client, app_module, monkeypatch):
+    def broken_submit(*args, **kwargs):
+        raise RuntimeError("pool unavailable")
+    monkeypatch.setattr(app_module.image_jobs, "submit", broken_submit)
+
+    response = client.post("/events", json=dict(EVENT, image=jpeg_base64()))
+
+    assert response.status_code == 201
+    assert "imageError" in response.get_json()
+    assert len(app_module.r.xrange(app_module.ANNOUNCEMENT_STREAM)) == 1
+
+
+def new_event(app_module, title="Game Night"):
+    return app_module.Event(
+        title=title, description="Board game meetup", price="Free", recurring=False,
+        start_time=datetime(2025, 5, 1, 18), end_time=datetime(2025, 5, 1, 21),
+    )
+
+
+def add_event_with_image(app_module, color="red"):
+    event = new_event(app_module)
+    app_module.db.session.add(event)
+    app_module.db.session.commit()
+    derivatives = process_image(base64.b64decode(jpeg_base64(color)))
+    app_module.attach_event_image(event, derivatives)
+    return event, derivatives
+
+
+def stored_hashes(app_module, event):
+    return app_module.event_image_set(event)[1]
+
+
+def test_images_of_deleted_events_are_removed_unless_shared(client, app_module):
+    first, _ = add_event_with_image(app_module)
+    second, _ = add_event_with_image(app_module)
+    hashes = stored_hashes(app_module, first)
+    assert hashes == stored_hashes(app_module, second)
+
+    client.delete("/events", json={"id": first.id})
+    assert all(app_module.image_store.exists(h) for h in hashes)
+
+    client.delete("/events", json={"id": second.id})
+    assert not any(app_module.image_store.exists(h) for h in hashes)
+
+
+def test_release_puts_back_files_an_identical_upload_started_using(client, app_module, monkeypatch):
+    old, derivatives = add_event_with_image(app_module)
+    hashes = stored_hashes(app_module, old)
+    image_set = app_module.event_image_set(old)
+    app_module.db.session.delete(old)
+    app_module.db.session.commit()
+    delete = app_module.image_store.delete
+
+    def delete_while_uploading(image_hash):
+        delete(image_hash)
+        if not app_module.Event.query.count():
+            # An identical upload is committed between the reference check and the delete
+            new = new_event(app_module, "Again")
+            app_module.set_event_image(new, derivatives)
+            app_module.db.session.add(new)
+            app_module.db.session.commit()
+
+    monkeypatch.setattr(app_module.image_store, "delete", delete_while_uploading)
+    app_module.release_images([image_set])
+
+    assert all(app_module.image_store.exists(h) for h in hashes)
+
+
+def test_attach_stores_files_released_before_its_commit(client, app_module, monkeypatch):
+    first, derivatives = add_event_with_image(app_module)
+    hashes = stored_hashes(app_module, first)
+    set_event_image = app_module.set_event_image
+
+    def set_then_released(event, derivatives):
+        set_event_image(event, derivatives)
+        # The only other user of these files is deleted and releases them
+        # after put() found them present, but before this commit
+        for h in hashes:
+            app_module.image_store.delete(h)
+
+    second = new_event(app_module, "Again")
+    app_module.db.session.add(second)
+    app_module.db.session.commit()
+    monkeypatch.setattr(app_module, "set_event_image", set_then_released)
+    app_module.attach_event_image(second, derivatives)
+
+    assert all(app_module.image_store.exists(h) for h in hashes)
+
+
+def test_failed_commit_removes_the_new_files(client, app_module, monkeypatch):
+    event, _ = add_event_with_image(app_module, "red")
+    old_hashes = stored_hashes(app_module, event)
+    derivatives = process_image(base64.b64decode(jpeg_base64("blue")))
+    new_hashes = {h for formats in derivatives.values() for h in map(app_module.image_store.hash_bytes, formats.values())}
+
+    def broken_commit():
+        raise OperationalError("UPDATE events", {}, Exception("server has gone away"))
+    monkeypatch.setattr(app_module.db.session, "commit", broken_commit)
+    with pytest.raises(OperationalError):
+        app_module.attach_event_image(event, derivatives)
+    monkeypatch.undo()
+
+    assert not any(app_module.image_store.exists(h) for h in new_hashes)
+    assert all(app_module.image_store.exists(h) for h in old_hashes)
+    assert stored_hashes(app_module, app_module.db.session.get(app_module.Event, event.id)) == old_hashes
+
+
+def test_incomplete_image_store_backends_cannot_be_created():
+    class WriteOnlyStore(ImageStore):
+        def put(self, data):
+            return self.hash_bytes(data)
+
+    with pytest.raises(TypeError):
+        WriteOnlyStore()
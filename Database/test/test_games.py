@@ -0,0 +1,68 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Games Endpoint Unit Tests           #
+# PyTest                              #
+#                                     #
+#######################################
+
+from datetime import datetime, timedelta
+
+
+def add_games(app_module, count):
+    db, Catalogue, Game = app_module.db, app_module.Catalogue, app_module.Game
+    start = datetime(2025, 5, 1, 18)
+    for i in range(count):
+        catalogue_game = Catalogue(title=f"Catalogue game {i}", difficulty=2)
+        db.session.add(catalogue_game)
+        db.session.flush()
+        # Every other game has no title of its own and shows the catalogue title
+        db.session.add(Game(
+            title="" if i % 2 else f"Game {i}",
+            organizer="Organizer",
+            start_time=start + timedelta(days=i),
+            end_time=start + timedelta(days=i, hours=3),
+            description="Game night",
+            players="2-4",
+            catalogue_id=catalogue_game.id,
+        ))
+    db.session.commit()
+
+
+def test_games_use_catalogue_titles(client, app_module):
+    add_games(app_module, 2)
+
+    games = client.get("/games").get_json()
+
+    assert [game["title"] for game in games] == ["Game 0", "Catalogue game 1"]
+
+
+def test_games_query_count_does_not_grow(client, app_module, count_queries):
+    add_games(app_module, 2)
+    count_queries.clear()
+    client.get("/games")
+    few = len(count_queries)
+
+    add_games(app_module, 20)
+    app_module.r.flushall()
+    count_queries.clear()
+    games = client.get("/games").get_json()
+
+    assert len(games) == 22
+    assert len(count_queries) == few
+
+
+def test_games_time_window(client, app_module):
+    # Games on May 1st to 5th, 18:00 to 21:00
+    add_games(app_module, 5)
+
+    games = client.get("/games?from=2025-05-02T20:00:00&to=2025-05-04T00:00:00").get_json()
+    assert [game["startTime"] for game in games] == ["2025-05-02T18:00:00", "2025-05-03T18:00:00"]
+
+    # Times with an offset are compared in UTC
+    games = client.get("/games", query_string={"from": "2025-05-04T12:00:00-08:00", "limit": 1}).get_json()
+    assert [game["startTime"] for game in games] == ["2025-05-04T18:00:00"]
+
+    assert client.get("/games?from=tomorrow").status_code == 400
+    assert client.get("/games?limit=0").status_code == 400
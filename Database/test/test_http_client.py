@@ -0,0 +1,74 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# HTTP Client Unit Tests              #
+# PyTest                              #
+#                                     #
+#######################################
+
+from http_client import HTTPClient, host_key
+
+
+def stub_host(bgg_stub):
+    return bgg_stub.url.split("//", 1)[1]
+
+
+def test_connections_are_reused(bgg_stub):
+    http = HTTPClient(max_retries=0)
+    for _ in range(5):
+        assert http.get(f"{bgg_stub.url}/xmlapi/search?search=catan").status_code == 200
+
+    metrics = http.metrics()["hosts"][stub_host(bgg_stub)]
+    assert metrics["requests"] == 5
+    assert metrics["pool_misses"] == 1
+    assert metrics["pool_hits"] == 4
+    assert metrics["idle_connections"] == 1
+
+
+def test_throttled_requests_are_retried(bgg_stub):
+    http = HTTPClient(max_retries=2)
+    bgg_stub.throttle.add("/xmlapi/search?search=azul")
+    calls = []
+
+    response = http.get(f"{bgg_stub.url}/xmlapi/search?search=azul", throttle=lambda: calls.append(1))
+
+    assert response.status_code == 200
+    assert len(calls) == 2
+    assert http.metrics()["hosts"][stub_host(bgg_stub)]["retries"] == 1
+
+
+def test_post_is_not_retried_by_default(bgg_stub):
+    http = HTTPClient(max_retries=2)
+    bgg_stub.throttle.add("/catalogue/bulk")
+
+    response = http.post(f"{bgg_stub.url}/catalogue/bulk", json=[])
+
+    assert response.status_code == 503
+    assert bgg_stub.requests == ["/catalogue/bulk"]
+    assert bgg_stub.posted == []
+    assert http.metrics()["hosts"][stub_host(bgg_stub)]["retries"] == 0
+
+
+def test_post_is_retried_when_asked(bgg_stub):
+    http = HTTPClient(max_retries=2)
+    bgg_stub.throttle.add("/catalogue/bulk")
+
+    response = http.post(f"{bgg_stub.url}/catalogue/bulk", json=[], retry=True)
+
+    assert response.status_code == 200
+    assert bgg_stub.requests == ["/catalogue/bulk", "/catalogue/bulk"]
+    assert http.metrics()["hosts"][stub_host(bgg_stub)]["retries"] == 1
+
+
+def test_get_is_not_retried_with_retry_false(bgg_stub):
+    http = HTTPClient(max_retries=2)
+    bgg_stub.throttle.add("/xmlapi/search?search=azul")
+
+    assert http.get(f"{bgg_stub.url}/xmlapi/search?search=azul", retry=False).status_code == 503
+    assert http.metrics()["hosts"][stub_host(bgg_stub)]["retries"] == 0
+
+
+def test_host_key_drops_default_ports():
+    assert host_key("boardgamegeek.com", 443) == "boardgamegeek.com"
+    assert host_key("localhost", 5000) == "localhost:5000"
@@ -0,0 +1,118 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Image Job Queue Unit Tests          #
+# PyTest                              #
+#                                     #
+#######################################
+
+import json
+import os
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from image_jobs import ImageJobQueue
+
+
+def run_job(queue, fn, *args, timeout=60):
+    # Submit and wait for on_done, returns (result, error)
+    assert queue.reserve()
+    finished = threading.Event()
+    outcome = []
+
+    def on_done(result, error):
+        outcome.append((result, error))
+        finished.set()
+
+    job_id = queue.submit(fn, *args, on_done=on_done, event=1)
+    assert finished.wait(timeout)
+    # finish() runs right after on_done
+    deadline = time.time() + 5
+    while queue.status(job_id)["status"] not in ("done", "failed") and time.time() < deadline:
+        time.sleep(0.01)
+    return job_id, outcome[0]
+
+
+@pytest.fixture
+def queue():
+    queue = ImageJobQueue(max_workers=1, max_pending=2, redis_client=fakeredis.FakeRedis())
+    yield queue
+    if queue.executor is not None:
+        queue.executor.shutdown(cancel_futures=True)
+    queue.completions.shutdown()
+
+
+def test_jobs_run_in_spawned_workers(queue):
+    job_id, (result, error) = run_job(queue, pow, 2, 10)
+
+    assert (result, error) == (1024, None)
+    assert queue.status(job_id)["status"] == "done"
+    assert queue.executor._mp_context.get_start_method() == "spawn"
+
+
+def test_pool_is_replaced_after_a_worker_dies(queue):
+    job_id, (result, error) = run_job(queue, os._exit, 1)
+    assert error is not None
+    assert queue.status(job_id)["status"] == "failed"
+
+    _, (result, error) = run_job(queue, pow, 3, 2)
+    assert (result, error) == (9, None)
+
+
+def test_queue_refuses_work_when_full(queue):
+    assert queue.reserve()
+    assert queue.reserve()
+    assert not queue.reserve()
+    queue.release()
+    queue.release()
+
+
+def test_status_is_shared_between_api_workers(queue):
+    job_id, _ = run_job(queue, pow, 2, 3)
+    other_worker = ImageJobQueue(max_workers=1, max_pending=2, redis_client=queue.redis)
+
+    assert other_worker.status(job_id)["status"] == "done"
+    assert other_worker.status(job_id)["event"] == 1
+    assert other_worker.status("unknown") is None
+
+
+def test_jobs_of_a_stopped_worker_are_reported_failed(queue):
+    queue.redis.set("image_job:lost", json.dumps({
+        "id": "lost", "status": "queued", "error": None, "worker": "api-1:99", "updated": time.time() - 3600,
+    }))
+
+    job = queue.status("lost")
+
+    assert job["status"] == "failed"
+    assert "interrupted" in job["error"]
+
+
+def test_a_slow_completion_does_not_hold_up_other_jobs(queue):
+    assert queue.reserve()
+    blocked = threading.Event()
+    queue.submit(pow, 2, 2, on_done=lambda result, error: blocked.wait(30))
+    try:
+        _, (result, error) = run_job(queue, pow, 2, 5, timeout=10)
+        assert (result, error) == (32, None)
+    finally:
+        blocked.set()
+
+
+def test_failing_completions_are_logged_and_fail_the_job(queue, capsys):
+    def on_done(result, error):
+        raise RuntimeError("database unavailable")
+
+    assert queue.reserve()
+    job_id = queue.submit(pow, 2, 2, on_done=on_done)
+    deadline = time.time() + 30
+    while queue.status(job_id)["status"] not in ("done", "failed") and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert queue.status(job_id) | {"worker": None} == {
+        "id": job_id, "status": "failed", "error": "database unavailable", "worker": None,
+    }
+    assert "database unavailable" in capsys.readouterr().out
@@ -0,0 +1,212 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Catalogue Importer Unit Tests       #
+# PyTest                              #
+#                                     #
+#######################################
+
+import time
+from datetime import datetime, timedelta
+
+import loadCatalouge
+
+
+GAMES = {
+    "Catan": {"id": 13, "minplayers": 3, "maxplayers": 4, "minplaytime": 60, "maxplaytime": 120},
+    "Azul": {"id": 230802, "minplayers": 2, "maxplayers": 4, "minplaytime": 30, "maxplaytime": 45},
+    "Patchwork": {"id": 163412, "minplayers": 2, "maxplayers": 2, "minplaytime": 15, "maxplaytime": 30},
+}
+
+
+def write_collection(tmp_path, names, object_ids=None):
+    csv_path = tmp_path / "collection.csv"
+    object_ids = object_ids or [0] * len(names)
+    csv_path.write_text("objectname,objectid\n" + "".join(f"{name},{i}\n" for name, i in zip(names, object_ids)))
+    return str(csv_path)
+
+
+def posted_rows(bgg_stub):
+    return [row for path, rows in bgg_stub.posted for row in rows]
+
+
+def run_import(bgg_stub, tmp_path, names, object_ids=None, **kwargs):
+    return loadCatalouge.load_catalogue_from_csv(
+        write_collection(tmp_path, names, object_ids),
+        workers=3,
+        rate=100,
+        burst=10,
+        checkpoint_path=str(tmp_path / "checkpoint.txt"),
+        names_path=str(tmp_path / "names.jsonl"),
+        bgg_url=bgg_stub.url,
+        api_url=bgg_stub.url,
+        cache_path=kwargs.pop("cache_path", None),
+        **kwargs,
+    )
+
+
+def test_import_posts_every_game(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+
+    failed = run_import(bgg_stub, tmp_path, list(GAMES))
+
+    assert failed == []
+    assert all(path == "/catalogue/bulk" for path, rows in bgg_stub.posted)
+    posted = {row["title"]: row for row in posted_rows(bgg_stub)}
+    assert set(posted) == set(GAMES)
+    assert posted["Catan"]["players"] == "3-4"
+    assert posted["Catan"]["min_playtime"] == 60
+    assert posted["Patchwork"]["players"] == "2"
+    assert posted["Azul"]["bgg_id"] == "230802"
+    # Nothing failed, so nothing is left to resume
+    assert not (tmp_path / "checkpoint.txt").exists()
+
+
+def test_import_after_a_complete_one_imports_everything_again(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+    run_import(bgg_stub, tmp_path, list(GAMES))
+    bgg_stub.posted.clear()
+
+    failed = run_import(bgg_stub, tmp_path, list(GAMES))
+
+    assert failed == []
+    assert sorted(row["title"] for row in posted_rows(bgg_stub)) == sorted(GAMES)
+
+
+def test_import_resumes_from_checkpoint(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+    (tmp_path / "checkpoint.txt").write_text("Catan\nAzul\n")
+
+    failed = run_import(bgg_stub, tmp_path, list(GAMES))
+
+    assert failed == []
+    assert [row["title"] for row in posted_rows(bgg_stub)] == ["Patchwork"]
+    assert not any("catan" in path.lower() for path in bgg_stub.requests)
+
+
+def test_import_retries_throttled_requests(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+    bgg_stub.throttle.add("/xmlapi/boardgame/13?stats=1")
+
+    failed = run_import(bgg_stub, tmp_path, ["Catan"])
+
+    assert failed == []
+    assert bgg_stub.requests.count("/xmlapi/boardgame/13?stats=1") == 2
+    assert [row["title"] for row in posted_rows(bgg_stub)] == ["Catan"]
+
+
+def test_failed_games_are_not_checkpointed(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+    bgg_stub.broken.add("/xmlapi/boardgame/13?stats=1")
+
+    failed = run_import(bgg_stub, tmp_path, list(GAMES), batch_size=1)
+
+    assert failed == ["Catan"]
+    checkpoint = (tmp_path / "checkpoint.txt").read_text().split("\n")
+    assert set(filter(None, checkpoint)) == {"Azul", "Patchwork"}
+
+
+def test_ids_missing_from_a_response_are_retried_then_failed(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+
+    failed = run_import(bgg_stub, tmp_path, ["Catan", "Gone"], object_ids=[13, 999], batch_size=2)
+
+    assert failed == ["Gone"]
+    details = [path for path in bgg_stub.requests if path.startswith("/xmlapi/boardgame/")]
+    assert details == ["/xmlapi/boardgame/13,999?stats=1", "/xmlapi/boardgame/999?stats=1"]
+    assert [row["title"] for row in posted_rows(bgg_stub)] == ["Catan"]
+    checkpoint = (tmp_path / "checkpoint.txt").read_text().split("\n")
+    assert set(filter(None, checkpoint)) == {"Catan"}
+
+
+def test_games_are_posted_in_batches(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+
+    failed = run_import(bgg_stub, tmp_path, list(GAMES), post_batch=2, batch_size=1)
+
+    assert failed == []
+    assert sorted(len(rows) for path, rows in bgg_stub.posted) == [1, 2]
+
+
+def test_rejected_rows_are_not_checkpointed(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+    bgg_stub.rejected.add("Azul")
+
+    failed = run_import(bgg_stub, tmp_path, list(GAMES))
+
+    assert failed == ["Azul"]
+    checkpoint = (tmp_path / "checkpoint.txt").read_text().split("\n")
+    assert set(filter(None, checkpoint)) == {"Catan", "Patchwork"}
+
+
+def test_cached_responses_are_reused(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+    cache_path = str(tmp_path / "bgg_cache.sqlite3")
+
+    run_import(bgg_stub, tmp_path, list(GAMES), cache_path=cache_path)
+    bgg_stub.requests.clear()
+    failed = run_import(bgg_stub, tmp_path, list(GAMES), cache_path=cache_path)
+
+    assert failed == []
+    assert not any(path.startswith("/xmlapi") for path in bgg_stub.requests)
+    assert len(posted_rows(bgg_stub)) == 2 * len(GAMES)
+
+
+def test_details_are_fetched_in_batches(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+
+    # Catan and Azul come with their id, Patchwork is searched
+    failed = run_import(bgg_stub, tmp_path, ["Catan", "Azul", "Patchwork", "Catan"],
+                        object_ids=[13, 230802, 0, 13], batch_size=2)
+
+    assert failed == []
+    details = [path for path in bgg_stub.requests if path.startswith("/xmlapi/boardgame/")]
+    assert sorted(details) == ["/xmlapi/boardgame/13,163412?stats=1", "/xmlapi/boardgame/230802?stats=1"]
+    searches = [path for path in bgg_stub.requests if path.startswith("/xmlapi/search")]
+    assert searches == ["/xmlapi/search?search=patchwork&exact=1"]
+    assert sorted(row["title"] for row in posted_rows(bgg_stub)) == ["Azul", "Catan", "Patchwork"]
+
+
+def test_incremental_sync_only_fetches_new_and_stale_games(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+    now = datetime.utcnow()
+    bgg_stub.synced = [
+        {"bgg_id": 13, "content_hash": "a", "last_synced": now.isoformat() + "Z"},
+        {"bgg_id": 230802, "content_hash": "b", "last_synced": (now - timedelta(days=30)).isoformat() + "Z"},
+    ]
+
+    failed = run_import(bgg_stub, tmp_path, ["Catan", "Azul", "Patchwork"],
+                        object_ids=[13, 230802, 0], incremental=True, max_age_days=7)
+
+    assert failed == []
+    details = [path for path in bgg_stub.requests if path.startswith("/xmlapi/boardgame/")]
+    assert details == ["/xmlapi/boardgame/163412,230802?stats=1"]
+    assert sorted(row["title"] for row in posted_rows(bgg_stub)) == ["Azul", "Patchwork"]
+    assert not (tmp_path / "checkpoint.txt").exists()
+
+
+def test_incremental_sync_does_not_search_resolved_names_again(bgg_stub, tmp_path):
+    bgg_stub.games.update(GAMES)
+    now = datetime.utcnow()
+
+    run_import(bgg_stub, tmp_path, ["Catan", "Patchwork"], incremental=True)
+    bgg_stub.synced = [
+        {"bgg_id": 13, "content_hash": "a", "last_synced": now.isoformat() + "Z"},
+        {"bgg_id": 163412, "content_hash": "b", "last_synced": now.isoformat() + "Z"},
+    ]
+    bgg_stub.requests.clear()
+    failed = run_import(bgg_stub, tmp_path, ["Catan", "Patchwork", "Azul"], incremental=True)
+
+    assert failed == []
+    bgg_requests = [path for path in bgg_stub.requests if path.startswith("/xmlapi")]
+    assert bgg_requests == ["/xmlapi/search?search=azul&exact=1", "/xmlapi/boardgame/230802?stats=1"]
+
+
+def test_token_bucket_limits_rate():
+    bucket = loadCatalouge.TokenBucket(rate=20, capacity=2)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # Two requests pass immediately, the other four wait 1/20s each
+    assert time.monotonic() - started >= 0.18
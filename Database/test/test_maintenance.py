@@ -0,0 +1,95 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Maintenance Scheduler Unit Tests    #
+# PyTest                              #
+#                                     #
+#######################################
+
+import threading
+from datetime import datetime, timedelta
+
+import fakeredis
+
+from maintenance import MaintenanceScheduler
+
+
+def test_only_one_worker_runs_per_interval():
+    shared = fakeredis.FakeRedis()
+    calls = []
+    workers = [MaintenanceScheduler(shared, lambda: calls.append(1) or {"rows": 1}, interval=60) for _ in range(3)]
+
+    runs = [worker.run_once() for worker in workers]
+
+    assert len(calls) == 1
+    assert runs[0]["status"] == "ok" and runs[0]["result"] == {"rows": 1}
+    assert runs[1:] == [None, None]
+    assert 0 < shared.pttl("maintenance:cleanup:lock") <= 54000
+
+
+def test_failed_runs_are_recorded():
+    def broken():
+        raise RuntimeError("database is gone")
+
+    scheduler = MaintenanceScheduler(fakeredis.FakeRedis(), broken, interval=60)
+    scheduler.run_once()
+
+    status = scheduler.status()
+    assert status["last_run"]["status"] == "failed"
+    assert status["last_run"]["error"] == "database is gone"
+    assert (status["runs"], status["failures"]) == (1, 1)
+
+
+def test_scheduler_thread_runs_at_start_and_stops():
+    ran = threading.Event()
+    scheduler = MaintenanceScheduler(fakeredis.FakeRedis(), lambda: ran.set() or {}, interval=3600)
+
+    scheduler.start()
+    assert ran.wait(5)
+    assert scheduler.status()["running_here"]
+    scheduler.stop(timeout=5)
+    assert not scheduler.status()["running_here"]
+
+
+def test_disabled_scheduler_does_not_start():
+    scheduler = MaintenanceScheduler(fakeredis.FakeRedis(), dict, interval=0)
+    scheduler.start()
+    assert scheduler.thread is None
+
+
+def test_scheduled_cleanup_and_status_endpoint(client, app_module):
+    app_module.db.session.add(app_module.Game(
+        title="Game",
+        organizer="Organizer",
+        start_time=datetime.utcnow() - timedelta(days=1, hours=3),
+        end_time=datetime.utcnow() - timedelta(days=1),
+        description="Game night",
+        players="2-4",
+    ))
+    app_module.db.session.commit()
+
+    run = app_module.maintenance.run_once()
+    assert run["result"]["games_deleted"] == 1
+
+    status = client.get("/maintenance/status").get_json()
+    assert status["enabled"] is False
+    assert status["runs"] == 1
+    assert status["last_run"]["result"]["games_deleted"] == 1
+    assert status["lock_ttl_ms"] is not None
+
+
+def test_scheduler_starts_with_the_first_request_not_at_import(client, app_module, monkeypatch):
+    ran = threading.Event()
+    scheduler = MaintenanceScheduler(app_module.r, lambda: ran.set() or {}, interval=3600)
+    monkeypatch.setattr(app_module, "maintenance", scheduler)
+    assert scheduler.thread is None
+
+    try:
+        client.get("/maintenance/status")
+        assert ran.wait(5)
+        thread = scheduler.thread
+        client.get("/maintenance/status")
+        assert scheduler.thread is thread
+    finally:
+        scheduler.stop(timeout=5)
@@ -0,0 +1,67 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Migration Unit Tests                #
+# PyTest                              #
+#                                     #
+#######################################
+
+import importlib.util
+import os
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+
+VERSIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations", "versions")
+
+
+def load_migration(name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(VERSIONS, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+numeric_ranges = load_migration("8e2f61c4d5b9_catalogue_numeric_ranges")
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2-4", (2, 4)),
+    ("3", (3, 3)),
+    ("60-90 min", (60, 90)),
+    ("4-2", (2, 4)),
+    ("1–5", (1, 5)),
+    ("Unknown", (0, 0)),
+    ("", (0, 0)),
+    (None, (0, 0)),
+])
+def test_parse_range(value, expected):
+    assert numeric_ranges.parse_range(value) == expected
+
+
+def test_parse_range_matches_the_app(app_module):
+    for value in ("2-4", "3", "60-90 min", "Unknown", None):
+        assert numeric_ranges.parse_range(value) == app_module.parse_range(value)
+
+
+def test_upgrade_backfills_the_ranges(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE catalogue (id INTEGER PRIMARY KEY, title VARCHAR(255), players VARCHAR(255), duration VARCHAR(255))"
+        ))
+        connection.execute(text(
+            "INSERT INTO catalogue (id, title, players, duration) VALUES"
+            " (1, 'Catan', '3-4', '60-120 min'), (2, 'Patchwork', '2', '30'), (3, 'Mystery', 'Unknown', NULL)"
+        ))
+        with Operations.context(MigrationContext.configure(connection)):
+            numeric_ranges.upgrade()
+
+        rows = connection.execute(text(
+            "SELECT id, min_players, max_players, min_playtime, max_playtime FROM catalogue ORDER BY id"
+        )).fetchall()
+
+    assert [tuple(row) for row in rows] == [(1, 3, 4, 60, 120), (2, 2, 2, 30, 30), (3, 0, 0, 0, 0)]
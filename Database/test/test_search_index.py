@@ -0,0 +1,96 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Catalogue Search Index Unit Tests   #
+# PyTest                              #
+#                                     #
+#######################################
+
+import pytest
+
+from search_index import CatalogueSearchIndex, edit_distance
+
+GAMES = [
+    (1, "Catan", "Trade and build settlements on an island"),
+    (2, "Pandemic", "Work together to cure diseases"),
+    (3, "Ticket to Ride", "Build train routes across the map"),
+    (4, "Carcassonne", "Place tiles to build a medieval landscape, a classic like Catan"),
+    (5, "Catacombs", "Flick discs through a dungeon"),
+]
+
+
+@pytest.fixture
+def index():
+    index = CatalogueSearchIndex()
+    index.build(GAMES, generation=3)
+    return index
+
+
+def ids(matches):
+    return [doc_id for doc_id, _ in matches]
+
+
+def test_build_records_the_generation(index):
+    assert index.loaded
+    assert index.generation == 3
+
+
+def test_title_matches_rank_above_description_matches(index):
+    assert ids(index.search("catan")) == [1, 4]
+
+
+def test_every_word_has_to_match(index):
+    assert ids(index.search("build train")) == [3]
+    assert index.search("catan train") == []
+    # Stopwords are ignored
+    assert ids(index.search("the pandemic")) == [2]
+
+
+def test_prefixes_match(index):
+    matches = ids(index.search("cat"))
+    assert set(matches[:2]) == {1, 5}
+    assert matches[2] == 4
+    assert ids(index.search("tick")) == [3]
+
+
+def test_typos_match(index):
+    assert ids(index.search("pandemik")) == [2]
+    assert ids(index.search("carcasone")) == [4]
+    # Short words have to match exactly or as a prefix
+    assert index.search("cst") == []
+
+
+def test_exact_matches_rank_above_prefixes_and_typos():
+    index = CatalogueSearchIndex()
+    index.build([(1, "Azules", ""), (2, "Azul", ""), (3, "Axul", "")])
+
+    assert ids(index.search("azul")) == [2, 1, 3]
+
+
+def test_removed_documents_are_not_found(index):
+    index.remove(2)
+
+    assert index.search("pandemic") == []
+    assert "pandemic" not in index.postings
+    assert "pandemic" not in index.vocabulary
+    # Terms still used by other documents stay
+    index.remove(1)
+    assert ids(index.search("catan")) == [4]
+
+
+def test_re_adding_a_document_replaces_it(index):
+    index.add(1, "Settlers", "")
+
+    assert ids(index.search("catan")) == [4]
+    assert ids(index.search("settlers")) == [1]
+
+
+def test_limit(index):
+    assert len(index.search("build", limit=2)) == 2
+
+
+def test_edit_distance():
+    assert edit_distance("catan", "catan", 1) == 0
+    assert edit_distance("catan", "katan", 1) == 1
+    assert edit_distance("catan", "cat", 1) == 2
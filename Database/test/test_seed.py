@@ -0,0 +1,125 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Catalogue Seeding Unit Tests        #
+# PyTest                              #
+#                                     #
+#######################################
+
+import fakeredis
+import pytest
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Float, Text, DateTime, select
+
+import seed
+
+
+HEADER = ("objectname,objectid,avgweight,minplayers,maxplayers,playingtime,minplaytime,maxplaytime,"
+          "yearpublished,bggrecagerange,version_publishers,comment\n")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    # The columns of the catalogue table as created by the migrations
+    Table(
+        'catalogue', MetaData(),
+        Column('id', Integer, primary_key=True),
+        Column('title', String(255), nullable=False),
+        Column('description', Text),
+        Column('publisher', String(255)),
+        Column('image', String(1000)),
+        Column('difficulty', Float, nullable=False),
+        Column('players', String(255)),
+        Column('duration', String(255)),
+        Column('yearpublished', Integer),
+        Column('agerange', String(255)),
+        Column('bgg_id', Integer, unique=True),
+        Column('min_players', Integer, nullable=False, server_default='0'),
+        Column('max_players', Integer, nullable=False, server_default='0'),
+        Column('min_playtime', Integer, nullable=False, server_default='0'),
+        Column('max_playtime', Integer, nullable=False, server_default='0'),
+        Column('content_hash', String(64)),
+        Column('last_synced', DateTime),
+    ).metadata.create_all(engine)
+    return engine
+
+
+def write_csv(tmp_path, lines):
+    csv_path = tmp_path / "collection.csv"
+    csv_path.write_text(HEADER + "".join(line + "\n" for line in lines))
+    return str(csv_path)
+
+
+def catalogue(engine):
+    with engine.connect() as connection:
+        table = Table('catalogue', MetaData(), autoload_with=engine)
+        return {row.bgg_id: row for row in connection.execute(select(table))}
+
+
+def test_collection_is_mapped_onto_catalogue(engine, tmp_path):
+    csv_path = write_csv(tmp_path, [
+        "Agricola,31260,3.6354,1,5,150,30,150,2007,12+,Lookout Games,",
+        "Patchwork,163412,1.6,2,2,30,,,2014,8+,,",
+        "Catan,13,2.29,3,4,120,60,120,1995,10+,KOSMOS,a comment",
+        ",999,1,1,1,1,1,1,2000,,,",
+    ])
+
+    assert seed.seed_catalogue(engine, csv_path, chunk_size=2) == 3
+
+    games = catalogue(engine)
+    assert set(games) == {31260, 163412, 13}
+    agricola = games[31260]
+    assert (agricola.title, agricola.difficulty, agricola.publisher) == ("Agricola", 3.6354, "Lookout Games")
+    assert (agricola.players, agricola.duration, agricola.agerange) == ("1-5", "30-150", "12+")
+    assert (agricola.min_playtime, agricola.max_playtime) == (30, 150)
+    # No min/max play time in the export, the single playing time is used
+    assert (games[163412].players, games[163412].duration, games[163412].publisher) == ("2", "30", None)
+
+
+def test_seeding_again_updates_in_place(engine, tmp_path):
+    seed.seed_catalogue(engine, write_csv(tmp_path, ["Catan,13,2.29,3,4,120,60,120,1995,10+,KOSMOS,"]))
+    with engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE catalogue SET description = 'Fetched from BGG'")
+
+    seed.seed_catalogue(engine, write_csv(tmp_path, ["Catan,13,2.3,3,6,120,60,120,1995,10+,KOSMOS,"]))
+
+    games = catalogue(engine)
+    assert len(games) == 1
+    assert (games[13].difficulty, games[13].players, games[13].description) == (2.3, "3-6", "Fetched from BGG")
+
+
+def test_missing_schema_is_reported(tmp_path):
+    with pytest.raises(RuntimeError):
+        seed.seed_catalogue(create_engine(f"sqlite:///{tmp_path / 'empty.db'}"), write_csv(tmp_path, []))
+
+
+def test_seeding_invalidates_the_api_catalogue_cache(engine, tmp_path):
+    redis_client = fakeredis.FakeRedis()
+    redis_client.set("cache:gen:catalogue", 4)
+
+    seed.seed_catalogue(engine, write_csv(tmp_path, ["Catan,13,2.29,3,4,120,60,120,1995,10+,KOSMOS,"]),
+                        redis_client=redis_client)
+
+    assert int(redis_client.get("cache:gen:catalogue")) == 5
+
+
+def test_seeding_works_without_redis(engine, tmp_path):
+    server = fakeredis.FakeServer()
+    server.connected = False
+    redis_client = fakeredis.FakeRedis(server=server)
+
+    assert seed.seed_catalogue(engine, write_csv(tmp_path, ["Catan,13,2.29,3,4,120,60,120,1995,10+,KOSMOS,"]),
+                               redis_client=redis_client) == 1
+
+
+def test_next_bulk_sync_restores_games_the_csv_overwrote(client, app_module, tmp_path):
+    catan = {"title": "Catan", "difficulty": 2.3, "bgg_id": 13, "publisher": "KOSMOS"}
+    assert client.post("/catalogue/bulk", json=[catan]).get_json()["inserted"] == 1
+
+    seed.seed_catalogue(app_module.db.engine, write_csv(tmp_path, ["Catan,13,2.29,3,4,120,60,120,1995,10+,Filosofia,"]))
+    body = client.post("/catalogue/bulk", json=[catan]).get_json()
+
+    assert (body["updated"], body["unchanged"]) == (1, 0)
+    app_module.db.session.expire_all()
+    assert app_module.Catalogue.query.filter_by(bgg_id=13).one().publisher == "KOSMOS"
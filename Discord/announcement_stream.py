@@ -0,0 +1,186 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Announcement Stream Consumer        #
+#                                     #
+#######################################
+
+import asyncio
+import os
+import socket
+
+import redis
+
+# The API adds every announcement to a Redis Stream (capped with MAXLEN) and the
+# bot reads it through a consumer group. Entries stay in the stream while the
+# bot is down and are delivered once it is back, an entry is acknowledged only
+# after it was handled, and entries a crashed consumer left pending are claimed
+# by another one after min_idle_ms. Several bots can share the group, each
+# entry goes to one of them. A handled entry is marked in Redis before it is
+# acknowledged, so an entry whose acknowledgement got lost is not handled twice.
+
+ANNOUNCEMENT_STREAM = os.getenv("ANNOUNCEMENT_STREAM", "announcements")
+ANNOUNCEMENT_GROUP = os.getenv("ANNOUNCEMENT_GROUP", "discord-bot")
+
+
+class StreamConsumer:
+    def __init__(self, redis_client, handler, stream=ANNOUNCEMENT_STREAM, group=ANNOUNCEMENT_GROUP,
+                 consumer=None, batch_size=10, block_ms=5000, min_idle_ms=60000, max_deliveries=5,
+                 dispatcher=None, key=None, handled_ttl=86400):
+        """
+        redis_client   : redis.asyncio connection, can be replaced between run() calls
+        handler        : async callable taking the entry's fields, raising means not handled
+        consumer       : name in the group, keep it stable across restarts so the
+                         bot picks up its own unacknowledged entries first. Defaults
+                         to ANNOUNCEMENT_CONSUMER, else host and pid: two bots on
+                         one host must not share a name
+        block_ms       : how long one read waits for new entries
+        min_idle_ms    : pending time after which another consumer's entry is claimed
+        max_deliveries : deliveries after which a failing entry is dropped
+        dispatcher     : dispatch.Dispatcher to hand entries to instead of handling
+                         each batch inline, key(fields) picks the entries kept in order
+        handled_ttl    : seconds a handled entry stays marked as such
+        """
+        self.redis = redis_client
+        self.handler = handler
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer or os.getenv("ANNOUNCEMENT_CONSUMER") or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.min_idle_ms = min_idle_ms
+        self.max_deliveries = max_deliveries
+        self.dispatcher = dispatcher
+        self.key = key or (lambda fields: None)
+        self.handled_ttl = handled_ttl
+        self.dispatched = set()  # entry ids handed to the dispatcher and not finished yet
+        self.acks = set()  # running acknowledge() tasks
+        self.ready = False
+        self.stats = {"handled": 0, "failed": 0, "claimed": 0, "dropped": 0}
+
+    async def ensure_group(self):
+        # Created from the start of the stream so nothing added before the first bot run is skipped
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def handled_key(self, entry_id):
+        if isinstance(entry_id, bytes):
+            entry_id = entry_id.decode()
+        return f"{self.stream}:handled:{entry_id}"
+
+    async def handle_once(self, entry_id, fields):
+        # Skips entries a previous delivery already handled but did not acknowledge
+        key = self.handled_key(entry_id)
+        if await self.redis.exists(key):
+            return
+        await self.handler(fields)
+        try:
+            await self.redis.set(key, 1, ex=self.handled_ttl)
+        except redis.exceptions.RedisError as e:
+            print(f"Could not mark announcement {entry_id} as handled: {e}")
+
+    async def handle(self, entry_id, fields):
+        try:
+            await self.handle_once(entry_id, fields)
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"Announcement {entry_id} failed, it stays pending: {e}")
+            return
+        try:
+            await self.redis.xack(self.stream, self.group, entry_id)
+        except redis.exceptions.RedisError as e:
+            print(f"Could not acknowledge announcement {entry_id}, it stays pending: {e}")
+            return
+        self.stats["handled"] += 1
+
+    async def acknowledge(self, entry_id, future):
+        self.dispatched.discard(entry_id)
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.stats["failed"] += 1
+            return
+        try:
+            await self.redis.xack(self.stream, self.group, entry_id)
+        except redis.exceptions.RedisError as e:
+            print(f"Could not acknowledge announcement {entry_id}, it stays pending: {e}")
+            return
+        self.stats["handled"] += 1
+
+    async def handle_batch(self, entries):
+        if self.dispatcher is None:
+            # Entries of one batch are handled concurrently, the next read waits for all of them
+            await asyncio.gather(*(self.handle(entry_id, fields) for entry_id, fields in entries))
+            return
+        # The dispatcher runs the handlers, entries are acknowledged as they finish.
+        # submit() waits while the dispatcher is full, which holds back the next read.
+        for entry_id, fields in entries:
+            if entry_id in self.dispatched:
+                continue
+            self.dispatched.add(entry_id)
+            future = await self.dispatcher.submit(self.key(fields), self.handle_once, entry_id, fields)
+            future.add_done_callback(lambda future, entry_id=entry_id: self.acknowledge_later(entry_id, future))
+
+    def acknowledge_later(self, entry_id, future):
+        task = asyncio.create_task(self.acknowledge(entry_id, future))
+        self.acks.add(task)
+        task.add_done_callback(self.acks.discard)
+
+    async def read(self, entry_id, block=None):
+        response = await self.redis.xreadgroup(
+            self.group, self.consumer, {self.stream: entry_id}, count=self.batch_size, block=block
+        )
+        return response[0][1] if response else []
+
+    async def read_own_pending(self):
+        # Entries this consumer received but did not acknowledge before it stopped
+        last_id = "0"
+        while entries := await self.read(last_id):
+            await self.handle_batch(entries)
+            last_id = entries[-1][0]
+
+    async def reclaim(self):
+        """
+        Take over entries other consumers have left pending for min_idle_ms.
+        Entries delivered more than max_deliveries times are acknowledged and dropped.
+        """
+        start_id = "0-0"
+        while True:
+            start_id, entries, _ = await self.redis.xautoclaim(
+                self.stream, self.group, self.consumer, self.min_idle_ms, start_id=start_id, count=self.batch_size
+            )
+            retry = []
+            for entry_id, fields in entries:
+                if entry_id in self.dispatched:
+                    # Still waiting in this bot's dispatcher, not abandoned
+                    continue
+                pending = await self.redis.xpending_range(self.stream, self.group, min=entry_id, max=entry_id, count=1)
+                if pending and pending[0]["times_delivered"] > self.max_deliveries:
+                    print(f"Dropping announcement {entry_id} after {self.max_deliveries} failed deliveries")
+                    await self.redis.xack(self.stream, self.group, entry_id)
+                    self.stats["dropped"] += 1
+                else:
+                    retry.append((entry_id, fields))
+            self.stats["claimed"] += len(retry)
+            await self.handle_batch(retry)
+            if start_id in (b"0-0", "0-0"):
+                return
+
+    async def run(self):
+        self.ready = False
+        await self.ensure_group()
+        self.ready = True
+        await self.read_own_pending()
+        loop = asyncio.get_running_loop()
+        last_reclaim = None
+        while True:
+            if last_reclaim is None or loop.time() - last_reclaim >= self.min_idle_ms / 1000:
+                await self.reclaim()
+                last_reclaim = loop.time()
+            entries = await self.read(">", block=self.block_ms)
+            if entries:
+                await self.handle_batch(entries)
@@ -0,0 +1,132 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Async Bot & Bevy API Client         #
+#                                     #
+#######################################
+
+import asyncio
+import json
+import os
+import random
+
+import aiohttp
+
+# Every call the bot makes to the Bot & Bevy API goes through one aiohttp
+# session, so requests run without blocking the discord.py event loop and
+# reuse pooled keep-alive connections. Each call has a timeout, and failed
+# calls are retried with jittered exponential backoff when that is safe.
+
+API_URL = os.getenv("API_URL", "http://127.0.0.1:5000")
+# Status codes worth retrying: throttling and temporary server trouble
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Methods that are safe to send twice, others only retry with retry=True
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class APIResponse:
+    """Status, headers and body of a finished request, read before the connection is released."""
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class APIClient:
+    def __init__(self, base_url=API_URL, timeout=10, connect_timeout=3, max_retries=3,
+                 backoff=0.5, max_backoff=10, limit=20):
+        """
+        timeout         : total seconds for one attempt
+        connect_timeout : seconds to open a connection
+        max_retries     : retries after the first attempt
+        backoff         : base delay, attempt n waits up to backoff * 2**n (capped at max_backoff)
+        limit           : connections kept open to the API at once
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limit = limit
+        self.session = None
+        self.stats = {"requests": 0, "retries": 0, "errors": 0}
+
+    def get_session(self):
+        # Created on first use so it belongs to the loop the bot runs in
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.limit), timeout=self.timeout,
+            )
+        return self.session
+
+    def delay(self, attempt, headers=None):
+        # Honour Retry-After when the API sends one, otherwise full jitter backoff
+        retry_after = (headers or {}).get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def request(self, method, path, retry=None, **kwargs):
+        """
+        Send a request to path on the API and return an APIResponse. Connection
+        errors, timeouts and RETRY_STATUSES answers are retried for idempotent
+        methods (or when retry=True). The last response is returned even if its
+        status is an error, checking it is up to the caller.
+        """
+        method = method.upper()
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        url = self.base_url + path
+        attempt = 0
+        while True:
+            self.stats["requests"] += 1
+            headers = None
+            try:
+                async with self.get_session().request(method, url, **kwargs) as response:
+                    content = await response.read()
+                    if response.status not in RETRY_STATUSES or not retry or attempt >= self.max_retries:
+                        return APIResponse(response.status, response.headers, content)
+                    headers = response.headers
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                self.stats["errors"] += 1
+                if not retry or attempt >= self.max_retries:
+                    raise
+            self.stats["retries"] += 1
+            await asyncio.sleep(self.delay(attempt, headers))
+            attempt += 1
+
+    async def get(self, path, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+    async def delete(self, path, **kwargs):
+        return await self.request("DELETE", path, **kwargs)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+def get_api_client():
+    return APIClient(
+        API_URL,
+        timeout=float(os.getenv("API_TIMEOUT", 10)),
+        max_retries=int(os.getenv("API_MAX_RETRIES", 3)),
+        limit=int(os.getenv("API_POOL_SIZE", 20)),
+    )
+
+
+# Shared by the bot and its cogs
+api = get_api_client()
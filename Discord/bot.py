@@ -14,15 +14,41 @@ from discord.ext import commands
 import os
 from dotenv import load_dotenv
 from cogs.messages import sendApprovalMessageToAdminChannel
+from announcement_stream import StreamConsumer
+from dispatch import Dispatcher
+from scheduler import JobScheduler
+from api_client import api
 import asyncio
 import redis
+import redis.asyncio as aioredis
 import json
 from datetime import datetime, timedelta
 import pytz
-import requests
 import re
 import io
 import base64
+import functools
+
+class BotAndBevy(commands.Bot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.background_tasks = []
+
+    def start_background_tasks(self):
+        # on_ready fires again after every reconnect, the loops are only started the first time
+        if self.background_tasks:
+            return
+        self.background_tasks = [
+            self.loop.create_task(redis_listener(self)),
+            self.loop.create_task(self.scheduler.run_forever()),
+        ]
+
+    async def close(self):
+        for task in self.background_tasks:
+            task.cancel()
+        # Release the pooled API connections with the Discord connection
+        await api.close()
+        await super().close()
 
 async def load_cogs(bot):
     cog_list = [
@@ -41,7 +67,11 @@ async def run_bot():
     intents.members = True
     intents.reactions = True
 
-    bot = commands.Bot(command_prefix="/", intents=intents)
+    bot = BotAndBevy(command_prefix="/", intents=intents)
+    bot.scheduler = JobScheduler(redis_connection(), {
+        'rsvp_reminder': functools.partial(send_rsvp_reminder, bot),
+        'delete_announcement': functools.partial(delete_ended_announcement, bot),
+    })
 
     # Add the RSVP reaction removal of 👍 only!
     @bot.event
@@ -105,6 +135,7 @@ async def run_bot():
                 await removeRSVPToGame(numberAttending, reaction, message, embed, embedCopy, True)
 
             # Unschedule the reminder
+            await bot.scheduler.cancel(reminder_job_id(message, user))
             gameID = next((f.value for f in embed.fields if f.name == "\u200b"), None)
 
             participantRemoveJSON = {
@@ -112,7 +143,7 @@ async def run_bot():
                 "participant": str(user.id),
                 "id": gameID
             }
-            requests.post("http://127.0.0.1:5000/participants/remove", json=participantRemoveJSON)
+            await api.post("/participants/remove", json=participantRemoveJSON)
 
     @bot.event
     async def on_reaction_add(reaction, user):
@@ -170,8 +201,8 @@ async def run_bot():
         if str(reaction.emoji) == '👍':
             # Add participant via API
             gameID = next((f.value for f in embed.fields if f.name == "\u200b"), None)
-            response = requests.post(
-                "http://127.0.0.1:5000/participants/add",
+            response = await api.post(
+                "/participants/add",
                 json={"type": gameEventType, "participant": user.id, "id": gameID}
             )
 
@@ -191,16 +222,11 @@ async def run_bot():
             now_utc = datetime.now(pytz.timezone("US/Eastern")).astimezone(pytz.utc)
             delay = (dt_start - timedelta(hours=1) - now_utc).total_seconds()
 
-            async def send_dm_reminder(msg):
-                await asyncio.sleep(delay)
-                thumbs_up = next((r for r in msg.reactions if str(r.emoji)=='👍'), None)
-                if thumbs_up:
-                    users = await thumbs_up.users().flatten()
-                    if user in users:
-                        await user.send("Your game is starting soon!", embed=msg.embeds[0])
-
             if delay > 0:
-                bot.loop.create_task(send_dm_reminder(message))
+                await bot.scheduler.schedule(
+                    reminder_job_id(message, user), 'rsvp_reminder', dt_start - timedelta(hours=1),
+                    channel_id=channel.id, message_id=message.id, user_id=user.id,
+                )
             else:
                 await user.send("Your game starts in under an hour", embed=message.embeds[0])
 
@@ -208,9 +234,10 @@ async def run_bot():
             if gameEventType == 'game':
                 numberAttending = next((f.value for f in embed.fields if f.name == "Number Attending"), None)
                 await removeRSVPToGame(numberAttending, reaction, message, embed, embedCopy, previouslyRSVPd)
+            await bot.scheduler.cancel(reminder_job_id(message, user))
             gameID = next((f.value for f in embed.fields if f.name == "\u200b"), None)
-            requests.post(
-                "http://127.0.0.1:5000/participants/remove",
+            await api.post(
+                "/participants/remove",
                 json={"type": gameEventType, "participant": str(user.id), "id": gameID}
             )
 
@@ -219,16 +246,13 @@ async def run_bot():
         print("Bot is getting ready")
         await bot.tree.sync()
         print("Bot is ready")
-        bot.loop.create_task(redis_listener(bot))
+        bot.start_background_tasks()
 
     await load_cogs(bot)
     return bot
 
-def redis_subscriber():
-    r = redis.Redis(host='localhost', port=6379, db=0)
-    pubsub = r.pubsub()
-    pubsub.subscribe('new_event', 'new_game', 'new_game_with_room')
-    return pubsub
+def redis_connection():
+    return aioredis.Redis(host='localhost', port=6379, db=0)
 
 async def handle_new_game_with_room(bot, message):
     payload = json.loads(message['data'].decode('utf-8'))
@@ -303,24 +327,8 @@ async def handle_new_event(bot, message):
 
     # Send and react
     msg = await channel.send(file=file, embed=embed)
-    await msg.add_reaction("👍")
-    await msg.add_reaction("👎")
-
-    # Schedule deletion
-    current_utc = datetime.now(pytz.timezone("US/Eastern")).astimezone(pytz.utc)
-    end_iso = est12hrTo24hrUTC(end_time)
-    delete_dt = datetime.fromisoformat(end_iso)
-    delay = (delete_dt - current_utc).total_seconds()
-
-    async def delete_ended_game():
-        await asyncio.sleep(delay)
-        try:
-            await msg.delete()
-            requests.delete("http://127.0.0.1:5000/games", json={'id': data.get('id', '')})
-        except:
-            pass
-
-    bot.loop.create_task(delete_ended_game())
+    # Only the message goes, the API's cleanup expires the event (and moves recurring ones on)
+    await finish_announcement(bot, msg, end_time)
 
 async def handle_new_game(bot, message):
     data = json.loads(message['data'].decode('utf-8'))
@@ -366,41 +374,114 @@ async def handle_new_game(bot, message):
     embed.add_field(name="\u200b", value=data.get('id', ''), inline=False)
 
     msg = await channel.send(file=file, embed=embed) if file else await channel.send(embed=embed)
-    await msg.add_reaction("👍")
-    await msg.add_reaction("👎")
-
-    # Schedule deletion
-    current_utc = datetime.now(pytz.timezone("US/Eastern")).astimezone(pytz.utc)
-    delete_iso = est12hrTo24hrUTC(end_time)
-    delete_dt = datetime.fromisoformat(delete_iso)
-    delay = (delete_dt - current_utc).total_seconds()
+    await finish_announcement(bot, msg, end_time, "/games", data.get('id', ''))
+
+async def finish_announcement(bot, msg, end_time, api_path=None, id=None):
+    # The message is posted: a failure from here on is only logged, raising
+    # would have the stream deliver the announcement again and post it twice
+    try:
+        await msg.add_reaction("👍")
+        await msg.add_reaction("👎")
+
+        # Schedule deletion
+        await bot.scheduler.schedule(
+            f"delete:{msg.channel.id}:{msg.id}", 'delete_announcement', datetime.fromisoformat(est12hrTo24hrUTC(end_time)),
+            channel_id=msg.channel.id, message_id=msg.id, api_path=api_path, id=id,
+        )
+    except Exception as e:
+        print(f"Announcement {msg.id} was posted but could not be finished: {e}")
+
+def reminder_job_id(message, user):
+    return f"reminder:{message.channel.id}:{message.id}:{user.id}"
+
+async def send_rsvp_reminder(bot, channel_id, message_id, user_id):
+    # DM the user an hour before the start if they are still RSVPd
+    channel = bot.get_channel(channel_id)
+    if channel is None:
+        return
+    try:
+        msg = await channel.fetch_message(message_id)
+    except discord.NotFound:
+        return
+    thumbs_up = next((r for r in msg.reactions if str(r.emoji) == '👍'), None)
+    if thumbs_up is None:
+        return
+    async for user in thumbs_up.users():
+        if user.id == user_id:
+            await user.send("Your game is starting soon!", embed=msg.embeds[0])
+            return
 
-    async def delete_ended_game():
-        await asyncio.sleep(delay)
-        try:
+async def delete_ended_announcement(bot, channel_id, message_id, api_path=None, id=None):
+    # Deletes the message, and what it announced from the API when api_path is given
+    channel = bot.get_channel(channel_id)
+    try:
+        if channel is not None:
+            msg = await channel.fetch_message(message_id)
             await msg.delete()
-            requests.delete("http://127.0.0.1:5000/games", json={'id': data.get('id', '')})
-        except:
-            pass
-
-    bot.loop.create_task(delete_ended_game())
+        if api_path is not None:
+            await api.delete(api_path, json={'id': id})
+    except Exception as e:
+        print(f"Deleting ended announcement {message_id} failed: {e}")
+
+# Handler for each announcement type the API adds to the stream
+ANNOUNCEMENT_HANDLERS = {
+    'new_event': handle_new_event,
+    'new_game': handle_new_game,
+    'new_game_with_room': handle_new_game_with_room,
+}
+
+def announcement_type(fields):
+    return fields[b'type'].decode('utf-8')
+
+async def handle_announcement(bot, fields):
+    handler = ANNOUNCEMENT_HANDLERS.get(announcement_type(fields))
+    if handler is None:
+        print(f"Unknown announcement type {announcement_type(fields)}, skipping it")
+        return
+    await handler(bot, {'channel': announcement_type(fields), 'data': fields[b'data']})
 
-async def redis_listener(bot):
-    pubsub = redis_subscriber()
-    loop = asyncio.get_event_loop()
+async def report_dispatch_metrics(dispatcher, interval):
+    # Queue depth and per announcement type latency/failures, printed while there is traffic
+    last = None
     while True:
-        message = await loop.run_in_executor(None, pubsub.get_message, True, 1)
-        if message and message['type'] == 'message':
-            channel_name = message['channel']
-            if isinstance(channel_name, bytes):
-                channel_name = channel_name.decode('utf-8')
-            if channel_name == 'new_event':
-                await handle_new_event(bot, message)
-            elif channel_name == 'new_game_with_room':
-                await handle_new_game_with_room(bot, message)
-            elif channel_name == 'new_game':
-                await handle_new_game(bot, message)
-        await asyncio.sleep(5)
+        await asyncio.sleep(interval)
+        metrics = dispatcher.metrics()
+        if metrics != last:
+            print(f"Announcement dispatch: {json.dumps(metrics)}")
+            last = metrics
+
+async def redis_listener(bot, connect=redis_connection, max_backoff=30):
+    # Reads the announcement stream, reconnecting with backoff when Redis goes away.
+    # Announcements added in the meantime wait in the stream. Each type posts to
+    # its own channel, so the dispatcher keeps announcements of one type in order
+    # and runs different types in parallel.
+    dispatcher = Dispatcher(
+        workers=int(os.getenv("DISPATCH_WORKERS", 4)),
+        max_queued=int(os.getenv("DISPATCH_MAX_QUEUED", 100)),
+    )
+    reporter = asyncio.create_task(report_dispatch_metrics(dispatcher, int(os.getenv("DISPATCH_METRICS_INTERVAL", 300))))
+    # One consumer for every connection: entries still running in the dispatcher
+    # stay known across reconnects and are not handed to it a second time
+    consumer = StreamConsumer(
+        None, lambda fields: handle_announcement(bot, fields), dispatcher=dispatcher, key=announcement_type,
+    )
+    backoff = 1
+    try:
+        while True:
+            r = consumer.redis = connect()
+            try:
+                await consumer.run()
+            except redis.exceptions.ConnectionError as e:
+                print(f"Redis connection lost, reconnecting in {backoff}s: {e}")
+            finally:
+                await r.aclose()
+            if consumer.ready:
+                backoff = 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+    finally:
+        reporter.cancel()
+        await dispatcher.close()
 
 def utcTo12hrEST(utcString):
     utc_dt = datetime.fromisoformat(utcString)
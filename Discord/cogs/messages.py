@@ -16,7 +16,6 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import requests
 from dotenv import load_dotenv, dotenv_values
 from dateutil import parser
 from datetime import datetime
@@ -27,6 +26,7 @@ import os
 import typing
 import re
 import pytz
+from api_client import api
 class Messages(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
@@ -34,10 +34,10 @@ class Messages(commands.Cog):
     @app_commands.command(name="list_games", description="Lists the current game collection of Board & Bevy")
     @app_commands.describe(
         sort_by="Sort by one of: name, players, difficulty, or time",
-        filter_title="Filter by title substring (e.g., 'Catan')",
-        filter_players="Filter by players (e.g., '4'; supports ranges like '2-6' in the game data)",
+        filter_title="Filter by title or description words (e.g., 'Catan'; partial words and typos match)",
+        filter_players="Filter by players (e.g., '4'; matches games whose player range includes it)",
         filter_difficulty="Filter by difficulty (e.g., '3.5')",
-        filter_duration="Filter by duration (e.g., '60'; supports ranges like '60-90' in the game data)"
+        filter_duration="Filter by duration (e.g., '60'; matches games whose play time range includes it)"
     )
     async def listGames(
         self,
@@ -48,75 +48,52 @@ class Messages(commands.Cog):
         filter_difficulty: str = "",
         filter_duration: str = ""
     ):
-        # Call API to get the game catalogue
-        response = requests.get("http://127.0.0.1:5000/catalogue")
-        games = response.json()
-        
-        # Helper function: Check if a number matches a range string (e.g., "2-6")
-        def check_range_match(value: str, filter_val: str) -> bool:
-            try:
-                filter_num = int(filter_val)
-            except ValueError:
-                return False
-            match = re.search(r'(\d+)\s*-\s*(\d+)', value)
-            if match:
-                min_val = int(match.group(1))
-                max_val = int(match.group(2))
-                return min_val <= filter_num <= max_val
-            else:
-                try:
-                    return int(value) == filter_num
-                except ValueError:
-                    return False
-
-        # Helper function: Extract a number from a string (for sorting ranges, we use the lower bound)
-        def extract_min(value: str) -> int:
-            match = re.search(r'(\d+)', value)
-            if match:
-                return int(match.group(1))
-            return 0
-
-        # Filter the games based on provided parameters
-        filtered_games = []
-        for game in games:
-            # Title filter: check if filter_title is a substring (case-insensitive)
-            title = game.get("title", "")
-            matches_title = filter_title.lower() in title.lower() if filter_title else True
-
-            # Players filter: check if the game players match the filter
-            players = game.get("players", "")
-            matches_players = check_range_match(players, filter_players) if filter_players else True
-
-            # Difficulty filter: check if the game difficulty is within 0.55 of the filter value
-            matches_difficulty = True
+        # Filtering and sorting are done by the API on indexed columns,
+        # only the titles needed for the listing are requested
+        sort_options = {"name": "name", "players": "players", "difficulty": "difficulty",
+                        "time": "duration", "duration": "duration"}
+        params = {
+            "fields": "id,title",
+            "sort_by": sort_options.get(sort_by.lower(), "name"),
+            "limit": 500,
+        }
+        if filter_title:
+            # Goes through the API's search index (prefix and typo tolerant) instead of a scan
+            params["q"] = filter_title
+        invalid_filter = False
+        try:
+            if filter_players:
+                params["players"] = int(filter_players)
+            if filter_duration:
+                params["duration"] = int(filter_duration)
             if filter_difficulty:
-                try:
-                    game_diff = float(game.get("difficulty", 0))
-                    filter_diff = float(filter_difficulty)
-                    if abs(game_diff - filter_diff) > 0.55:
-                        matches_difficulty = False
-                except ValueError:
-                    matches_difficulty = False
-
-            # Duration filter: check if the game duration matches the filter
-            duration = game.get("duration", "")
-            matches_duration = check_range_match(duration, filter_duration) if filter_duration else True
-
-            if matches_title and matches_players and matches_difficulty and matches_duration:
-                filtered_games.append(game)
-
-        # Sort the filtered games based on the sort_by parameter
-        sort_by = sort_by.lower()
-        if sort_by == "name":
-            sorted_games = sorted(filtered_games, key=lambda g: g.get("title", "").lower())
-        elif sort_by == "players":
-            sorted_games = sorted(filtered_games, key=lambda g: extract_min(g.get("players", "")))
-        elif sort_by == "difficulty":
-            sorted_games = sorted(filtered_games, key=lambda g: float(g.get("difficulty", 0)))
-        elif sort_by in ["time", "duration"]:
-            sorted_games = sorted(filtered_games, key=lambda g: extract_min(g.get("duration", "")))
-        else:
-            sorted_games = filtered_games
+                # Difficulty filter: the game difficulty must be within 0.55 of the filter value
+                filter_diff = float(filter_difficulty)
+                params["difficulty_min"] = filter_diff - 0.55
+                params["difficulty_max"] = filter_diff + 0.55
+        except ValueError:
+            invalid_filter = True
+
+        # Call API to get the game catalogue, following the cursor until every page is read
+        sorted_games = []
+        while not invalid_filter:
+            try:
+                response = await api.get("/catalogue", params=params)
+                page = response.json() if response.ok else None
+            except Exception as e:
+                print(f"Listing games failed: {e}")
+                page = None
+            if not isinstance(page, list):
+                # An error page (or no answer), stop instead of listing it or following its cursor
+                await interaction.response.send_message(
+                    "The game collection could not be loaded, please try again later.", ephemeral=True
+                )
+                return
+            sorted_games.extend(page)
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                break
+            params["cursor"] = next_cursor
 
         # Build the response string with bullet points for each game title
         if not sorted_games:
@@ -608,8 +585,8 @@ async def sendApprovalMessageToAdminChannel(bot, email, usersDiscordID, usersNam
                 "end_time": game_end_time, # e.g., "2025-03-20T16:00:00Z"
                 "force": False
             }
-            #Then send this off with requests
-            calendar_response = requests.post('http://127.0.0.1:5000/create-game', json=calendar)
+            #Then send this off to the API
+            calendar_response = await api.post('/create-game', json=calendar)
             if calendar_response.status_code == 409:
                 calendarErrorMessage = await gameApprovalChanel.send("The Back Room is full at this time, Take a look at the [calendar](https://calendar.google.com/calendar/u/0?cid=Ym9hcmRuYmV2eUBnbWFpbC5jb20) to double check if you'd like to add it anyways Approve this message")
                 
@@ -625,7 +602,7 @@ async def sendApprovalMessageToAdminChannel(bot, email, usersDiscordID, usersNam
 
                     if str(reaction.emoji) == "👍":
                         calendar['force'] = True
-                        requests.post('http://127.0.0.1:5000/create-game', json=calendar)
+                        await api.post('/create-game', json=calendar)
                     elif str(reaction.emoji) == "👎":
                         await deny_request(bot, gameApprovalMessage, usersDiscordID, email)
                         gameApproved = False
@@ -707,7 +684,7 @@ async def sendApprovalMessageToAdminChannel(bot, email, usersDiscordID, usersNam
             
             gameDict.update(updatedGameDict)
         else:
-            r = requests.post("http://127.0.0.1:5000/games", json=gameDict)
+            r = await api.post("/games", json=gameDict)
 
         
 
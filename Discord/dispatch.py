@@ -0,0 +1,129 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Bounded Announcement Dispatcher     #
+#                                     #
+#######################################
+
+import asyncio
+import time
+from collections import deque
+
+# Runs announcement handlers on a fixed number of worker tasks. Jobs with the
+# same key (the Discord channel they post to) run one after another in the
+# order they were submitted, jobs with different keys run in parallel. At most
+# max_queued jobs wait or run at once, submit() waits for room after that so a
+# burst slows the reader down instead of piling up in memory.
+
+
+class Dispatcher:
+    def __init__(self, workers=4, max_queued=100):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.slots = asyncio.Semaphore(max_queued)
+        self.queues = {}  # key -> deque of waiting jobs
+        self.active = set()  # keys with a job running or queued in ready
+        self.ready = asyncio.Queue()  # keys whose next job can start
+        self.tasks = []
+        self.in_flight = 0
+        self.max_depth = 0
+        self.stats = {}  # key -> handled/failed counts and latency
+
+    def start(self):
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+
+    async def submit(self, key, handler, *args):
+        """
+        Queue handler(*args) behind the earlier jobs of key. Returns a future
+        that resolves to the handler's result, or its exception.
+        """
+        self.start()
+        await self.slots.acquire()
+        self.key_stats(key)
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(key, deque()).append((handler, args, future, time.perf_counter()))
+        self.max_depth = max(self.max_depth, self.depth())
+        if key not in self.active:
+            self.active.add(key)
+            self.ready.put_nowait(key)
+        return future
+
+    def key_stats(self, key):
+        return self.stats.setdefault(key, {
+            "handled": 0, "failed": 0, "wait_ms": 0.0, "total_ms": 0.0, "max_ms": 0.0, "last_error": None,
+        })
+
+    async def run_job(self, key, handler, args, future, queued_at):
+        stats = self.key_stats(key)
+        started = time.perf_counter()
+        stats["wait_ms"] += (started - queued_at) * 1000
+        self.in_flight += 1
+        try:
+            result = await handler(*args)
+        except Exception as e:
+            stats["failed"] += 1
+            stats["last_error"] = str(e)
+            print(f"{key} handler failed: {e}")
+            if not future.done():
+                future.set_exception(e)
+        else:
+            stats["handled"] += 1
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self.in_flight -= 1
+            elapsed = (time.perf_counter() - started) * 1000
+            stats["total_ms"] += elapsed
+            stats["max_ms"] = max(stats["max_ms"], elapsed)
+            self.slots.release()
+
+    async def worker(self):
+        while True:
+            key = await self.ready.get()
+            queue = self.queues[key]
+            await self.run_job(key, *queue.popleft())
+            if queue:
+                # Back of the line so one busy channel does not starve the others
+                self.ready.put_nowait(key)
+            else:
+                del self.queues[key]
+                self.active.discard(key)
+
+    def depth(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    async def join(self):
+        # Wait until every submitted job has finished
+        while self.depth() or self.in_flight:
+            await asyncio.sleep(0.01)
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def metrics(self):
+        """Queue depth per key, and handled/failed counts and latency per key."""
+        keys = {}
+        for key, stats in self.stats.items():
+            finished = stats["handled"] + stats["failed"]
+            keys[key] = dict(
+                stats,
+                wait_ms=round(stats["wait_ms"], 1),
+                total_ms=round(stats["total_ms"], 1),
+                max_ms=round(stats["max_ms"], 1),
+                queued=len(self.queues.get(key, ())),
+                avg_ms=round(stats["total_ms"] / finished, 1) if finished else None,
+                avg_wait_ms=round(stats["wait_ms"] / finished, 1) if finished else None,
+            )
+        return {
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            "queued": self.depth(),
+            "in_flight": self.in_flight,
+            "max_depth": self.max_depth,
+            "keys": keys,
+        }
@@ -0,0 +1,184 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Persistent Job Scheduler            #
+#                                     #
+#######################################
+
+import asyncio
+import json
+import time
+
+import redis
+
+# Delayed bot jobs (RSVP reminders, deleting ended announcements) kept in Redis
+# so they survive restarts: a sorted set orders job ids by due time and a hash
+# holds each job's type and payload. One timer loop sleeps until the earliest
+# job is due, claims everything due by then in one go and runs the batch
+# concurrently. A job id names what the job is about, scheduling the same id
+# again moves it instead of adding a second job.
+#
+# Claiming a job leases it: a script moves it lease seconds into the future and
+# reads its payload in one step. It is only removed once its handler has run,
+# so a job whose bot died halfway comes due again when the lease runs out.
+
+# KEYS: due, data, attempts  ARGV: now, lease until, batch size
+CLAIM_SCRIPT = """
+local claimed = {}
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[3])) do
+    local job = redis.call('HGET', KEYS[2], id)
+    if job then
+        redis.call('ZADD', KEYS[1], ARGV[2], id)
+        table.insert(claimed, {id, job, redis.call('HINCRBY', KEYS[3], id, 1)})
+    else
+        redis.call('ZREM', KEYS[1], id)
+    end
+end
+return claimed
+"""
+
+# Removes a job unless it was scheduled again or cancelled while it ran
+# KEYS: due, data, attempts  ARGV: job id, claimed payload, lease until
+FINISH_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+local due = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not due or tonumber(due) ~= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+return 1
+"""
+
+
+class JobScheduler:
+    def __init__(self, redis_client, handlers, key="bot:jobs", batch_size=100, max_sleep=60,
+                 lease=300, max_attempts=3):
+        """
+        redis_client : redis.asyncio connection
+        handlers     : {job type: async callable taking the job's payload as keyword arguments}
+        batch_size   : most jobs claimed and run at once
+        max_sleep    : longest wait before looking at the schedule again, in seconds
+        lease        : seconds before a claimed job that did not finish is run again
+        max_attempts : runs of a failing job before it is dropped
+        """
+        self.redis = redis_client
+        self.handlers = handlers
+        self.due_key = f"{key}:due"
+        self.data_key = f"{key}:data"
+        self.attempts_key = f"{key}:attempts"
+        self.batch_size = batch_size
+        self.max_sleep = max_sleep
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.wake = asyncio.Event()
+        self.stats = {"scheduled": 0, "cancelled": 0, "run": 0, "failed": 0}
+
+    async def schedule(self, job_id, job_type, due, **payload):
+        """
+        Run handlers[job_type](**payload) at due (a timezone aware datetime or a
+        UNIX timestamp). Replaces an earlier job with the same id.
+        """
+        if job_type not in self.handlers:
+            raise ValueError(f"No handler for {job_type} jobs")
+        due = due.timestamp() if hasattr(due, "timestamp") else float(due)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(self.data_key, job_id, json.dumps({"type": job_type, "payload": payload}))
+        pipe.zadd(self.due_key, {job_id: due})
+        pipe.hdel(self.attempts_key, job_id)
+        await pipe.execute()
+        self.stats["scheduled"] += 1
+        self.wake.set()
+
+    async def cancel(self, job_id):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrem(self.due_key, job_id)
+        pipe.hdel(self.data_key, job_id)
+        pipe.hdel(self.attempts_key, job_id)
+        removed, _, _ = await pipe.execute()
+        if removed:
+            self.stats["cancelled"] += 1
+        return bool(removed)
+
+    async def pending(self):
+        return await self.redis.zcard(self.due_key)
+
+    async def claim_due(self, now):
+        """
+        Lease the jobs due by now. The script runs atomically, so with several
+        bots every job is claimed by exactly one of them. Returns
+        [(job id, raw payload, attempt, lease until)].
+        """
+        lease_until = max(now, time.time()) + self.lease
+        claimed = await self.redis.eval(
+            CLAIM_SCRIPT, 3, self.due_key, self.data_key, self.attempts_key, now, lease_until, self.batch_size
+        )
+        return [(job_id, raw, attempt, lease_until) for job_id, raw, attempt in claimed]
+
+    async def finish(self, job_id, raw, lease_until):
+        return await self.redis.eval(
+            FINISH_SCRIPT, 3, self.due_key, self.data_key, self.attempts_key, job_id, raw, lease_until
+        )
+
+    async def run_job(self, job_id, raw, attempt, lease_until):
+        job = json.loads(raw)
+        handler = self.handlers.get(job["type"])
+        if handler is None:
+            print(f"No handler for {job['type']} job {job_id}, skipping it")
+        else:
+            try:
+                await handler(**job["payload"])
+            except Exception as e:
+                self.stats["failed"] += 1
+                if attempt < self.max_attempts:
+                    # Stays leased, runs again once the lease runs out
+                    print(f"Scheduled {job['type']} job {job_id} failed, retrying in {self.lease}s: {e}")
+                    return
+                print(f"Scheduled {job['type']} job {job_id} failed {attempt} times, dropping it: {e}")
+            else:
+                self.stats["run"] += 1
+        await self.finish(job_id, raw, lease_until)
+
+    async def run_due(self, now=None):
+        """Run every job due by now, a batch at a time. Returns how many ran."""
+        now = time.time() if now is None else now
+        count = 0
+        while jobs := await self.claim_due(now):
+            await asyncio.gather(*(self.run_job(*job) for job in jobs))
+            count += len(jobs)
+        return count
+
+    async def seconds_until_next(self):
+        first = await self.redis.zrange(self.due_key, 0, 0, withscores=True)
+        if not first:
+            return None
+        return first[0][1] - time.time()
+
+    async def run(self):
+        # Jobs that came due while the bot was down run on the first pass
+        while True:
+            self.wake.clear()
+            await self.run_due()
+            delay = await self.seconds_until_next()
+            if delay is not None and delay <= 0:
+                continue
+            timeout = self.max_sleep if delay is None else min(delay, self.max_sleep)
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_forever(self, max_backoff=30):
+        # run(), restarted with backoff when Redis goes away
+        backoff = 1
+        while True:
+            try:
+                await self.run()
+            except redis.exceptions.ConnectionError as e:
+                print(f"Job scheduler lost Redis, retrying in {backoff}s: {e}")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
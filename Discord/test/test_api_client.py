@@ -0,0 +1,108 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# API Client Unit Tests               #
+# PyTest                              #
+#                                     #
+#######################################
+
+import asyncio
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from api_client import APIClient
+
+
+#Minimal stand in for the Bot & Bevy API
+@pytest_asyncio.fixture
+async def api_server():
+    calls = {"catalogue": 0, "games": 0, "slow": 0}
+    peers = set()
+
+    async def catalogue(request):
+        calls["catalogue"] += 1
+        peers.add(request.transport.get_extra_info("peername"))
+        if calls["catalogue"] == 1:
+            return web.Response(status=503, headers={"Retry-After": "0"})
+        return web.json_response([{"id": 1, "title": "Catan"}], headers={"X-Next-Cursor": "abc"})
+
+    async def games(request):
+        calls["games"] += 1
+        return web.json_response({"error": "Database unavailable"}, status=503)
+
+    async def slow(request):
+        calls["slow"] += 1
+        await asyncio.sleep(1)
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_get("/catalogue", catalogue)
+    app.router.add_post("/games", games)
+    app.router.add_get("/slow", slow)
+    server = TestServer(app)
+    await server.start_server()
+    server.calls = calls
+    server.peers = peers
+    yield server
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_get_is_retried_and_reuses_the_connection(api_server):
+    client = APIClient(str(api_server.make_url("")), backoff=0)
+    try:
+        response = await client.get("/catalogue", params={"limit": 500, "difficulty_min": 2.45})
+        await client.get("/catalogue")
+    finally:
+        await client.close()
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": 1, "title": "Catan"}]
+    assert response.headers.get("X-Next-Cursor") == "abc"
+    assert api_server.calls["catalogue"] == 3
+    assert client.stats["retries"] == 1
+    # Every call went over the same pooled connection
+    assert len(api_server.peers) == 1
+
+
+@pytest.mark.asyncio
+async def test_post_is_not_retried(api_server):
+    client = APIClient(str(api_server.make_url("")), backoff=0)
+    try:
+        response = await client.post("/games", json={"title": "Catan"})
+    finally:
+        await client.close()
+
+    assert response.status_code == 503
+    assert not response.ok
+    assert api_server.calls["games"] == 1
+
+
+@pytest.mark.asyncio
+async def test_requests_time_out(api_server):
+    client = APIClient(str(api_server.make_url("")), timeout=0.1, max_retries=1, backoff=0)
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await client.get("/slow")
+    finally:
+        await client.close()
+
+    assert api_server.calls["slow"] == 2
+    assert client.stats["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unreachable_api_raises_after_retries():
+    client = APIClient("http://127.0.0.1:9", max_retries=2, backoff=0)
+    try:
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await client.get("/catalogue")
+    finally:
+        await client.close()
+
+    assert client.stats["requests"] == 3
@@ -0,0 +1,84 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Dispatcher Unit Tests               #
+# PyTest                              #
+#                                     #
+#######################################
+
+import asyncio
+
+import pytest
+
+from dispatch import Dispatcher
+
+
+@pytest.mark.asyncio
+async def test_jobs_of_one_key_run_in_order_and_keys_in_parallel():
+    dispatcher = Dispatcher(workers=4)
+    log = []
+
+    async def post(channel, number):
+        log.append(("start", channel, number))
+        await asyncio.sleep(0.05)
+        log.append(("end", channel, number))
+
+    started = asyncio.get_running_loop().time()
+    for number in range(3):
+        await dispatcher.submit("events", post, "events", number)
+        await dispatcher.submit("games", post, "games", number)
+    await dispatcher.join()
+    elapsed = asyncio.get_running_loop().time() - started
+    await dispatcher.close()
+
+    for channel in ("events", "games"):
+        steps = [(step, number) for step, c, number in log if c == channel]
+        assert steps == [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+    # Two channels in parallel: about 3 sleeps, not 6
+    assert elapsed < 0.25
+
+
+@pytest.mark.asyncio
+async def test_submit_waits_when_the_dispatcher_is_full():
+    dispatcher = Dispatcher(workers=1, max_queued=2)
+    release = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+
+    await dispatcher.submit("events", blocked)
+    await dispatcher.submit("events", blocked)
+    third = asyncio.create_task(dispatcher.submit("events", blocked))
+    await asyncio.sleep(0.05)
+    assert not third.done()
+    assert dispatcher.metrics()["queued"] + dispatcher.metrics()["in_flight"] == 2
+
+    release.set()
+    await asyncio.wait_for(third, 1)
+    await dispatcher.join()
+    await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_failures_and_latency_are_reported_per_key():
+    dispatcher = Dispatcher(workers=2)
+
+    async def ok():
+        return "posted"
+
+    async def broken():
+        raise RuntimeError("Missing Permissions")
+
+    first = await dispatcher.submit("events", ok)
+    second = await dispatcher.submit("games", broken)
+    assert await first == "posted"
+    with pytest.raises(RuntimeError):
+        await second
+    await dispatcher.close()
+
+    metrics = dispatcher.metrics()["keys"]
+    assert (metrics["events"]["handled"], metrics["events"]["failed"]) == (1, 0)
+    assert (metrics["games"]["handled"], metrics["games"]["failed"]) == (0, 1)
+    assert metrics["games"]["last_error"] == "Missing Permissions"
+    assert metrics["events"]["avg_ms"] is not None
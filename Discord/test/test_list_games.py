@@ -0,0 +1,72 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# List Games Command Unit Tests       #
+# PyTest                              #
+#                                     #
+#######################################
+
+import json
+
+import pytest
+
+import cogs.messages as messages
+from api_client import APIResponse
+
+
+class Interaction:
+    def __init__(self):
+        self.sent = []
+        self.response = self
+        self.followup = self
+
+    async def send_message(self, content, ephemeral=False):
+        self.sent.append(content)
+
+    async def send(self, content, ephemeral=False):
+        self.sent.append(content)
+
+
+class API:
+    def __init__(self, *pages):
+        self.pages = list(pages)
+        self.params = []
+
+    async def get(self, path, params=None):
+        self.params.append(dict(params))
+        status, body, headers = self.pages.pop(0)
+        return APIResponse(status, headers, json.dumps(body).encode())
+
+
+async def list_games(monkeypatch, api, **filters):
+    monkeypatch.setattr(messages, "api", api)
+    interaction = Interaction()
+    await messages.Messages.listGames.callback(messages.Messages(None), interaction, **filters)
+    return interaction.sent
+
+
+@pytest.mark.asyncio
+async def test_every_page_is_listed(monkeypatch):
+    api = API(
+        (200, [{"id": 1, "title": "Azul"}], {"X-Next-Cursor": "abc"}),
+        (200, [{"id": 2, "title": "Catan"}], {}),
+    )
+
+    sent = await list_games(monkeypatch, api)
+
+    assert sent == ["* Azul\n* Catan"]
+    assert api.params[1]["cursor"] == "abc"
+
+
+@pytest.mark.asyncio
+async def test_api_errors_are_reported_instead_of_listed(monkeypatch):
+    api = API(
+        (200, [{"id": 1, "title": "Azul"}], {"X-Next-Cursor": "abc"}),
+        (400, {"error": "Invalid cursor"}, {"X-Next-Cursor": "stale"}),
+    )
+
+    sent = await list_games(monkeypatch, api)
+
+    assert sent == ["The game collection could not be loaded, please try again later."]
+    assert len(api.params) == 2
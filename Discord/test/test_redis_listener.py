@@ -0,0 +1,320 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Announcement Stream Unit Tests      #
+# PyTest                              #
+#                                     #
+#######################################
+
+import asyncio
+import functools
+import json
+import os
+import socket
+
+import fakeredis
+import pytest
+import redis
+from fakeredis import aioredis
+
+import bot as bot_module
+from announcement_stream import StreamConsumer
+from scheduler import JobScheduler
+
+STREAM = "announcements"
+GROUP = "discord-bot"
+
+
+class BlockingFakeRedis(aioredis.FakeRedis):
+    #fakeredis answers a blocking XREADGROUP at once, wait like a real server would
+    async def xreadgroup(self, *args, block=None, **kwargs):
+        response = await super().xreadgroup(*args, block=block, **kwargs)
+        if not response and block:
+            await asyncio.sleep(0.01)
+        return response
+
+
+async def add(r, announcement_type, announcement_id):
+    return await r.xadd(STREAM, {"type": announcement_type, "data": json.dumps({"id": announcement_id})})
+
+
+async def wait_for(condition, timeout=2):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_listener_catches_up_on_backlog_and_acknowledges(monkeypatch):
+    server = fakeredis.FakeServer()
+    r = aioredis.FakeRedis(server=server)
+    received = []
+
+    async def handler(bot, message):
+        received.append((message['channel'], json.loads(message['data'])["id"]))
+
+    monkeypatch.setitem(bot_module.ANNOUNCEMENT_HANDLERS, 'new_event', handler)
+    monkeypatch.setitem(bot_module.ANNOUNCEMENT_HANDLERS, 'new_game', handler)
+
+    # Added while no bot was running
+    await add(r, "new_event", 1)
+    await add(r, "new_game", 2)
+
+    listener = asyncio.create_task(
+        bot_module.redis_listener(None, connect=lambda: BlockingFakeRedis(server=server))
+    )
+    try:
+        await wait_for(lambda: len(received) == 2)
+        await add(r, "new_event", 3)
+        await wait_for(lambda: len(received) == 3)
+        # Acknowledged once handled
+        async with asyncio.timeout(2):
+            while (await r.xpending(STREAM, GROUP))["pending"]:
+                await asyncio.sleep(0.01)
+    finally:
+        listener.cancel()
+
+    # Different types are posted in parallel, each type in stream order
+    assert [i for channel, i in received if channel == "new_event"] == [1, 3]
+    assert [i for channel, i in received if channel == "new_game"] == [2]
+
+
+@pytest.mark.asyncio
+async def test_failed_entries_stay_pending_and_are_reclaimed():
+    r = aioredis.FakeRedis()
+    attempts = []
+
+    async def flaky(fields):
+        attempts.append(fields[b"type"])
+        if len(attempts) == 1:
+            raise RuntimeError("Discord is down")
+
+    crashed = StreamConsumer(r, flaky, consumer="bot-1", min_idle_ms=0)
+    await crashed.ensure_group()
+    entry_id = await add(r, "new_event", 1)
+    await crashed.handle_batch(await crashed.read(">"))
+    assert (await r.xpending(STREAM, GROUP))["pending"] == 1
+
+    other = StreamConsumer(r, flaky, consumer="bot-2", min_idle_ms=0)
+    await other.reclaim()
+
+    assert len(attempts) == 2
+    assert other.stats["claimed"] == 1
+    assert (await r.xpending(STREAM, GROUP))["pending"] == 0
+    assert (await r.xrange(STREAM))[0][0] == entry_id
+
+
+@pytest.mark.asyncio
+async def test_entries_failing_too_often_are_dropped():
+    r = aioredis.FakeRedis()
+
+    async def broken(fields):
+        raise RuntimeError("bad payload")
+
+    consumer = StreamConsumer(r, broken, consumer="bot-1", min_idle_ms=0, max_deliveries=2)
+    await consumer.ensure_group()
+    await add(r, "new_event", 1)
+    await consumer.handle_batch(await consumer.read(">"))
+
+    for _ in range(3):
+        await consumer.reclaim()
+
+    assert consumer.stats["dropped"] == 1
+    assert (await r.xpending(STREAM, GROUP))["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_handled_entries_are_not_handled_again_when_the_ack_is_lost(monkeypatch):
+    r = aioredis.FakeRedis()
+    posted = []
+
+    async def post(fields):
+        posted.append(fields[b"type"])
+
+    crashed = StreamConsumer(r, post, consumer="bot-1", min_idle_ms=0)
+    await crashed.ensure_group()
+    await add(r, "new_event", 1)
+
+    async def lost_ack(*args):
+        raise redis.exceptions.ConnectionError("Redis went away")
+    monkeypatch.setattr(r, "xack", lost_ack)
+    await crashed.handle_batch(await crashed.read(">"))
+    monkeypatch.undo()
+    assert (await r.xpending(STREAM, GROUP))["pending"] == 1
+
+    other = StreamConsumer(r, post, consumer="bot-2", min_idle_ms=0)
+    await other.reclaim()
+
+    assert posted == [b"new_event"]
+    assert (await r.xpending(STREAM, GROUP))["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failures_after_posting_do_not_fail_the_announcement():
+    class Message:
+        id = 2
+        channel = None
+
+        async def add_reaction(self, emoji):
+            raise RuntimeError("Missing permissions")
+
+    class Channel:
+        id = 1
+
+        def __init__(self):
+            self.sent = []
+
+        async def send(self, **kwargs):
+            self.sent.append(kwargs)
+            message = Message()
+            message.channel = self
+            return message
+
+    channel = Channel()
+
+    class Bot:
+        def get_channel(self, channel_id):
+            return channel
+
+    data = {"id": 7, "title": "Catan", "image": "https://example.com/catan.jpg",
+            "start_time": "2025-05-01T18:00:00+00:00", "end_time": "2025-05-01T21:00:00+00:00"}
+    await bot_module.handle_new_game(Bot(), {"channel": "new_game", "data": json.dumps(data).encode()})
+
+    assert len(channel.sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_ended_event_announcements_leave_the_event_to_the_api(monkeypatch):
+    deleted = []
+
+    class Message:
+        id = 2
+
+        async def add_reaction(self, emoji):
+            pass
+
+        async def delete(self):
+            deleted.append(self.id)
+
+    class Channel:
+        id = 1
+
+        async def send(self, **kwargs):
+            message = Message()
+            message.channel = self
+            return message
+
+        async def fetch_message(self, message_id):
+            return Message()
+
+    class API:
+        async def delete(self, path, json):
+            deleted.append(path)
+
+    class Bot:
+        def get_channel(self, channel_id):
+            return Channel()
+
+    bot = Bot()
+    bot.scheduler = JobScheduler(aioredis.FakeRedis(), {
+        'delete_announcement': functools.partial(bot_module.delete_ended_announcement, bot),
+    })
+    monkeypatch.setattr(bot_module, "api", API())
+    monkeypatch.setenv("EVENTS_CHANNEL_ID", "1")
+
+    data = {"id": 7, "title": "Weekly Game Night", "recurring": True,
+            "start_time": "2025-05-01T18:00:00+00:00", "end_time": "2025-05-01T21:00:00+00:00"}
+    await bot_module.handle_new_event(bot, {"channel": "new_event", "data": json.dumps(data).encode()})
+
+    assert await bot.scheduler.run_due() == 1
+    # The message is gone, the event itself is expired (or rolled over) by the API's cleanup
+    assert deleted == [2]
+
+
+@pytest.mark.asyncio
+async def test_in_flight_entries_are_not_resubmitted_after_a_reconnect(monkeypatch):
+    server = fakeredis.FakeServer()
+    r = aioredis.FakeRedis(server=server)
+    connections = []
+    submitted = []
+    calls = []
+    release = asyncio.Event()
+
+    class FlakyRedis(BlockingFakeRedis):
+        broken = False
+        reads = 0
+
+        async def xreadgroup(self, *args, **kwargs):
+            if self.broken:
+                raise redis.exceptions.ConnectionError("Connection reset by peer")
+            self.reads += 1
+            return await super().xreadgroup(*args, **kwargs)
+
+    def connect():
+        connections.append(FlakyRedis(server=server))
+        return connections[-1]
+
+    class CountingDispatcher(bot_module.Dispatcher):
+        async def submit(self, key, handler, *args):
+            submitted.append(args[0])
+            return await super().submit(key, handler, *args)
+
+    async def slow_post(bot, message):
+        calls.append(message)
+        await release.wait()
+
+    monkeypatch.setattr(bot_module, "Dispatcher", CountingDispatcher)
+    monkeypatch.setitem(bot_module.ANNOUNCEMENT_HANDLERS, 'new_event', slow_post)
+    await add(r, "new_event", 1)
+
+    listener = asyncio.create_task(bot_module.redis_listener(None, connect=connect))
+    try:
+        await wait_for(lambda: len(calls) == 1)
+        # Redis goes away while the entry is still being posted
+        connections[0].broken = True
+        # The new connection read its own pending entries and moved on to new ones
+        await wait_for(lambda: len(connections) == 2 and connections[1].reads >= 2, timeout=5)
+        release.set()
+        async with asyncio.timeout(2):
+            while (await r.xpending(STREAM, GROUP))["pending"]:
+                await asyncio.sleep(0.01)
+    finally:
+        listener.cancel()
+
+    assert len(submitted) == 1
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_background_tasks_start_once_across_reconnects(monkeypatch):
+    started = []
+
+    async def loop():
+        started.append(1)
+        await asyncio.Event().wait()
+
+    class Scheduler:
+        def run_forever(self):
+            return loop()
+
+    monkeypatch.setattr(bot_module, "redis_listener", lambda bot: loop())
+    bot = bot_module.BotAndBevy(command_prefix="/", intents=bot_module.discord.Intents.default())
+    bot.scheduler = Scheduler()
+    bot.loop = asyncio.get_running_loop()
+
+    bot.start_background_tasks()
+    bot.start_background_tasks()
+    await asyncio.sleep(0)
+
+    assert len(started) == 2
+    for task in bot.background_tasks:
+        task.cancel()
+
+
+def test_bots_on_one_host_get_their_own_consumer_name(monkeypatch):
+    monkeypatch.delenv("ANNOUNCEMENT_CONSUMER", raising=False)
+    assert StreamConsumer(None, None).consumer == f"{socket.gethostname()}:{os.getpid()}"
+
+    monkeypatch.setenv("ANNOUNCEMENT_CONSUMER", "bot-1")
+    assert StreamConsumer(None, None).consumer == "bot-1"
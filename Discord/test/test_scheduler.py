@@ -0,0 +1,145 @@
+#######################################
+#                                     #
+# Bot & Bevy                          #
+#                                     #
+# Job Scheduler Unit Tests            #
+# PyTest                              #
+#                                     #
+#######################################
+
+import asyncio
+import time
+
+import fakeredis
+import pytest
+from fakeredis import aioredis
+
+from scheduler import JobScheduler
+
+
+def recorder(runs):
+    async def remind(user_id):
+        runs.append(user_id)
+    return {"rsvp_reminder": remind}
+
+
+@pytest.mark.asyncio
+async def test_jobs_survive_a_restart_and_run_once_due():
+    server = fakeredis.FakeServer()
+    now = time.time()
+    before_restart = JobScheduler(aioredis.FakeRedis(server=server), recorder([]))
+    await before_restart.schedule("reminder:1", "rsvp_reminder", now - 60, user_id=1)
+    await before_restart.schedule("reminder:2", "rsvp_reminder", now - 30, user_id=2)
+    await before_restart.schedule("reminder:3", "rsvp_reminder", now + 3600, user_id=3)
+
+    runs = []
+    after_restart = JobScheduler(aioredis.FakeRedis(server=server), recorder(runs))
+
+    assert await after_restart.run_due() == 2
+    assert sorted(runs) == [1, 2]
+    assert await after_restart.pending() == 1
+    assert await after_restart.run_due() == 0
+
+
+@pytest.mark.asyncio
+async def test_rescheduling_coalesces_and_cancel_removes():
+    runs = []
+    scheduler = JobScheduler(aioredis.FakeRedis(), recorder(runs))
+    now = time.time()
+
+    await scheduler.schedule("reminder:1", "rsvp_reminder", now + 3600, user_id=1)
+    await scheduler.schedule("reminder:1", "rsvp_reminder", now - 1, user_id=1)
+    await scheduler.schedule("reminder:2", "rsvp_reminder", now - 1, user_id=2)
+    assert await scheduler.pending() == 2
+    assert await scheduler.cancel("reminder:2")
+    assert not await scheduler.cancel("reminder:2")
+
+    await scheduler.run_due()
+    assert runs == [1]
+
+
+@pytest.mark.asyncio
+async def test_every_job_is_claimed_by_one_bot():
+    server = fakeredis.FakeServer()
+    runs = []
+    bots = [JobScheduler(aioredis.FakeRedis(server=server), recorder(runs), batch_size=7) for _ in range(3)]
+    for i in range(50):
+        await bots[0].schedule(f"reminder:{i}", "rsvp_reminder", time.time() - 1, user_id=i)
+
+    await asyncio.gather(*(bot.run_due() for bot in bots))
+
+    assert sorted(runs) == list(range(50))
+
+
+@pytest.mark.asyncio
+async def test_timer_loop_wakes_for_new_jobs():
+    runs = []
+    scheduler = JobScheduler(aioredis.FakeRedis(), recorder(runs), max_sleep=60)
+    loop = asyncio.create_task(scheduler.run())
+    try:
+        await asyncio.sleep(0.05)
+        await scheduler.schedule("reminder:1", "rsvp_reminder", time.time() + 0.1, user_id=1)
+        async with asyncio.timeout(2):
+            while not runs:
+                await asyncio.sleep(0.01)
+    finally:
+        loop.cancel()
+
+    assert runs == [1]
+    assert scheduler.stats["run"] == 1
+
+
+@pytest.mark.asyncio
+async def test_jobs_of_a_bot_that_died_while_running_them_run_again():
+    server = fakeredis.FakeServer()
+    now = time.time()
+    crashed = JobScheduler(aioredis.FakeRedis(server=server), recorder([]), lease=60)
+    await crashed.schedule("reminder:1", "rsvp_reminder", now - 1, user_id=1)
+    assert len(await crashed.claim_due(now)) == 1  # and never finishes it
+
+    runs = []
+    restarted = JobScheduler(aioredis.FakeRedis(server=server), recorder(runs), lease=60)
+    assert await restarted.run_due(now) == 0
+    assert await restarted.run_due(now + 61) == 1
+    assert runs == [1]
+    assert await restarted.pending() == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduling_a_running_job_again_keeps_the_new_one():
+    runs = []
+    scheduler = None
+
+    async def remind(user_id):
+        runs.append(user_id)
+        await scheduler.schedule("reminder:1", "rsvp_reminder", time.time() + 3600, user_id=2)
+
+    scheduler = JobScheduler(aioredis.FakeRedis(), {"rsvp_reminder": remind})
+    await scheduler.schedule("reminder:1", "rsvp_reminder", time.time() - 1, user_id=1)
+
+    assert await scheduler.run_due() == 1
+    assert runs == [1]
+    assert await scheduler.pending() == 1
+    assert b'"user_id": 2' in await scheduler.redis.hget(scheduler.data_key, "reminder:1")
+
+
+@pytest.mark.asyncio
+async def test_failing_jobs_are_retried_then_dropped():
+    attempts = []
+
+    async def remind(user_id):
+        attempts.append(user_id)
+        raise RuntimeError("Discord unavailable")
+
+    scheduler = JobScheduler(aioredis.FakeRedis(), {"rsvp_reminder": remind}, lease=0.01, max_attempts=2)
+    await scheduler.schedule("reminder:1", "rsvp_reminder", time.time() - 1, user_id=1)
+
+    await scheduler.run_due()
+    assert await scheduler.pending() == 1
+    await asyncio.sleep(0.02)
+    await scheduler.run_due()
+
+    assert attempts == [1, 1]
+    assert scheduler.stats["failed"] == 2
+    assert await scheduler.pending() == 0
+    assert not await scheduler.redis.exists(scheduler.data_key, scheduler.attempts_key)
@@ -155,7 +155,7 @@ export default function EventCard({ event, isValid, resetEvents }) {
 
             {event.image && (
               <img
-                src={event.image}
+                src={event.images?.card || event.image}
                 alt={event.title}
                 className="w-full h-40 object-contain rounded-lg transition-all duration-300"
               />
@@ -8,6 +8,15 @@ import CreateBoardGameModal from "./components/CreateBoardGameModal";
 import LoginModal from "./components/LoginModal";
 import api from "./api/axiosClient";
 
+// Start of today as stored by the API (local wall time sent with a Z suffix,
+// see combineDateTime in CreateEventModal), so listings skip finished days
+function startOfToday() {
+  const today = new Date();
+  today.setHours(0, 0, 0, 0);
+  today.setMinutes(today.getMinutes() - today.getTimezoneOffset());
+  return today.toISOString();
+}
+
 export default function Home() {
   const [activeTab, setActiveTab] = useState(
     () => localStorage.getItem("activeTab") || "events"
@@ -30,7 +39,7 @@ export default function Home() {
 
   const fetchEvents = async () => {
     try {
-      const response = await api.get("/events");
+      const response = await api.get("/events", { params: { from: startOfToday() } });
       setEvents(response.data);
     } catch (error) {
       console.error("Error fetching events:", error);
@@ -39,7 +48,7 @@ export default function Home() {
 
   const fetchGames = async () => {
     try {
-      const response = await api.get("/games");
+      const response = await api.get("/games", { params: { from: startOfToday() } });
       setGames(response.data);
     } catch (error) {
       console.error("Error fetching games:", error);